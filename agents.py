@@ -1,18 +1,82 @@
-import streamlit as st
-from agno.agent import Agent
-from agno.models.openai import OpenAIChat
-from agno.tools.email import EmailTools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-def create_resume_analyzer() -> Agent:
+from metrics import inc, traced
+
+if TYPE_CHECKING:
+    from agno.agent import Agent
+
+ANALYZER_MODEL_ID = "gpt-4o"
+EMAIL_MODEL_ID = "gpt-4o"
+FEEDBACK_MODEL_ID = "gpt-4o"
+REPAIR_MODEL_ID = "gpt-4o-mini"
+AGENT_REGISTRY_MAX_CONFIGS = 16
+
+_receiver_email: ContextVar[str | None] = ContextVar("receiver_email", default=None)
+
+_idle_agents = OrderedDict()
+_registry_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _recipient_email_tools():
+    """Define the EmailTools subclass on first use, so agno is only imported when an agent is built."""
+    from agno.tools.email import EmailTools
+
+    class RecipientEmailTools(EmailTools):
+        """EmailTools that sends to the recipient of the current call instead of one fixed at construction."""
+
+        @property
+        def receiver_email(self) -> str | None:
+            return _receiver_email.get()
+
+        @receiver_email.setter
+        def receiver_email(self, value):
+            # EmailTools.__init__ assigns the receiver; cached agents take it from email_recipient() instead.
+            pass
+
+    return RecipientEmailTools
+
+
+def _session_setting(name: str):
+    """Read a sidebar setting for callers that did not pass one; streamlit is imported only then."""
+    import streamlit as st
+
+    return st.session_state[name]
+
+
+@contextmanager
+def email_recipient(receiver_email: str):
+    """Route emails sent by any email agent in this block to receiver_email."""
+    token = _receiver_email.set(receiver_email)
+    try:
+        yield
+    finally:
+        _receiver_email.reset(token)
+
+
+@traced("agent.build.analyzer")
+def create_resume_analyzer(api_key: str | None = None) -> "Agent":
     """Creates and returns a resume analysis agent."""
-    if not st.session_state.openai_api_key:
+    api_key = api_key or _session_setting("openai_api_key")
+    if not api_key:
+        import streamlit as st
+
         st.error("Please enter your OpenAI API key first.")
         return None
 
+    from agno.agent import Agent
+    from agno.models.openai import OpenAIChat
+
     return Agent(
         model=OpenAIChat(
-            id="gpt-4o",
-            api_key=st.session_state.openai_api_key
+            id=ANALYZER_MODEL_ID,
+            api_key=api_key,
+            response_format={"type": "json_object"}
         ),
         description="You are an expert recruiter who analyzes resumes across all industries and job roles.",
         instructions=[
@@ -27,18 +91,28 @@ def create_resume_analyzer() -> Agent:
         ]
     )
 
-def create_email_agent() -> Agent:
-    """Creates and returns an email handling agent."""
+
+@traced("agent.build.email")
+def create_email_agent(
+    api_key: str | None = None,
+    sender_email: str | None = None,
+    sender_name: str | None = None,
+    sender_passkey: str | None = None
+) -> "Agent":
+    """Creates and returns an email handling agent. The recipient is set per call with email_recipient()."""
+    from agno.agent import Agent
+    from agno.models.openai import OpenAIChat
+
+    sender_name = sender_name or _session_setting("company_name")
     return Agent(
         model=OpenAIChat(
-            id="gpt-4o",
-            api_key=st.session_state.openai_api_key
+            id=EMAIL_MODEL_ID,
+            api_key=api_key or _session_setting("openai_api_key")
         ),
-        tools=[EmailTools(
-            receiver_email=st.session_state.candidate_email,
-            sender_email=st.session_state.email_sender,
-            sender_name=st.session_state.company_name,
-            sender_passkey=st.session_state.email_passkey
+        tools=[_recipient_email_tools()(
+            sender_email=sender_email or _session_setting("email_sender"),
+            sender_name=sender_name,
+            sender_passkey=sender_passkey or _session_setting("email_passkey")
         )],
         description="You are a professional recruitment coordinator handling email communications.",
         instructions=[
@@ -47,8 +121,141 @@ def create_email_agent() -> Agent:
             "Maintain a friendly yet professional tone",
             "Always end emails with exactly: 'Best,\nThe AI Recruiting Team'",
             "Never include the sender's or receiver's name in the signature",
-            f"The name of the company is '{st.session_state.company_name}'",
+            f"The name of the company is '{sender_name}'",
             "Do not use ** or any other markdown formatting for titles. Write plain text instead."
         ],
         show_tool_calls=True
-    )
\ No newline at end of file
+    )
+
+
+@traced("agent.build.feedback")
+def create_feedback_writer(api_key: str | None = None) -> "Agent":
+    """Creates an agent without tools that only writes the personalized paragraph of a rejection email."""
+    from agno.agent import Agent
+    from agno.models.openai import OpenAIChat
+
+    return Agent(
+        model=OpenAIChat(
+            id=FEEDBACK_MODEL_ID,
+            api_key=api_key or _session_setting("openai_api_key")
+        ),
+        description="You are a professional recruitment coordinator writing constructive candidate feedback.",
+        instructions=[
+            "Write a single short paragraph of plain text, with no greeting and no signature",
+            "Be empathetic and human",
+            "Mention specific strengths and gaps from the feedback you are given",
+            "Suggest a few learning resources for the missing skills",
+            "Do not use ** or any other markdown formatting"
+        ]
+    )
+
+
+@traced("agent.build.repair")
+def create_output_repairer(api_key: str | None = None) -> "Agent":
+    """Creates a small-model agent that only repairs malformed JSON against a schema."""
+    from agno.agent import Agent
+    from agno.models.openai import OpenAIChat
+
+    return Agent(
+        model=OpenAIChat(
+            id=REPAIR_MODEL_ID,
+            api_key=api_key or _session_setting("openai_api_key"),
+            response_format={"type": "json_object"}
+        ),
+        description="You repair malformed JSON so that it matches a given JSON schema.",
+        instructions=[
+            "Only fix syntax, types and out-of-range or invalid enum values",
+            "Never invent an evaluation that is not in the input",
+            "Return only the JSON object"
+        ]
+    )
+
+
+def _checkout(key: tuple, build):
+    """Reuse an idle agent built for this config, or build one. Agents are never shared by two callers at once."""
+    with _registry_lock:
+        idle = _idle_agents.get(key)
+        if idle:
+            _idle_agents.move_to_end(key)
+            inc("agent_registry_checkouts_total", kind=key[0], result="reused")
+            return idle.pop()
+    inc("agent_registry_checkouts_total", kind=key[0], result="built")
+    return build()
+
+
+def _checkin(key: tuple, agent: "Agent"):
+    memory = getattr(agent, "memory", None)
+    if hasattr(memory, "clear"):
+        memory.clear()
+
+    with _registry_lock:
+        _idle_agents.setdefault(key, []).append(agent)
+        _idle_agents.move_to_end(key)
+        while len(_idle_agents) > AGENT_REGISTRY_MAX_CONFIGS:
+            _idle_agents.popitem(last=False)
+
+
+def invalidate_agents(api_key: str | None = None):
+    """Drop cached agents built with api_key (all of them if None), e.g. after the sidebar config changes."""
+    with _registry_lock:
+        for key in list(_idle_agents):
+            if api_key is None or key[1] == api_key:
+                del _idle_agents[key]
+
+
+@contextmanager
+def resume_analyzer(api_key: str | None = None):
+    """Check out a cached resume analyzer whose OpenAI client stays alive across requests."""
+    api_key = api_key or _session_setting("openai_api_key")
+    key = ("analyzer", api_key, ANALYZER_MODEL_ID)
+    agent = _checkout(key, lambda: create_resume_analyzer(api_key))
+    try:
+        yield agent
+    finally:
+        if agent:
+            _checkin(key, agent)
+
+
+@contextmanager
+def email_agent(
+    api_key: str | None = None,
+    sender_email: str | None = None,
+    sender_name: str | None = None,
+    sender_passkey: str | None = None
+):
+    """Check out a cached email agent for the given sender, defaulting to the one configured in the sidebar."""
+    api_key = api_key or _session_setting("openai_api_key")
+    sender_email = sender_email or _session_setting("email_sender")
+    sender_name = sender_name or _session_setting("company_name")
+    sender_passkey = sender_passkey or _session_setting("email_passkey")
+
+    key = ("email", api_key, EMAIL_MODEL_ID, sender_email, sender_name, sender_passkey)
+    agent = _checkout(key, lambda: create_email_agent(api_key, sender_email, sender_name, sender_passkey))
+    try:
+        yield agent
+    finally:
+        _checkin(key, agent)
+
+
+@contextmanager
+def feedback_writer(api_key: str | None = None):
+    """Check out a cached feedback writer for the given or configured API key."""
+    api_key = api_key or _session_setting("openai_api_key")
+    key = ("feedback", api_key, FEEDBACK_MODEL_ID)
+    agent = _checkout(key, lambda: create_feedback_writer(api_key))
+    try:
+        yield agent
+    finally:
+        _checkin(key, agent)
+
+
+@contextmanager
+def output_repairer(api_key: str | None = None):
+    """Check out a cached JSON repair agent for the given or configured API key."""
+    api_key = api_key or _session_setting("openai_api_key")
+    key = ("repair", api_key, REPAIR_MODEL_ID)
+    agent = _checkout(key, lambda: create_output_repairer(api_key))
+    try:
+        yield agent
+    finally:
+        _checkin(key, agent)
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import closing
+
+CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", os.path.join(tempfile.gettempdir(), "resume_analysis_cache.sqlite3"))
+CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "5000"))
+
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_stats_lock = threading.Lock()
+_schema_ready = False
+
+
+def _count(name: str, amount: int = 1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the cache DB. Use as `with closing(_connect()) as conn, conn:`; sqlite3's own context manager commits but never closes."""
+    global _schema_ready
+
+    conn = sqlite3.connect(CACHE_PATH, timeout=10)
+    if not _schema_ready:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                cache_key TEXT PRIMARY KEY,
+                selected INTEGER NOT NULL,
+                feedback TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_last_accessed ON analysis_cache (last_accessed)")
+        conn.commit()
+        _schema_ready = True
+    return conn
+
+
+def normalize_resume_text(resume_text: str) -> str:
+    """Collapse whitespace so re-extracted copies of the same resume hash identically."""
+    return " ".join(resume_text.split())
+
+
+def make_cache_key(resume_text: str, role: str, role_requirements: str, model_id: str, prompt_version: str) -> str:
+    """Content address of one analysis: same resume, role, requirements, model and prompt give the same key."""
+    payload = json.dumps([
+        normalize_resume_text(resume_text),
+        role.strip(),
+        role_requirements.strip(),
+        model_id,
+        prompt_version
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_analysis(cache_key: str) -> tuple[bool, dict] | None:
+    """Return the cached (selected, feedback) for a key, or None on a miss or expired entry."""
+    now = time.time()
+    try:
+        with closing(_connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT selected, feedback, created_at FROM analysis_cache WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+
+            if row and now - row[2] <= CACHE_TTL_SECONDS:
+                conn.execute("UPDATE analysis_cache SET last_accessed = ? WHERE cache_key = ?", (now, cache_key))
+                _count("hits")
+                return bool(row[0]), json.loads(row[1])
+
+            if row:
+                conn.execute("DELETE FROM analysis_cache WHERE cache_key = ?", (cache_key,))
+    except sqlite3.Error as e:
+        print(f"❌ Analysis cache read failed: {e}")
+
+    _count("misses")
+    return None
+
+
+def store_analysis(cache_key: str, selected: bool, feedback: dict):
+    """Store a successful analysis and evict expired and least recently used entries beyond the size bound."""
+    now = time.time()
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (cache_key, selected, feedback, created_at, last_accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (cache_key, int(bool(selected)), json.dumps(feedback), now, now)
+            )
+            expired = conn.execute(
+                "DELETE FROM analysis_cache WHERE created_at < ?", (now - CACHE_TTL_SECONDS,)
+            ).rowcount
+            overflow = conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0] - CACHE_MAX_ENTRIES
+            if overflow > 0:
+                conn.execute("""
+                    DELETE FROM analysis_cache WHERE cache_key IN (
+                        SELECT cache_key FROM analysis_cache ORDER BY last_accessed ASC LIMIT ?
+                    )
+                """, (overflow,))
+        _count("stores")
+        _count("evictions", expired + max(overflow, 0))
+    except sqlite3.Error as e:
+        print(f"❌ Analysis cache write failed: {e}")
+
+
+def get_cache_stats() -> dict:
+    """Return hit/miss counters for this process plus the number of stored entries."""
+    with _stats_lock:
+        stats = dict(_stats)
+
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    try:
+        with closing(_connect()) as conn, conn:
+            stats["entries"] = conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+    except sqlite3.Error:
+        stats["entries"] = None
+    return stats
@@ -0,0 +1,159 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator
+
+from metrics import logger
+from rate_limiter import PRIORITY_BATCH, llm_priority
+from recruitment_utils import run_resume_analysis
+from resume_preprocessing import preprocess_resume
+from prescreen import (
+    PRESCREEN_ENABLED,
+    ROUTE_PRIORITY,
+    ROUTE_REJECT,
+    ROUTE_REVIEW,
+    prescreen_feedback,
+    prescreen_resumes
+)
+from utils import extract_text_from_pdf_bytes
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+@dataclass
+class ScreeningResult:
+    """Outcome of screening one resume in a batch."""
+    file_name: str
+    selected: bool
+    overall_fit_score: int
+    matching_skills_score: int
+    experience_level: str
+    feedback: dict | str
+    error: str | None = None
+    route: str = ROUTE_REVIEW
+    resume_text: str = field(default="", repr=False)
+
+    def as_row(self) -> dict:
+        return {
+            "Resume": self.file_name,
+            "Selected": "✅" if self.selected else "❌",
+            "Overall Fit": self.overall_fit_score,
+            "Skills Match": self.matching_skills_score,
+            "Experience": self.experience_level,
+            "Pre-screen": self.route,
+            "Error": self.error or ""
+        }
+
+
+def load_resume_folder(folder: str) -> list[tuple[str, bytes]]:
+    """Read every PDF in a folder as (file name, bytes) pairs."""
+    resumes = []
+    for file_name in sorted(os.listdir(folder)):
+        if file_name.lower().endswith(".pdf"):
+            with open(os.path.join(folder, file_name), "rb") as pdf_file:
+                resumes.append((file_name, pdf_file.read()))
+    return resumes
+
+
+def _to_result(file_name: str, selected: bool, feedback: dict | str) -> ScreeningResult:
+    if not isinstance(feedback, dict):
+        return ScreeningResult(file_name, False, 0, 0, "", feedback, error=str(feedback))
+
+    return ScreeningResult(
+        file_name=file_name,
+        selected=bool(selected),
+        overall_fit_score=int(feedback.get("overall_fit_score") or 0),
+        matching_skills_score=int(feedback.get("matching_skills_score") or 0),
+        experience_level=str(feedback.get("experience_level") or ""),
+        feedback=feedback
+    )
+
+
+def screen_resumes(
+    resumes: Iterable[tuple[str, bytes]],
+    role: str,
+    role_requirements: str,
+    analyzer_factory: Callable[[], object],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    extraction_workers: int | None = None,
+    use_prescreen: bool = PRESCREEN_ENABLED
+) -> Iterator[ScreeningResult]:
+    """Screen many resumes for one role and yield results as they complete.
+
+    Text extraction runs in a process pool. Extracted resumes are then pre-screened together:
+    clear mismatches are rejected without a model call, and priority candidates are analyzed
+    before the rest. Analyses run on at most max_concurrency threads, each with its own analyzer
+    from analyzer_factory, and share the process-wide rate limiter at batch priority so interactive
+    screening is served first. Any object with a run(prompt) method returning assistant messages
+    works as the analyzer, so a stub model can be used offline.
+    """
+    local = threading.local()
+
+    def get_analyzer():
+        if not hasattr(local, "analyzer"):
+            local.analyzer = analyzer_factory()
+        return local.analyzer
+
+    def analyze_one(file_name: str, resume_text: str) -> ScreeningResult:
+        try:
+            prepared = preprocess_resume(resume_text, role_requirements)
+            with llm_priority(PRIORITY_BATCH):
+                selected, feedback = run_resume_analysis(prepared.text, role, role_requirements, get_analyzer())
+        except Exception as e:
+            logger.error(f"Error analyzing {file_name}: {e}")
+            return ScreeningResult(file_name, False, 0, 0, "", "", error=str(e))
+
+        screening_result = _to_result(file_name, selected, feedback)
+        screening_result.resume_text = resume_text
+        return screening_result
+
+    extracted = []
+    with ProcessPoolExecutor(max_workers=extraction_workers) as extraction_pool:
+        futures = {
+            extraction_pool.submit(extract_text_from_pdf_bytes, pdf_bytes, parallel=False): file_name
+            for file_name, pdf_bytes in resumes
+        }
+        for future in as_completed(futures):
+            file_name = futures[future]
+            try:
+                resume_text = future.result()
+            except Exception as e:
+                yield ScreeningResult(file_name, False, 0, 0, "", "", error=f"Could not read PDF: {e}")
+                continue
+
+            if not resume_text.strip():
+                yield ScreeningResult(file_name, False, 0, 0, "", "", error="No text found in PDF")
+                continue
+
+            extracted.append((file_name, resume_text))
+
+    routes = [ROUTE_REVIEW] * len(extracted)
+    if use_prescreen and extracted:
+        prescreened = prescreen_resumes([text for _, text in extracted], role_requirements)
+        routes = [result.route for result in prescreened]
+        for (file_name, extracted_text), result in zip(extracted, prescreened):
+            if result.route == ROUTE_REJECT:
+                screening_result = _to_result(file_name, False, prescreen_feedback(result))
+                screening_result.route = ROUTE_REJECT
+                screening_result.resume_text = extracted_text
+                yield screening_result
+
+    queue = [i for i, route in enumerate(routes) if route == ROUTE_PRIORITY]
+    queue += [i for i, route in enumerate(routes) if route == ROUTE_REVIEW]
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as analysis_pool:
+        futures = {analysis_pool.submit(analyze_one, *extracted[i]): routes[i] for i in queue}
+        for future in as_completed(futures):
+            screening_result = future.result()
+            screening_result.route = futures[future]
+            yield screening_result
+
+
+def rank_results(results: Iterable[ScreeningResult]) -> list[ScreeningResult]:
+    """Order results with selected candidates first, then by overall fit and skill match."""
+    return sorted(
+        results,
+        key=lambda r: (r.selected, r.overall_fit_score, r.matching_skills_score),
+        reverse=True
+    )
@@ -0,0 +1,739 @@
+"""Offline end-to-end benchmark: PDF extraction, analysis, slot search, booking and email delivery.
+
+The LLM is a deterministic fake with configurable latency, MySQL is replaced by a SQLite shim and
+SMTP by a local sink, so runs are repeatable and need no credentials or network.
+
+    python benchmark.py --sizes 1 10 100 1000 --fullness 0 0.5 0.9 --output results.json
+    python benchmark.py --compare results.json
+
+`python benchmark.py --fake-openai 8089 --fake-rpm 60` serves only a fake OpenAI API (with 429s once
+the RPM is exceeded) for exercising the app and the rate limiter without a real key.
+"""
+import argparse
+import base64
+import itertools
+import json
+import math
+import os
+import random
+import re
+import socketserver
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as dtime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import mysql.connector
+
+import analysis_cache
+import database
+import metrics
+import screening_service
+from mailer import SMTPMailer
+from outbox import mark_sent
+from rate_limiter import RateLimiter, use_rate_limiter
+from interview_calendar import (
+    DEFAULT_WORK_DAYS,
+    DEFAULT_WORK_END,
+    DEFAULT_WORK_START,
+    first_search_day,
+    invalidate_calendars
+)
+from recruitment_utils import send_outbox_email
+from resume_preprocessing import keywords
+from screening_service import ScreeningJob, ServiceConfig
+
+DEFAULT_SIZES = [1, 10, 100, 1000]
+DEFAULT_FULLNESS = [0.0, 0.5, 0.9]
+ROLE = "backend_engineer"
+ROLE_REQUIREMENTS = "python, django, postgresql, docker, kubernetes, aws, redis, rest apis, ci/cd, testing"
+SKILLS = [
+    "python", "django", "postgresql", "docker", "kubernetes", "aws", "redis", "rest", "testing",
+    "java", "spring", "react", "typescript", "golang", "kafka", "terraform", "linux", "graphql"
+]
+
+SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS interview_schedule (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        candidate_email TEXT NOT NULL,
+        interviewer_id TEXT NOT NULL DEFAULT 'default',
+        interview_time DATETIME NOT NULL,
+        end_time DATETIME NOT NULL,
+        duration_minutes INTEGER NOT NULL DEFAULT 60,
+        booking_key TEXT UNIQUE,
+        created_at DATETIME,
+        UNIQUE (interviewer_id, interview_time)
+    );
+    CREATE TABLE IF NOT EXISTS interviewers (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        email TEXT,
+        work_start TEXT NOT NULL DEFAULT '09:00:00',
+        work_end TEXT NOT NULL DEFAULT '17:00:00',
+        work_days TEXT NOT NULL DEFAULT '0,1,2,3,4',
+        buffer_minutes INTEGER NOT NULL DEFAULT 0,
+        max_per_day INTEGER,
+        active INTEGER NOT NULL DEFAULT 1
+    );
+    CREATE TABLE IF NOT EXISTS calendar_blackouts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        interviewer_id TEXT,
+        blackout_date TEXT NOT NULL,
+        reason TEXT
+    );
+    INSERT OR IGNORE INTO interviewers (id, name) VALUES ('default', 'Default interviewer');
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email_type TEXT NOT NULL,
+        to_email TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        sender_email TEXT NOT NULL DEFAULT '',
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        locked_at DATETIME,
+        last_error TEXT,
+        sent_at DATETIME
+    );
+    CREATE TABLE IF NOT EXISTS roles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL UNIQUE,
+        requirements TEXT NOT NULL,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS role_versions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        role_id INTEGER NOT NULL,
+        version INTEGER NOT NULL,
+        requirements TEXT NOT NULL,
+        requirements_hash TEXT NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (role_id, version),
+        UNIQUE (role_id, requirements_hash)
+    );
+    CREATE TABLE IF NOT EXISTS candidates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT,
+        resume_name TEXT,
+        resume_hash TEXT NOT NULL UNIQUE,
+        resume_text TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS analyses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        candidate_id INTEGER NOT NULL,
+        role_id INTEGER NOT NULL,
+        requirements_hash TEXT NOT NULL,
+        source TEXT NOT NULL DEFAULT 'llm',
+        selected INTEGER NOT NULL,
+        overall_fit_score INTEGER NOT NULL,
+        matching_skills_score INTEGER NOT NULL,
+        experience_level TEXT NOT NULL,
+        matching_skills TEXT NOT NULL,
+        missing_skills TEXT NOT NULL,
+        feedback TEXT NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS rescore_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        role_id INTEGER NOT NULL,
+        role_version_id INTEGER NOT NULL,
+        status TEXT NOT NULL DEFAULT 'running',
+        last_candidate_id INTEGER NOT NULL DEFAULT 0,
+        processed INTEGER NOT NULL DEFAULT 0,
+        rescored INTEGER NOT NULL DEFAULT 0,
+        sent_to_llm INTEGER NOT NULL DEFAULT 0,
+        skipped INTEGER NOT NULL DEFAULT 0,
+        finished_at DATETIME
+    );
+    CREATE TABLE IF NOT EXISTS screening_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        resume_hash TEXT NOT NULL,
+        role TEXT NOT NULL,
+        role_requirements TEXT NOT NULL,
+        requirements_hash TEXT NOT NULL DEFAULT '',
+        resume_name TEXT,
+        candidate_email TEXT NOT NULL DEFAULT '',
+        sender_email TEXT NOT NULL DEFAULT '',
+        resume_text TEXT NOT NULL,
+        options TEXT NOT NULL,
+        rescore_run_id INTEGER,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        locked_at DATETIME,
+        result TEXT,
+        last_error TEXT,
+        finished_at DATETIME,
+        UNIQUE (resume_hash, role, requirements_hash, candidate_email)
+    );
+"""
+
+UPSERT_PATTERN = re.compile(r"\bON DUPLICATE KEY UPDATE\b", re.IGNORECASE)
+LOCKING_READ_PATTERN = re.compile(r"\bFOR UPDATE(\s+SKIP LOCKED)?", re.IGNORECASE)
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+
+
+def _sqlite_upsert(operation: str) -> str:
+    """ON DUPLICATE KEY UPDATE as SQLite's ON CONFLICT ... RETURNING id, which stands in for LAST_INSERT_ID(id)."""
+    statement, assignments = UPSERT_PATTERN.split(operation, maxsplit=1)
+    assignments = [
+        re.sub(r"VALUES\((\w+)\)", r"excluded.\1", assignment.strip())
+        for assignment in re.split(r",\s*(?=\w+\s*=)", assignments.strip())
+        if "LAST_INSERT_ID" not in assignment
+    ]
+    return f"{statement} ON CONFLICT DO UPDATE SET {', '.join(assignments) or 'id = id'} RETURNING id"
+
+
+class SQLiteCursor:
+    """Runs the app's MySQL-flavoured statements on SQLite and raises mysql.connector errors."""
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+        self._upserted_id = None
+
+    def execute(self, operation: str, params=None):
+        operation = operation.replace("%s", "?").replace("NOW()", "CURRENT_TIMESTAMP")
+        locking = LOCKING_READ_PATTERN.search(operation) is not None
+        operation = LOCKING_READ_PATTERN.sub("", operation)
+        if locking and not self._cursor.connection.in_transaction:
+            # SQLite has no row locks: a locking read takes the database write lock until commit or rollback.
+            self._cursor.execute("BEGIN IMMEDIATE")
+        upsert = UPSERT_PATTERN.search(operation) is not None
+        if upsert:
+            operation = _sqlite_upsert(operation)
+        self._upserted_id = None
+        try:
+            result = self._cursor.execute(operation, params or ())
+        except sqlite3.IntegrityError as e:
+            raise mysql.connector.IntegrityError(msg=str(e))
+        if upsert:
+            rows = self._cursor.fetchall()
+            self._upserted_id = rows[0][0] if rows else None
+        return result
+
+    @property
+    def lastrowid(self):
+        return self._upserted_id if self._upserted_id is not None else self._cursor.lastrowid
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class SQLiteConnection:
+    """Stand-in for a pooled MySQL connection with MySQL's IF(); close() really closes it."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self._conn.create_function("IF", 3, lambda condition, then, otherwise: then if condition else otherwise)
+
+    def cursor(self) -> SQLiteCursor:
+        return SQLiteCursor(self._conn.cursor())
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def create_sqlite_database(path: str):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SQLITE_SCHEMA)
+    conn.commit()
+    conn.close()
+
+
+def _working_slots(horizon_days: int):
+    """Every hour-long slot in the default interviewer's working week within the horizon."""
+    first_day = first_search_day()
+    for day_offset in range(horizon_days):
+        day = first_day + timedelta(days=day_offset)
+        if day.weekday() in DEFAULT_WORK_DAYS:
+            for hour in range(DEFAULT_WORK_START.hour, DEFAULT_WORK_END.hour):
+                yield datetime.combine(day, dtime(hour))
+
+
+def fill_calendar(path: str, fullness: float, horizon_days: int, seed: int = 7) -> int:
+    """Book a random fraction of the slots within the horizon so slot search has something to skip."""
+    slots = list(_working_slots(horizon_days))
+    booked = random.Random(seed).sample(slots, int(len(slots) * fullness))
+    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+    conn.executemany(
+        "INSERT INTO interview_schedule (candidate_email, interview_time, end_time, created_at) "
+        "VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+        [(f"booked{i}@example.com", slot, slot + timedelta(hours=1)) for i, slot in enumerate(booked)]
+    )
+    conn.commit()
+    conn.close()
+    return len(booked)
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept and count messages from smtplib, with AUTH PLAIN when credentials are set."""
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        authenticated = self.server.credentials is None
+        self.reply("220 benchmark sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                if self.server.credentials:
+                    self.reply("250-benchmark")
+                    self.reply("250 AUTH PLAIN")
+                else:
+                    self.reply("250 benchmark")
+            elif verb == "AUTH":
+                _, user, password = base64.b64decode(command.split()[-1]).decode().split("\0")
+                if (user, password) != self.server.credentials:
+                    self.reply("535 5.7.8 Username and Password not accepted")
+                    continue
+                authenticated = True
+                with self.server.lock:
+                    self.server.logins.append(user)
+                self.reply("235 2.7.0 Accepted")
+            elif verb == "MAIL" and not authenticated:
+                self.reply("530 5.7.0 Authentication Required")
+            elif verb == "DATA":
+                self.reply("354 end data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                with self.server.lock:
+                    self.server.messages += 1
+                self.reply("250 queued")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, credentials: tuple[str, str] | None = None):
+        super().__init__(("127.0.0.1", 0), SMTPSinkHandler)
+        self.credentials = credentials
+        self.messages = 0
+        self.connections = 0
+        self.logins = []
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+class FakeAgent:
+    """Deterministic stand-in for an agno Agent: scores resumes by keyword overlap after a fixed delay."""
+
+    def __init__(self, latency: float = 0.05, model_id: str = "fake-llm"):
+        self.latency = latency
+        self.model = SimpleNamespace(id=model_id, api_key=None)
+
+    def _response(self, prompt: str, content: str) -> SimpleNamespace:
+        return SimpleNamespace(
+            content=content,
+            messages=[SimpleNamespace(role="assistant", content=content)],
+            metrics={"input_tokens": [len(prompt) // 4], "output_tokens": [len(content) // 4]}
+        )
+
+    def run(self, prompt: str) -> SimpleNamespace:
+        time.sleep(self.latency)
+        return self._response(prompt, fake_completion(prompt))
+
+
+def fake_completion(prompt: str) -> str:
+    """The fake model's reply: a keyword-overlap analysis for resume prompts, a canned paragraph otherwise."""
+    if "Resume Text:" not in prompt:
+        return "Thank you for applying; strengthening the missing skills would help."
+
+    resume = keywords(prompt.split("Resume Text:", 1)[1].split("Your response must", 1)[0])
+    required = sorted(keywords(ROLE_REQUIREMENTS))
+    matching = [skill for skill in required if skill in resume]
+    score = round(100 * len(matching) / len(required))
+    return json.dumps({
+        "selected": score >= 50,
+        "feedback": {
+            "matching_skills": matching,
+            "matching_skills_score": score,
+            "missing_skills": [skill for skill in required if skill not in resume],
+            "project_evaluation": "Synthetic evaluation.",
+            "overall_fit": "Synthetic summary.",
+            "overall_fit_score": score,
+            "experience_level": "mid"
+        }
+    })
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Chat Completions endpoint answering with fake_completion, with OpenAI-style 429s and 500s."""
+
+    def _send_json(self, status: int, body: dict, headers: dict | None = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        retry_after = self.server.admit()
+        if retry_after:
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached for requests", "type": "requests", "code": "rate_limit_exceeded"}},
+                {"Retry-After": f"{retry_after:.3f}"}
+            )
+            return
+        if random.random() < self.server.error_rate:
+            self._send_json(500, {"error": {"message": "The server had an error while processing your request."}})
+            return
+
+        time.sleep(self.server.latency)
+        messages = request.get("messages") or [{}]
+        prompt = str(messages[-1].get("content") or "")
+        content = fake_completion(prompt)
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+        self._send_json(200, {
+            "id": f"chatcmpl-fake-{next(self.server.ids)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake-llm"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Local stand-in for the OpenAI API; point OPENAI_BASE_URL at http://127.0.0.1:<port>/v1."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        rpm: int = 60,
+        error_rate: float = 0.0,
+        latency: float = 0.05,
+        window_seconds: float = 60.0
+    ):
+        """Admits rpm requests per window_seconds; tests shorten the window to see 429s clear quickly."""
+        super().__init__(("127.0.0.1", port), FakeOpenAIHandler)
+        self.rpm = rpm
+        self.window_seconds = window_seconds
+        self.error_rate = error_rate
+        self.latency = latency
+        self.ids = itertools.count(1)
+        self.requests = 0
+        self.rejected = 0
+        self._window = deque()
+        self._lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def admit(self) -> float:
+        """Count a request against the sliding window; returns seconds to wait, or 0 if admitted."""
+        now = time.monotonic()
+        with self._lock:
+            while self._window and now - self._window[0] >= self.window_seconds:
+                self._window.popleft()
+            if self.rpm and len(self._window) >= self.rpm:
+                self.rejected += 1
+                return self.window_seconds - (now - self._window[0])
+            self._window.append(now)
+            self.requests += 1
+            return 0.0
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(lines: list[str], lines_per_page: int = 45) -> bytes:
+    """Build a minimal text PDF (Helvetica, one content stream per page) that PyPDF2 can extract."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    font_id = 3 + 2 * len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages))), len(pages)
+        )
+    ]
+    for i, page_lines in enumerate(pages):
+        stream = "BT /F1 11 Tf 14 TL 50 760 Td " + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in page_lines) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return pdf
+
+
+def synthetic_resumes(count: int, seed: int = 7) -> list[tuple[str, bytes]]:
+    """Return (email, pdf_bytes) pairs with a spread of matching skills so both outcomes are exercised."""
+    rng = random.Random(seed)
+    resumes = []
+    for i in range(count):
+        skills = rng.sample(SKILLS, rng.randint(2, len(SKILLS) // 2))
+        lines = [f"Candidate {i}", f"candidate{i}@example.com", "", "SKILLS", ", ".join(skills), "", "EXPERIENCE"]
+        for job in range(rng.randint(2, 6)):
+            lines.append(f"Company {rng.randint(1, 500)} - Engineer ({2010 + job}-{2011 + job})")
+            lines += [
+                f"Built {rng.choice(skills)} services handling {rng.randint(1, 900)}k requests per day."
+                for _ in range(rng.randint(3, 8))
+            ]
+        resumes.append((f"candidate{i}@example.com", make_pdf(lines)))
+    return resumes
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1)
+    return ordered[max(index, 0)]
+
+
+def _latency_summary(values: list[float]) -> dict:
+    return {
+        "p50_ms": round(1000 * _percentile(values, 50), 3),
+        "p95_ms": round(1000 * _percentile(values, 95), 3),
+        "p99_ms": round(1000 * _percentile(values, 99), 3),
+        "max_ms": round(1000 * max(values, default=0.0), 3)
+    }
+
+
+STAGES = {"extract": "pdf.extract", "analyze": "llm.analyze", "schedule": "slots.reserve"}
+
+
+def screen_candidate(email: str, pdf_bytes: bytes, agent: FakeAgent, config: ServiceConfig) -> dict:
+    """One candidate through screening_service, as the app and batch CLI run it; returns stage timings and DB round-trips."""
+    job = ScreeningJob(ROLE, ROLE_REQUIREMENTS, resume_name=f"{email}.pdf", resume_bytes=pdf_bytes, candidate_email=email)
+    with metrics.request_scope("benchmark.candidate") as request:
+        outcome = screening_service.screen_candidate(job, config, analyzer=agent)
+    if outcome.feedback is None:
+        raise RuntimeError(f"Screening failed for {email}: {outcome.error}")
+
+    return {
+        "timings": {
+            stage: request["stage_seconds"][span_name]
+            for stage, span_name in STAGES.items()
+            if span_name in request["stage_seconds"]
+        },
+        "db_queries": request["db_queries"],
+        "selected": outcome.selected,
+        "scheduled": outcome.interview_time is not None,
+        "llm_call": outcome.source != "prescreen"
+    }
+
+
+def drain_outbox(agent: FakeAgent, mailer: SMTPMailer) -> dict[str, float]:
+    """Send every queued email the way the outbox worker does; returns the seconds spent per recipient."""
+    with database.db_session(None) as (conn, cursor):
+        cursor.execute("SELECT id, email_type, to_email, payload FROM email_outbox WHERE status = 'pending' ORDER BY id")
+        emails = cursor.fetchall()
+
+    seconds = {}
+    for email_id, email_type, to_email, payload in emails:
+        started = time.perf_counter()
+        send_outbox_email(agent, email_type, to_email, json.loads(payload), mailer=mailer)
+        seconds[to_email] = seconds.get(to_email, 0.0) + time.perf_counter() - started
+        mark_sent(None, email_id)
+    return seconds
+
+
+def run_scenario(size: int, fullness: float, latency: float, workers: int, sink: SMTPSink) -> dict:
+    """Screen size candidates against a calendar that is fullness booked, on a fresh database and cache.
+
+    Throughput covers screening, which queues emails; the queued emails are then sent in one drain,
+    timed separately and added to each candidate's "email" stage.
+    """
+    slots_per_week = (DEFAULT_WORK_END.hour - DEFAULT_WORK_START.hour) * len(DEFAULT_WORK_DAYS)
+    horizon_days = math.ceil(7 * size / (slots_per_week * (1 - fullness))) + 7 if fullness < 1 else 60
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "benchmark.sqlite3")
+        create_sqlite_database(db_path)
+        prefilled = fill_calendar(db_path, fullness, horizon_days)
+        analysis_cache.CACHE_PATH = os.path.join(workdir, "analysis_cache.sqlite3")
+        analysis_cache._schema_ready = False
+        database.use_connection_factory(lambda: SQLiteConnection(db_path))
+        # Unlimited buckets: the fake model has no quota, so only the limiter's own overhead is measured.
+        use_rate_limiter(RateLimiter(rpm=0, tpm=0, max_concurrency=workers))
+        invalidate_calendars()
+
+        resumes = synthetic_resumes(size)
+        agent = FakeAgent(latency)
+        config = ServiceConfig(
+            openai_api_key="",
+            email_sender="bench@example.com",
+            zoom_link="https://zoom.example/j/1",
+            zoom_passcode="000000",
+            interview_horizon_days=horizon_days
+        )
+        mailer = SMTPMailer("bench@example.com", "", "Benchmark", host="127.0.0.1", port=sink.port, use_ssl=False)
+        messages_before = sink.messages
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    lambda resume: screen_candidate(resume[0], resume[1], agent, config), resumes
+                ))
+            elapsed = time.perf_counter() - started
+
+            started = time.perf_counter()
+            email_seconds = drain_outbox(agent, mailer)
+            drain_elapsed = time.perf_counter() - started
+        finally:
+            database.use_connection_factory(None)
+            use_rate_limiter(None)
+            mailer.close()
+
+    for (email, _), result in zip(resumes, results):
+        if email in email_seconds:
+            result["timings"]["email"] = email_seconds[email]
+
+    totals = [sum(result["timings"].values()) for result in results]
+    stages = {
+        stage: _latency_summary([result["timings"][stage] for result in results if stage in result["timings"]])
+        for stage in (*STAGES, "email")
+    }
+    return {
+        "candidates": size,
+        "calendar_fullness": fullness,
+        "prefilled_slots": prefilled,
+        "horizon_days": horizon_days,
+        "seconds": round(elapsed, 4),
+        "throughput_per_second": round(size / elapsed, 3),
+        "outbox_drain_seconds": round(drain_elapsed, 4),
+        "latency": _latency_summary(totals),
+        "stages": stages,
+        "db_queries_per_candidate": round(sum(result["db_queries"] for result in results) / size, 3),
+        "llm_calls": sum(result["llm_call"] for result in results),
+        "selected": sum(result["selected"] for result in results),
+        "scheduled": sum(result["scheduled"] for result in results),
+        "emails_sent": sink.messages - messages_before
+    }
+
+
+def benchmark(
+    sizes: list[int] = DEFAULT_SIZES,
+    fullness_levels: list[float] = DEFAULT_FULLNESS,
+    latency: float = 0.05,
+    workers: int = 8
+) -> dict:
+    """Run every size/fullness combination and return the results with the settings that produced them."""
+    metrics.METRICS_JSON_LOGS = False
+    sink = SMTPSink()
+    try:
+        scenarios = [
+            run_scenario(size, fullness, latency, workers, sink)
+            for size in sizes
+            for fullness in fullness_levels
+        ]
+    finally:
+        sink.shutdown()
+        sink.server_close()
+
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "settings": {"llm_latency_seconds": latency, "workers": workers},
+        "scenarios": scenarios
+    }
+
+
+def compare(baseline: dict, current: dict) -> list[str]:
+    """Describe throughput and p95 changes for the scenarios both runs have in common."""
+    def key(scenario: dict) -> tuple:
+        return scenario["candidates"], scenario["calendar_fullness"]
+
+    previous = {key(scenario): scenario for scenario in baseline["scenarios"]}
+    lines = []
+    for scenario in current["scenarios"]:
+        old = previous.get(key(scenario))
+        if not old:
+            continue
+        throughput_change = 100 * (scenario["throughput_per_second"] / old["throughput_per_second"] - 1)
+        lines.append(
+            f"{scenario['candidates']:>5} candidates, {scenario['calendar_fullness']:.0%} full: "
+            f"throughput {throughput_change:+.1f}%, "
+            f"p95 {old['latency']['p95_ms']:.1f} -> {scenario['latency']['p95_ms']:.1f} ms, "
+            f"DB queries/candidate {old['db_queries_per_candidate']} -> {scenario['db_queries_per_candidate']}"
+        )
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--fullness", type=float, nargs="+", default=DEFAULT_FULLNESS)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM latency in seconds")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier run to compare against")
+    parser.add_argument("--fake-openai", type=int, metavar="PORT", help="only serve the fake OpenAI API on this port")
+    parser.add_argument("--fake-rpm", type=int, default=60, help="requests per minute before the fake API returns 429")
+    parser.add_argument("--fake-error-rate", type=float, default=0.0, help="fraction of fake API calls that return 500")
+    args = parser.parse_args()
+
+    if args.fake_openai is not None:
+        server = FakeOpenAIServer(args.fake_openai, args.fake_rpm, args.fake_error_rate, args.latency)
+        print(f"Fake OpenAI API on http://127.0.0.1:{server.port}/v1 ({args.fake_rpm} RPM); Ctrl+C to stop")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            raise SystemExit(0)
+
+    results = benchmark(args.sizes, args.fullness, args.latency, args.workers)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            print("\n".join(compare(json.load(baseline_file), results)))
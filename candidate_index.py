@@ -0,0 +1,331 @@
+"""Local vector index over every stored resume, for finding past candidates who fit a new role.
+
+Resumes and role requirements are embedded on the CPU with a hashed n-gram embedder (words, word
+pairs and character trigrams hashed into CANDIDATE_INDEX_DIM signed buckets), so no model or network
+is needed and the same text always maps to the same vector. Vectors are L2-normalized, so a top-k
+search is one matrix-vector product over the index. The index syncs from the candidates table by id
+and is saved as .npy files that can be memory-mapped, so a restart does not re-embed every resume.
+
+The shortlist is meant to go to the LLM only for the top N: see shortlist_jobs.
+"""
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from candidate_store import text_hash
+from database import db_session, get_db_config
+from metrics import inc, observe
+from prescreen import tokenize
+
+CANDIDATE_INDEX_DIR = os.getenv("CANDIDATE_INDEX_DIR", os.path.join(tempfile.gettempdir(), "candidate_index"))
+CANDIDATE_INDEX_DIM = int(os.getenv("CANDIDATE_INDEX_DIM", "512"))
+CANDIDATE_INDEX_MMAP = os.getenv("CANDIDATE_INDEX_MMAP", "true").lower() == "true"
+CANDIDATE_INDEX_REFRESH_SECONDS = float(os.getenv("CANDIDATE_INDEX_REFRESH_SECONDS", "30"))
+CANDIDATE_INDEX_BATCH_SIZE = 500
+# Auto-increment ids can commit out of order, so incremental syncs look this far back.
+CANDIDATE_INDEX_ID_LOOKBACK = 1000
+DEFAULT_TOP_K = 20
+
+# Bump when the embedder changes so indexes saved by older code are rebuilt.
+EMBEDDER_VERSION = 1
+# Word pairs and character trigrams outnumber words, so they count for less.
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.6
+TRIGRAM_WEIGHT = 0.3
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+@dataclass
+class CandidateMatch:
+    candidate_id: int
+    email: str | None
+    resume_name: str | None
+    similarity: float
+
+
+def _features(text: str) -> Counter:
+    tokens = tokenize(text)
+    features = Counter({f"w:{token}": count for token, count in Counter(tokens).items()})
+    features.update(f"b:{first} {second}" for first, second in zip(tokens, tokens[1:]))
+    for token in tokens:
+        padded = f"<{token}>"
+        features.update(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+
+def embed(text: str, dim: int = CANDIDATE_INDEX_DIM) -> np.ndarray:
+    """Embed a text as an L2-normalized float32 vector; sublinear term counts, signed feature hashing."""
+    weights = {"w": WORD_WEIGHT, "b": BIGRAM_WEIGHT, "c": TRIGRAM_WEIGHT}
+    features = _features(text)
+    indices = np.empty(len(features), dtype=np.int64)
+    values = np.empty(len(features), dtype=np.float32)
+    for i, (feature, count) in enumerate(features.items()):
+        hashed = zlib.crc32(feature.encode("utf-8"))
+        indices[i] = hashed % dim
+        # The top bit picks the sign, so colliding features tend to cancel instead of piling up.
+        sign = -1.0 if hashed & 0x80000000 else 1.0
+        values[i] = sign * weights[feature[0]] * (1 + math.log(count))
+
+    vector = np.zeros(dim, dtype=np.float32)
+    np.add.at(vector, indices, values)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@lru_cache(maxsize=256)
+def _query_vector(text: str, dim: int) -> np.ndarray:
+    """Role requirements are searched over and over; embed each text once per process."""
+    vector = embed(text, dim)
+    vector.flags.writeable = False
+    return vector
+
+
+class CandidateIndex:
+    """Resume embeddings for one database, kept in sync with the candidates table and persisted to disk."""
+
+    def __init__(self, db_config: dict | None, path: str, dim: int = CANDIDATE_INDEX_DIM):
+        self.db_config = db_config
+        self.path = path
+        self.dim = dim
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._known_ids = set()
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        """Reuse vectors saved by an earlier process when they were built by the same embedder."""
+        try:
+            with open(self._file("meta.json")) as meta_file:
+                meta = json.load(meta_file)
+            if meta.get("dim") != self.dim or meta.get("embedder_version") != EMBEDDER_VERSION:
+                return
+            ids = np.load(self._file("ids.npy"))
+            vectors = np.load(self._file("vectors.npy"), mmap_mode="r" if CANDIDATE_INDEX_MMAP else None)
+        except (OSError, ValueError):
+            return
+
+        if len(ids) == len(vectors):
+            self._ids, self._vectors = ids, vectors
+            self._known_ids = set(ids.tolist())
+
+    def _save(self, ids: np.ndarray, vectors: np.ndarray):
+        os.makedirs(self.path, exist_ok=True)
+        for name, array in (("ids.npy", ids), ("vectors.npy", vectors)):
+            temp_path = self._file(f"{name}.tmp")
+            with open(temp_path, "wb") as array_file:
+                np.save(array_file, array)
+            os.replace(temp_path, self._file(name))
+
+        temp_path = self._file("meta.json.tmp")
+        with open(temp_path, "w") as meta_file:
+            json.dump({"dim": self.dim, "embedder_version": EMBEDDER_VERSION, "count": len(ids)}, meta_file)
+        os.replace(temp_path, self._file("meta.json"))
+
+    def refresh(self, force: bool = False) -> int:
+        """Embed resumes added since the last sync; returns how many were added."""
+        if not force and time.monotonic() - self._refreshed_at < CANDIDATE_INDEX_REFRESH_SECONDS:
+            return 0
+
+        with self._refresh_lock:
+            started = time.perf_counter()
+            last_id = int(self._ids.max()) if len(self._ids) else 0
+            after_id = max(0, last_id - CANDIDATE_INDEX_ID_LOOKBACK)
+            new_ids, new_vectors = [], []
+
+            with db_session(self.db_config) as (conn, cursor):
+                while True:
+                    cursor.execute(
+                        "SELECT id, resume_text FROM candidates WHERE id > %s ORDER BY id LIMIT %s",
+                        (after_id, CANDIDATE_INDEX_BATCH_SIZE)
+                    )
+                    rows = cursor.fetchall()
+                    for candidate_id, resume_text in rows:
+                        if candidate_id not in self._known_ids:
+                            new_ids.append(candidate_id)
+                            new_vectors.append(embed(resume_text, self.dim))
+                    if len(rows) < CANDIDATE_INDEX_BATCH_SIZE:
+                        break
+                    after_id = rows[-1][0]
+
+            self._refreshed_at = time.monotonic()
+            if not new_ids:
+                return 0
+
+            ids = np.concatenate([self._ids, np.array(new_ids, dtype=np.int64)])
+            vectors = np.concatenate([self._vectors, np.stack(new_vectors)])
+            with self._lock:
+                self._ids, self._vectors = ids, vectors
+                self._known_ids.update(new_ids)
+            self._save(ids, vectors)
+
+            inc("candidate_index_embedded_total", len(new_ids))
+            observe("candidate_index_refresh_seconds", time.perf_counter() - started)
+            return len(new_ids)
+
+    def search(self, query: str | np.ndarray, top_k: int = DEFAULT_TOP_K, exclude_ids=None) -> list[tuple[int, float]]:
+        """Return the top_k (candidate id, cosine similarity) pairs for a text or vector, best first."""
+        started = time.perf_counter()
+        query_vector = _query_vector(query, self.dim) if isinstance(query, str) else query
+        with self._lock:
+            ids, vectors = self._ids, self._vectors
+
+        scores = np.asarray(vectors @ query_vector, dtype=np.float32)
+        if exclude_ids:
+            scores[np.isin(ids, list(exclude_ids))] = -np.inf
+
+        k = min(top_k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        observe("candidate_index_search_seconds", time.perf_counter() - started)
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+def get_candidate_index(db_config: dict | None = None) -> CandidateIndex:
+    """Return the process-wide index for this DB config, loading it from disk on first use."""
+    db_config = db_config or get_db_config()
+    key = tuple(sorted(db_config.items())) if db_config else None
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            folder = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:16]
+            index = _indexes[key] = CandidateIndex(db_config, os.path.join(CANDIDATE_INDEX_DIR, folder))
+        return index
+
+
+def _analyzed_candidate_ids(cursor, role_requirements: str) -> set[int]:
+    cursor.execute(
+        "SELECT DISTINCT candidate_id FROM analyses WHERE requirements_hash = %s",
+        (text_hash(role_requirements),)
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def best_candidates_for_role(
+    role_requirements: str,
+    top_k: int = DEFAULT_TOP_K,
+    skip_analyzed: bool = True,
+    db_config: dict | None = None
+) -> list[CandidateMatch]:
+    """Return the stored candidates whose resumes are closest to the requirements, best first.
+
+    With skip_analyzed, candidates already analyzed against exactly these requirements are left out.
+    """
+    index = get_candidate_index(db_config)
+    index.refresh()
+
+    with db_session(db_config) as (conn, cursor):
+        exclude_ids = _analyzed_candidate_ids(cursor, role_requirements) if skip_analyzed else None
+        matches = index.search(role_requirements, top_k, exclude_ids)
+        if not matches:
+            return []
+
+        placeholders = ", ".join(["%s"] * len(matches))
+        cursor.execute(
+            f"SELECT id, email, resume_name FROM candidates WHERE id IN ({placeholders})",
+            [candidate_id for candidate_id, _ in matches]
+        )
+        details = {row[0]: row[1:] for row in cursor.fetchall()}
+
+    return [
+        CandidateMatch(candidate_id, *details.get(candidate_id, (None, None)), similarity=round(similarity, 4))
+        for candidate_id, similarity in matches
+    ]
+
+
+def shortlist_jobs(role: str, role_requirements: str, top_n: int, db_config: dict | None = None) -> list:
+    """Screening jobs for the top_n closest past candidates, so only they are sent to the analyzer.
+
+    Jobs run at batch priority and neither schedule interviews nor email rejections: past candidates
+    did not apply for this role, so a recruiter reviews the results first.
+    """
+    from rate_limiter import PRIORITY_BATCH
+    from screening_service import ScreeningJob
+
+    matches = best_candidates_for_role(role_requirements, top_n, db_config=db_config)
+    if not matches:
+        return []
+
+    with db_session(db_config) as (conn, cursor):
+        placeholders = ", ".join(["%s"] * len(matches))
+        cursor.execute(
+            f"SELECT id, resume_text FROM candidates WHERE id IN ({placeholders})",
+            [match.candidate_id for match in matches]
+        )
+        resume_texts = dict(cursor.fetchall())
+
+    return [
+        ScreeningJob(
+            role,
+            role_requirements,
+            resume_name=match.resume_name or "",
+            resume_text=resume_texts[match.candidate_id],
+            candidate_email=match.email or "",
+            queue_rejection=False,
+            schedule_if_selected=False,
+            priority=PRIORITY_BATCH
+        )
+        for match in matches
+        if match.candidate_id in resume_texts
+    ]
+
+
+def benchmark(corpus_size: int = 100_000, embed_sample: int = 200, top_k: int = DEFAULT_TOP_K) -> dict:
+    """Time embedding on synthetic resumes and top-k search over a corpus_size index of random vectors."""
+    rng = np.random.default_rng(7)
+    vocabulary = [f"skill{i}" for i in range(400)] + [f"word{i}" for i in range(2000)]
+    resumes = [" ".join(rng.choice(vocabulary, rng.integers(200, 1200))) for _ in range(embed_sample)]
+
+    started = time.perf_counter()
+    for resume in resumes:
+        embed(resume)
+    embed_ms = 1000 * (time.perf_counter() - started) / embed_sample
+
+    index = CandidateIndex(None, os.path.join(tempfile.gettempdir(), "candidate_index_benchmark"))
+    vectors = rng.standard_normal((corpus_size, index.dim), dtype=np.float32)
+    index._vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    index._ids = np.arange(1, corpus_size + 1, dtype=np.int64)
+
+    query = embed(", ".join(vocabulary[:12]))
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        index.search(query, top_k)
+        timings.append(time.perf_counter() - started)
+
+    return {
+        "corpus_size": corpus_size,
+        "dim": index.dim,
+        "embed_ms_per_resume": round(embed_ms, 3),
+        "search_ms": round(1000 * min(timings), 3),
+        "index_mb": round(index._vectors.nbytes / 2 ** 20, 1)
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    print(json.dumps(benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000), indent=2))
@@ -0,0 +1,200 @@
+import hashlib
+import json
+
+from analysis_cache import normalize_resume_text
+from database import db_session
+
+SORT_COLUMNS = {
+    "overall_fit_score": "a.overall_fit_score",
+    "matching_skills_score": "a.matching_skills_score",
+    "created_at": "a.created_at"
+}
+DEFAULT_PAGE_SIZE = 50
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_resume_text(text).encode("utf-8")).hexdigest()
+
+
+def save_analysis(
+    resume_text: str,
+    role: str,
+    role_requirements: str,
+    selected: bool,
+    feedback: dict,
+    candidate_email: str | None = None,
+    resume_name: str | None = None,
+    source: str = "llm",
+    db_config: dict | None = None
+) -> int:
+    """Persist a candidate, its role and one analysis; returns the analysis id.
+
+    A new role starts with these requirements; an existing role keeps its current ones, which only
+    save_role_version changes, so screening against other requirements does not move the role.
+    """
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("""
+            INSERT INTO roles (title, requirements) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
+        """, (role, role_requirements))
+        role_id = cursor.lastrowid
+
+        cursor.execute("""
+            INSERT INTO candidates (email, resume_name, resume_hash, resume_text) VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                email = COALESCE(VALUES(email), email),
+                resume_name = COALESCE(VALUES(resume_name), resume_name),
+                id = LAST_INSERT_ID(id)
+        """, (candidate_email or None, resume_name, text_hash(resume_text), resume_text))
+        candidate_id = cursor.lastrowid
+
+        cursor.execute("""
+            INSERT INTO analyses (
+                candidate_id, role_id, requirements_hash, source, selected, overall_fit_score,
+                matching_skills_score, experience_level, matching_skills, missing_skills, feedback
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            candidate_id,
+            role_id,
+            text_hash(role_requirements),
+            source,
+            bool(selected),
+            int(feedback.get("overall_fit_score") or 0),
+            int(feedback.get("matching_skills_score") or 0),
+            str(feedback.get("experience_level") or ""),
+            json.dumps(feedback.get("matching_skills", [])),
+            json.dumps(feedback.get("missing_skills", [])),
+            json.dumps(feedback)
+        ))
+        analysis_id = cursor.lastrowid
+        conn.commit()
+        return analysis_id
+
+
+def _upsert_role_version(cursor, role_id: int, role_requirements: str) -> int:
+    """Record the requirements as the role's next version unless it already has them; returns the version id.
+
+    The caller locks the role row first, which serializes version numbering per role.
+    """
+    cursor.execute("""
+        INSERT INTO role_versions (role_id, version, requirements, requirements_hash)
+        SELECT %s, COALESCE(MAX(version), 0) + 1, %s, %s FROM role_versions WHERE role_id = %s
+        ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
+    """, (role_id, role_requirements, text_hash(role_requirements), role_id))
+    return cursor.lastrowid
+
+
+def save_role_version(role: str, role_requirements: str, db_config: dict | None = None) -> dict:
+    """Make the requirements the role's current version; returns role_id, version_id and version.
+
+    A role saved before versioning existed gets its previous requirements recorded as a version first.
+    """
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("SELECT id, requirements FROM roles WHERE title = %s FOR UPDATE", (role,))
+        row = cursor.fetchone()
+        if row:
+            role_id = row[0]
+            _upsert_role_version(cursor, role_id, row[1])
+            cursor.execute("UPDATE roles SET requirements = %s WHERE id = %s", (role_requirements, role_id))
+        else:
+            cursor.execute("INSERT INTO roles (title, requirements) VALUES (%s, %s)", (role, role_requirements))
+            role_id = cursor.lastrowid
+
+        version_id = _upsert_role_version(cursor, role_id, role_requirements)
+        cursor.execute("SELECT version FROM role_versions WHERE id = %s", (version_id,))
+        version = cursor.fetchone()[0]
+        conn.commit()
+
+    return {"role_id": role_id, "version_id": version_id, "version": version}
+
+
+def list_role_versions(role_id: int, db_config: dict | None = None) -> list[dict]:
+    """Return a role's requirement versions, newest first."""
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("""
+            SELECT id, version, requirements, requirements_hash, created_at
+            FROM role_versions WHERE role_id = %s ORDER BY version DESC
+        """, (role_id,))
+        return [
+            {"id": row[0], "version": row[1], "requirements": row[2], "requirements_hash": row[3], "created_at": row[4]}
+            for row in cursor.fetchall()
+        ]
+
+
+def list_roles(db_config: dict | None = None) -> list[dict]:
+    """Return every stored role with its current requirements, most recently updated first."""
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("SELECT id, title, requirements FROM roles ORDER BY updated_at DESC")
+        return [{"id": row[0], "title": row[1], "requirements": row[2]} for row in cursor.fetchall()]
+
+
+def page_analyses(
+    role_id: int,
+    sort_by: str = "overall_fit_score",
+    after: tuple | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    selected_only: bool = False,
+    min_fit_score: int = 0,
+    experience_level: str | None = None,
+    requirements: str | None = None,
+    db_config: dict | None = None
+) -> tuple[list[dict], tuple | None]:
+    """Return one page of a role's candidates, best first, and the cursor for the next page.
+
+    Each candidate appears once, with their latest analysis for the role (or for that version of the
+    role's requirements when requirements is given); the other filters apply to that analysis.
+    Keyset pagination: the cursor is the (sort value, id) of the last row, so each page is an index
+    range scan on (role_id, sort column, id) no matter how deep the recruiter pages.
+    """
+    sort_column = SORT_COLUMNS[sort_by]
+    newer = "newer.candidate_id = a.candidate_id AND newer.role_id = a.role_id AND newer.id > a.id"
+    if requirements:
+        newer += " AND newer.requirements_hash = a.requirements_hash"
+    conditions = ["a.role_id = %s", f"NOT EXISTS (SELECT 1 FROM analyses newer WHERE {newer})"]
+    params = [role_id]
+
+    if selected_only:
+        conditions.append("a.selected = TRUE")
+    if min_fit_score:
+        conditions.append("a.overall_fit_score >= %s")
+        params.append(min_fit_score)
+    if experience_level:
+        conditions.append("a.experience_level = %s")
+        params.append(experience_level)
+    if requirements:
+        conditions.append("a.requirements_hash = %s")
+        params.append(text_hash(requirements))
+    if after:
+        conditions.append(f"({sort_column} < %s OR ({sort_column} = %s AND a.id < %s))")
+        params.extend([after[0], after[0], after[1]])
+
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute(f"""
+            SELECT a.id, c.email, c.resume_name, a.selected, a.overall_fit_score, a.matching_skills_score,
+                   a.experience_level, a.source, a.created_at, {sort_column}
+            FROM analyses a
+            JOIN candidates c ON c.id = a.candidate_id
+            WHERE {" AND ".join(conditions)}
+            ORDER BY {sort_column} DESC, a.id DESC
+            LIMIT %s
+        """, (*params, page_size + 1))
+        rows = cursor.fetchall()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    page = [
+        {
+            "analysis_id": row[0],
+            "email": row[1],
+            "resume": row[2],
+            "selected": bool(row[3]),
+            "overall_fit_score": row[4],
+            "matching_skills_score": row[5],
+            "experience_level": row[6],
+            "source": row[7],
+            "analyzed_at": row[8]
+        }
+        for row in rows
+    ]
+    next_cursor = (rows[-1][9], rows[-1][0]) if has_more else None
+    return page, next_cursor
@@ -1,71 +1,540 @@
-import mysql.connector
-import streamlit as st
+import os
+import threading
+import time
+from contextlib import contextmanager
 
-_db_connected = False
+from metrics import InstrumentedCursor, observe
 
-def get_db_connection():
-    """Connect to MySQL and return the connection and cursor."""
-    global _db_connected
+DB_POOL_SIZE = int(os.getenv("MYSQL_POOL_SIZE", "5"))
+DB_POOL_WAIT_TIMEOUT = float(os.getenv("MYSQL_POOL_WAIT_TIMEOUT", "10"))
+DB_POOL_RETRY_INTERVAL = 0.05
 
+_pools = {}
+_pool_stats = {}
+_pools_lock = threading.Lock()
+_initialized_schemas = set()
+_schema_lock = threading.Lock()
+_connection_factory = None
+
+SCHEMA_TABLES = {
+    "email_outbox": """
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            email_type VARCHAR(32) NOT NULL,
+            to_email VARCHAR(255) NOT NULL,
+            payload JSON NOT NULL,
+            sender_email VARCHAR(255) NOT NULL DEFAULT '',
+            status ENUM('pending', 'sending', 'sent', 'dead') NOT NULL DEFAULT 'pending',
+            attempts INT NOT NULL DEFAULT 0,
+            next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            locked_at DATETIME NULL,
+            last_error TEXT NULL,
+            sent_at DATETIME NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_outbox_due (status, next_attempt_at)
+        )
+    """,
+    "screening_jobs": """
+        CREATE TABLE IF NOT EXISTS screening_jobs (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            resume_hash CHAR(64) NOT NULL,
+            role VARCHAR(255) NOT NULL,
+            role_requirements TEXT NOT NULL,
+            requirements_hash CHAR(64) NOT NULL DEFAULT '',
+            resume_name VARCHAR(255) NULL,
+            candidate_email VARCHAR(255) NOT NULL DEFAULT '',
+            sender_email VARCHAR(255) NOT NULL DEFAULT '',
+            resume_text MEDIUMTEXT NOT NULL,
+            options JSON NOT NULL,
+            rescore_run_id INT NULL,
+            status ENUM('queued', 'running', 'done', 'failed') NOT NULL DEFAULT 'queued',
+            attempts INT NOT NULL DEFAULT 0,
+            next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            locked_at DATETIME NULL,
+            result JSON NULL,
+            last_error TEXT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at DATETIME NULL,
+            UNIQUE KEY uq_job_candidate (resume_hash, role, requirements_hash, candidate_email),
+            INDEX idx_jobs_due (status, next_attempt_at),
+            INDEX idx_jobs_rescore_run (rescore_run_id, status)
+        )
+    """,
+    "interviewers": """
+        CREATE TABLE IF NOT EXISTS interviewers (
+            id VARCHAR(64) PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NULL,
+            work_start TIME NOT NULL DEFAULT '09:00:00',
+            work_end TIME NOT NULL DEFAULT '17:00:00',
+            work_days VARCHAR(32) NOT NULL DEFAULT '0,1,2,3,4',
+            buffer_minutes INT NOT NULL DEFAULT 0,
+            max_per_day INT NULL,
+            active BOOLEAN NOT NULL DEFAULT TRUE
+        )
+    """,
+    "calendar_blackouts": """
+        CREATE TABLE IF NOT EXISTS calendar_blackouts (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            interviewer_id VARCHAR(64) NULL,
+            blackout_date DATE NOT NULL,
+            reason VARCHAR(255) NULL,
+            INDEX idx_blackout_date (blackout_date)
+        )
+    """,
+    "roles": """
+        CREATE TABLE IF NOT EXISTS roles (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            requirements TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            UNIQUE INDEX uq_role_title (title)
+        )
+    """,
+    "candidates": """
+        CREATE TABLE IF NOT EXISTS candidates (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            email VARCHAR(255) NULL,
+            resume_name VARCHAR(255) NULL,
+            resume_hash CHAR(64) NOT NULL,
+            resume_text MEDIUMTEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE INDEX uq_candidate_resume (resume_hash),
+            INDEX idx_candidate_email (email)
+        )
+    """,
+    "analyses": """
+        CREATE TABLE IF NOT EXISTS analyses (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            candidate_id BIGINT NOT NULL,
+            role_id INT NOT NULL,
+            requirements_hash CHAR(64) NOT NULL,
+            source VARCHAR(16) NOT NULL DEFAULT 'llm',
+            selected BOOLEAN NOT NULL,
+            overall_fit_score TINYINT UNSIGNED NOT NULL,
+            matching_skills_score TINYINT UNSIGNED NOT NULL,
+            experience_level VARCHAR(32) NOT NULL,
+            matching_skills JSON NOT NULL,
+            missing_skills JSON NOT NULL,
+            feedback JSON NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_analyses_role_fit (role_id, overall_fit_score, id),
+            INDEX idx_analyses_role_skills (role_id, matching_skills_score, id),
+            INDEX idx_analyses_role_created (role_id, created_at, id),
+            INDEX idx_analyses_candidate (candidate_id),
+            FOREIGN KEY (candidate_id) REFERENCES candidates (id),
+            FOREIGN KEY (role_id) REFERENCES roles (id)
+        )
+    """,
+    "role_versions": """
+        CREATE TABLE IF NOT EXISTS role_versions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            role_id INT NOT NULL,
+            version INT NOT NULL,
+            requirements TEXT NOT NULL,
+            requirements_hash CHAR(64) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE INDEX uq_role_version (role_id, version),
+            UNIQUE INDEX uq_role_requirements (role_id, requirements_hash),
+            FOREIGN KEY (role_id) REFERENCES roles (id)
+        )
+    """,
+    "rescore_runs": """
+        CREATE TABLE IF NOT EXISTS rescore_runs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            role_id INT NOT NULL,
+            role_version_id INT NOT NULL,
+            status ENUM('running', 'analyzing', 'done') NOT NULL DEFAULT 'running',
+            last_candidate_id BIGINT NOT NULL DEFAULT 0,
+            processed INT NOT NULL DEFAULT 0,
+            rescored INT NOT NULL DEFAULT 0,
+            sent_to_llm INT NOT NULL DEFAULT 0,
+            skipped INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            finished_at DATETIME NULL,
+            INDEX idx_rescore_version (role_version_id),
+            FOREIGN KEY (role_id) REFERENCES roles (id),
+            FOREIGN KEY (role_version_id) REFERENCES role_versions (id)
+        )
+    """
+}
+
+
+def db_config_from_env() -> dict | None:
+    """Read the MySQL connection settings from MYSQL_* environment variables, for processes without a UI."""
+    env_vars = {
+        "host": "MYSQL_HOST",
+        "port": "MYSQL_PORT",
+        "user": "MYSQL_USER",
+        "password": "MYSQL_PASSWORD",
+        "database": "MYSQL_DATABASE"
+    }
+    db_config = {key: os.getenv(env_var) for key, env_var in env_vars.items()}
+    missing_db_configs = [env_vars[key] for key, value in db_config.items() if not value]
+
+    if missing_db_configs:
+        print(f"❌ Missing database configuration: {', '.join(missing_db_configs)}")
+        return None
+
+    db_config["port"] = int(db_config["port"])
+    return db_config
+
+
+def db_config_from_settings(settings) -> dict | None:
+    """Build the MySQL connection settings from a db_host/db_port/... mapping such as the Streamlit session."""
     required_db_configs = ["db_host", "db_port", "db_user", "db_password", "db_name"]
-    missing_db_configs = [key for key in required_db_configs if not st.session_state.get(key)]
+    missing_db_configs = [key for key in required_db_configs if not settings.get(key)]
 
     if missing_db_configs:
         print(f"❌ Missing database configuration: {', '.join(missing_db_configs)}")
-        return None, None
+        return None
 
-    try:
-        conn = mysql.connector.connect(
-            host=st.session_state["db_host"],
-            port=int(st.session_state["db_port"]),
-            user=st.session_state["db_user"],
-            password=st.session_state["db_password"],
-            database=st.session_state["db_name"]
-        )
-        cursor = conn.cursor()
+    return {
+        "host": settings["db_host"],
+        "port": int(settings["db_port"]),
+        "user": settings["db_user"],
+        "password": settings["db_password"],
+        "database": settings["db_name"]
+    }
+
+
+def get_db_config() -> dict | None:
+    """Read the MySQL connection settings from the Streamlit session."""
+    import streamlit as st
 
-        if not _db_connected:
-            print("✅ Connected to MySQL successfully!")
-            _db_connected = True  
+    return db_config_from_settings(st.session_state)
 
-        return conn, cursor
+
+def _config_key(db_config: dict) -> tuple:
+    return tuple(sorted(db_config.items()))
+
+
+def _get_pool(db_config: dict):
+    """Return the process-wide pool for this DB config, creating it on first use."""
+    from mysql.connector import pooling
+
+    key = _config_key(db_config)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = pooling.MySQLConnectionPool(
+                pool_name=f"recruitment-{len(_pools)}",
+                pool_size=DB_POOL_SIZE,
+                pool_reset_session=True,
+                **db_config
+            )
+            _pools[key] = pool
+            _pool_stats[key] = {"checkouts": 0, "hits": 0, "misses": 0, "wait_seconds": 0.0, "timeouts": 0}
+            print(f"✅ Connected to MySQL successfully! (pool size {DB_POOL_SIZE})")
+        return key, pool
+
+
+def _checkout(key: tuple, pool):
+    """Take a connection from the pool, waiting up to DB_POOL_WAIT_TIMEOUT while it is exhausted."""
+    from mysql.connector import pooling
+
+    started = time.perf_counter()
+    deadline = started + DB_POOL_WAIT_TIMEOUT
+    waited = False
+
+    while True:
+        try:
+            conn = pool.get_connection()
+            break
+        except pooling.PoolError:
+            if time.perf_counter() >= deadline:
+                with _pools_lock:
+                    _pool_stats[key]["timeouts"] += 1
+                raise
+            waited = True
+            time.sleep(DB_POOL_RETRY_INTERVAL)
+
+    with _pools_lock:
+        stats = _pool_stats[key]
+        stats["checkouts"] += 1
+        stats["misses" if waited else "hits"] += 1
+        stats["wait_seconds"] += time.perf_counter() - started
+    observe("db_checkout_wait_seconds", time.perf_counter() - started)
+    return conn
+
+
+def use_connection_factory(factory):
+    """Serve get_db_connection from factory() instead of the MySQL pool, e.g. a SQLite stand-in for benchmarks.
+
+    Pass None to go back to MySQL.
+    """
+    global _connection_factory
+    _connection_factory = factory
+
+
+def get_db_connection(db_config: dict | None = None):
+    """Check out a pooled MySQL connection and return the connection and cursor.
+
+    Closing the connection returns it to the pool instead of dropping the socket.
+    """
+    if _connection_factory:
+        conn = _connection_factory()
+        return conn, InstrumentedCursor(conn.cursor())
+
+    db_config = db_config or get_db_config()
+    if not db_config:
+        return None, None
+
+    import mysql.connector
+
+    try:
+        key, pool = _get_pool(db_config)
+        conn = _checkout(key, pool)
+        return conn, InstrumentedCursor(conn.cursor())
     except mysql.connector.Error as err:
         print(f"❌ Error: {err}")
         return None, None
 
-def create_table():
-    """Create the 'interview_schedule' table if it does not exist."""
-    conn, cursor = get_db_connection()
-    if conn and cursor:
-        try:
-            cursor.execute("SHOW TABLES LIKE 'interview_schedule'")
-            table_exists = cursor.fetchone()
-
-            if not table_exists:
-                cursor.execute("""
-                    CREATE TABLE interview_schedule (
-                        id INT AUTO_INCREMENT PRIMARY KEY,
-                        candidate_email VARCHAR(255) NOT NULL,
-                        interview_time DATETIME NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
+
+@contextmanager
+def db_session(db_config: dict | None = None):
+    """Check out a pooled connection for the duration of the block and always hand it back."""
+    conn, cursor = get_db_connection(db_config)
+    if not conn:
+        import mysql.connector
+
+        raise mysql.connector.InterfaceError("MySQL is not configured or unreachable.")
+
+    try:
+        yield conn, cursor
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_pool_stats() -> list[dict]:
+    """Return size, wait time and hit-rate statistics for every connection pool in this process."""
+    with _pools_lock:
+        report = []
+        for key, pool in _pools.items():
+            config = dict(key)
+            stats = _pool_stats[key]
+            checkouts = stats["checkouts"]
+            report.append({
+                "pool": f"{config['user']}@{config['host']}:{config['port']}/{config['database']}",
+                "pool_size": pool.pool_size,
+                "checkouts": checkouts,
+                "hits": stats["hits"],
+                "misses": stats["misses"],
+                "timeouts": stats["timeouts"],
+                "hit_rate": stats["hits"] / checkouts if checkouts else 0.0,
+                "avg_wait_ms": 1000 * stats["wait_seconds"] / checkouts if checkouts else 0.0
+            })
+        return report
+
+
+def _index_exists(cursor, table: str, index_name: str) -> bool:
+    cursor.execute(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (index_name,))
+    return bool(cursor.fetchall())
+
+
+def _add_unique_index(cursor, table: str, index_name: str, columns: str, replaces: tuple = ()) -> bool:
+    """Add a unique index (dropping the indexes it replaces in the same ALTER) unless it already exists.
+
+    Refuses while existing rows would violate it and returns False, so the caller retries on the next
+    start instead of recording the schema as done.
+    """
+    if _index_exists(cursor, table, index_name):
+        return True
+
+    # Rows with a NULL in the key never collide in a unique index.
+    not_null = " AND ".join(f"{column.strip()} IS NOT NULL" for column in columns.split(","))
+    cursor.execute(
+        f"SELECT {columns}, COUNT(*) FROM {table} WHERE {not_null} GROUP BY {columns} HAVING COUNT(*) > 1 LIMIT 10"
+    )
+    duplicates = cursor.fetchall()
+    if duplicates:
+        print(f"❌ Cannot add unique index '{index_name}' to '{table}': rows share ({columns}), e.g.:")
+        for row in duplicates:
+            print(f"   {row[:-1]} x{row[-1]}")
+        print("   Resolve the duplicates and restart; the migration is retried on every start until then.")
+        return False
+
+    clauses = [f"DROP INDEX {name}" for name in replaces if _index_exists(cursor, table, name)]
+    clauses.append(f"ADD UNIQUE INDEX {index_name} ({columns})")
+    cursor.execute(f"ALTER TABLE {table} {', '.join(clauses)}")
+    print(f"✅ Unique index '{index_name}' added to '{table}'!")
+    return True
+
+
+def _migrate_interview_schedule(cursor) -> bool:
+    """Bring an older interview_schedule up to per-interviewer bookings.
+
+    MySQL commits each DDL statement on its own, so a migration can stop half way; every step checks
+    whether it is still needed, and the unique index is the marker that the migration is complete.
+    """
+    if _index_exists(cursor, "interview_schedule", "uq_interviewer_time"):
+        return True
+
+    cursor.execute("SHOW COLUMNS FROM interview_schedule LIKE 'interviewer_id'")
+    if not cursor.fetchall():
+        cursor.execute("""
+            ALTER TABLE interview_schedule
+                ADD COLUMN interviewer_id VARCHAR(64) NOT NULL DEFAULT 'default' AFTER candidate_email,
+                ADD COLUMN end_time DATETIME NULL AFTER interview_time,
+                ADD COLUMN duration_minutes INT NOT NULL DEFAULT 60 AFTER end_time
+        """)
+    cursor.execute("SHOW COLUMNS FROM interview_schedule LIKE 'end_time'")
+    if cursor.fetchone()[2] == "YES":
+        cursor.execute("UPDATE interview_schedule SET end_time = interview_time + INTERVAL duration_minutes MINUTE WHERE end_time IS NULL")
+        cursor.execute("ALTER TABLE interview_schedule MODIFY end_time DATETIME NOT NULL")
+
+    if not _index_exists(cursor, "interview_schedule", "idx_interview_time"):
+        cursor.execute("CREATE INDEX idx_interview_time ON interview_schedule (interview_time)")
+
+    # Replaces the single-interviewer uq_interview_time; tables older than that may hold double bookings.
+    if not _add_unique_index(
+        cursor, "interview_schedule", "uq_interviewer_time", "interviewer_id, interview_time",
+        replaces=("uq_interview_time",)
+    ):
+        return False
+    print("✅ Table 'interview_schedule' migrated to per-interviewer bookings!")
+    return True
+
+
+def _migrate_email_outbox(cursor):
+    """Outbox rows record their sender, so each sender's worker sends only its own emails."""
+    cursor.execute("SHOW COLUMNS FROM email_outbox LIKE 'sender_email'")
+    if not cursor.fetchall():
+        cursor.execute("ALTER TABLE email_outbox ADD COLUMN sender_email VARCHAR(255) NOT NULL DEFAULT '' AFTER payload")
+        print("✅ Table 'email_outbox' migrated to per-sender emails!")
+
+
+def _migrate_screening_jobs(cursor) -> bool:
+    """Jobs are idempotent per requirements version and candidate email, so edited requirements or a
+    corrected email re-screen; jobs record their sender so each sender's worker runs only its own."""
+    if _index_exists(cursor, "screening_jobs", "uq_job_candidate"):
+        return True
+
+    cursor.execute("SHOW COLUMNS FROM screening_jobs LIKE 'requirements_hash'")
+    if not cursor.fetchall():
+        cursor.execute("ALTER TABLE screening_jobs ADD COLUMN requirements_hash CHAR(64) NOT NULL DEFAULT '' AFTER role_requirements")
+    cursor.execute("SHOW COLUMNS FROM screening_jobs LIKE 'sender_email'")
+    if not cursor.fetchall():
+        cursor.execute("ALTER TABLE screening_jobs ADD COLUMN sender_email VARCHAR(255) NOT NULL DEFAULT '' AFTER candidate_email")
+    cursor.execute("SHOW COLUMNS FROM screening_jobs LIKE 'candidate_email'")
+    if cursor.fetchone()[2] == "YES":
+        cursor.execute("UPDATE screening_jobs SET candidate_email = '' WHERE candidate_email IS NULL")
+        cursor.execute("ALTER TABLE screening_jobs MODIFY candidate_email VARCHAR(255) NOT NULL DEFAULT ''")
+    return _add_unique_index(
+        cursor, "screening_jobs", "uq_job_candidate", "resume_hash, role, requirements_hash, candidate_email",
+        replaces=("uq_job_resume_role_requirements", "uq_job_resume_role")
+    )
+
+
+def _migrate_booking_key(cursor) -> bool:
+    """Bookings made for a screening job carry its key, so a job that runs twice books one interview."""
+    cursor.execute("SHOW COLUMNS FROM interview_schedule LIKE 'booking_key'")
+    if not cursor.fetchall():
+        cursor.execute("ALTER TABLE interview_schedule ADD COLUMN booking_key VARCHAR(191) NULL AFTER duration_minutes")
+    return _add_unique_index(cursor, "interview_schedule", "uq_booking_key", "booking_key")
+
+
+def _migrate_rescore_runs(cursor):
+    """A version can have several rescore runs, since reverting to it re-evaluates the candidates analyzed
+    in between, and a run waits in 'analyzing' for the screening jobs it queued, which record their run."""
+    cursor.execute("SHOW COLUMNS FROM rescore_runs LIKE 'status'")
+    if "analyzing" not in cursor.fetchone()[1]:
+        cursor.execute("ALTER TABLE rescore_runs MODIFY status ENUM('running', 'analyzing', 'done') NOT NULL DEFAULT 'running'")
+    if _index_exists(cursor, "rescore_runs", "uq_rescore_version"):
+        cursor.execute("ALTER TABLE rescore_runs ADD INDEX idx_rescore_version (role_version_id), DROP INDEX uq_rescore_version")
+    cursor.execute("SHOW COLUMNS FROM screening_jobs LIKE 'rescore_run_id'")
+    if not cursor.fetchall():
+        cursor.execute("""
+            ALTER TABLE screening_jobs
+                ADD COLUMN rescore_run_id INT NULL AFTER options,
+                ADD INDEX idx_jobs_rescore_run (rescore_run_id, status)
+        """)
+        print("✅ Tables 'rescore_runs' and 'screening_jobs' migrated to tracked rescore runs!")
+
+
+def create_table(db_config: dict | None = None):
+    """Create the 'interview_schedule' and supporting tables if they do not exist, once per process and DB config."""
+    db_config = db_config or get_db_config()
+    if not db_config:
+        return
+
+    key = _config_key(db_config)
+    if key in _initialized_schemas:
+        return
+
+    import mysql.connector
+
+    with _schema_lock:
+        if key in _initialized_schemas:
+            return
+
+        conn, cursor = get_db_connection(db_config)
+        if conn and cursor:
+            try:
+                cursor.execute("SHOW TABLES LIKE 'interview_schedule'")
+                table_exists = cursor.fetchone()
+
+                if not table_exists:
+                    cursor.execute("""
+                        CREATE TABLE interview_schedule (
+                            id INT AUTO_INCREMENT PRIMARY KEY,
+                            candidate_email VARCHAR(255) NOT NULL,
+                            interviewer_id VARCHAR(64) NOT NULL DEFAULT 'default',
+                            interview_time DATETIME NOT NULL,
+                            end_time DATETIME NOT NULL,
+                            duration_minutes INT NOT NULL DEFAULT 60,
+                            booking_key VARCHAR(191) NULL,
+                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                            UNIQUE INDEX uq_interviewer_time (interviewer_id, interview_time),
+                            UNIQUE INDEX uq_booking_key (booking_key),
+                            INDEX idx_interview_time (interview_time)
+                        )
+                    """)
+                    conn.commit()
+                    print("✅ Table 'interview_schedule' is ready!")
+                    migrated = True
+                else:
+                    migrated = _migrate_interview_schedule(cursor) and _migrate_booking_key(cursor)
+
+                for statement in SCHEMA_TABLES.values():
+                    cursor.execute(statement)
+
+                _migrate_email_outbox(cursor)
+                _migrate_rescore_runs(cursor)
+                migrated = _migrate_screening_jobs(cursor) and migrated
+
+                cursor.execute("INSERT IGNORE INTO interviewers (id, name) VALUES ('default', 'Default interviewer')")
                 conn.commit()
-                print("✅ Table 'interview_schedule' is ready!")
-        except mysql.connector.Error as err:
-            print(f"❌ Error creating table: {err}")
-        finally:
-            cursor.close()
-            conn.close()
+
+                if migrated:
+                    _initialized_schemas.add(key)
+            except mysql.connector.Error as err:
+                print(f"❌ Error creating table: {err}")
+            finally:
+                cursor.close()
+                conn.close()
+
 
 def test_db_connection():
     """Test MySQL database connection."""
+    import mysql.connector
+    import streamlit as st
+
     try:
-        conn, _ = get_db_connection()
+        conn, cursor = get_db_connection()
         if conn:
             st.success("✅ Database connection successful!")
+            cursor.close()
             conn.close()
+            for stats in get_pool_stats():
+                st.caption(
+                    f"Pool {stats['pool']}: size {stats['pool_size']}, "
+                    f"hit rate {stats['hit_rate']:.0%}, avg wait {stats['avg_wait_ms']:.1f} ms"
+                )
         else:
             st.error("❌ Database connection failed!")
     except mysql.connector.Error as e:
-        st.error(f"❌ Database connection failed: {e}")
\ No newline at end of file
+        st.error(f"❌ Database connection failed: {e}")
@@ -0,0 +1,77 @@
+from string import Template
+
+SIGNATURE = "Best,\nThe AI Recruiting Team"
+
+SELECTION_SUBJECT = Template("Your application for the $role position at $company_name")
+SELECTION_BODY = Template("""Hi there,
+
+Congratulations! After reviewing your resume, we are happy to let you know that you have been selected to move forward for the $role position at $company_name.
+
+The next step is an interview with our team. You will receive a separate email with the interview date, time and meeting details shortly.
+
+We look forward to speaking with you.
+
+$signature""")
+
+INTERVIEW_SUBJECT = Template("Interview confirmation: $role position at $company_name")
+INTERVIEW_BODY = Template("""Hi there,
+
+Your interview for the $role position is confirmed. Here are the details:
+
+Role: $role position
+Date & Time: $interview_time Vietnam Time (UTC+7)
+Meeting Link: $zoom_link
+Passcode: $zoom_passcode
+
+Please ensure that you are available for the meeting during business hours (9 AM - 5 PM Vietnam Time).
+
+If you have any questions or need further assistance, feel free to reach out.
+
+$signature""")
+
+REJECTION_SUBJECT = Template("Your application for the $role position at $company_name")
+REJECTION_BODY = Template("""Hi there,
+
+Thank you for taking the time to apply for the $role position at $company_name. After careful review, we have decided not to move forward with your application at this time.
+
+$feedback_paragraph
+
+We encourage you to keep building your skills and to apply again in the future.
+
+$signature""")
+
+
+def render_selection_email(role: str, company_name: str) -> tuple[str, str]:
+    """Return the (subject, body) of the selection email."""
+    values = {"role": role, "company_name": company_name, "signature": SIGNATURE}
+    return SELECTION_SUBJECT.substitute(values), SELECTION_BODY.substitute(values)
+
+
+def render_interview_email(
+    role: str,
+    company_name: str,
+    interview_time: str,
+    zoom_link: str,
+    zoom_passcode: str
+) -> tuple[str, str]:
+    """Return the (subject, body) of the interview confirmation email."""
+    values = {
+        "role": role,
+        "company_name": company_name,
+        "interview_time": interview_time,
+        "zoom_link": zoom_link,
+        "zoom_passcode": zoom_passcode,
+        "signature": SIGNATURE
+    }
+    return INTERVIEW_SUBJECT.substitute(values), INTERVIEW_BODY.substitute(values)
+
+
+def render_rejection_email(role: str, company_name: str, feedback_paragraph: str) -> tuple[str, str]:
+    """Return the (subject, body) of the rejection email around an already written feedback paragraph."""
+    values = {
+        "role": role,
+        "company_name": company_name,
+        "feedback_paragraph": feedback_paragraph.strip(),
+        "signature": SIGNATURE
+    }
+    return REJECTION_SUBJECT.substitute(values), REJECTION_BODY.substitute(values)
@@ -0,0 +1,585 @@
+"""In-memory interview calendar for several interviewers with working hours, buffers, durations, daily
+capacity and blackout dates.
+
+Availability is kept as an (interviewers x cells) boolean grid over the search horizon, one cell per
+CALENDAR_GRANULARITY_MINUTES, so the earliest feasible slot across every interviewer is a vectorized
+scan over a few days at a time. Bookings are pulled from the DB incrementally. A slot being booked is
+held in memory so concurrent bookers in the process search past it, and every booking is re-checked
+in the DB while holding locks on that interviewer's bookings around the slot. A booker that loses a
+slot to another process refreshes the index and walks on to the next free slot, so a stale index can
+only cost a retry, never a double booking or a dropped candidate.
+"""
+import itertools
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Callable
+
+from database import get_db_config, get_db_connection
+from metrics import inc, logger, observe
+
+CALENDAR_TIMEZONE = os.getenv("INTERVIEW_TIMEZONE", "Asia/Ho_Chi_Minh")
+CALENDAR_GRANULARITY_MINUTES = int(os.getenv("CALENDAR_GRANULARITY_MINUTES", "15"))
+CALENDAR_HORIZON_DAYS = int(os.getenv("CALENDAR_HORIZON_DAYS", "120"))
+CALENDAR_REFRESH_SECONDS = float(os.getenv("CALENDAR_REFRESH_SECONDS", "2"))
+CALENDAR_FULL_RELOAD_SECONDS = float(os.getenv("CALENDAR_FULL_RELOAD_SECONDS", "300"))
+# Longest interview the booking check looks back for when locking bookings that could overlap a slot.
+CALENDAR_MAX_INTERVIEW_MINUTES = int(os.getenv("CALENDAR_MAX_INTERVIEW_MINUTES", "480"))
+# InnoDB deadlock and lock wait timeout: another booker locked the same range first.
+_LOCK_CONFLICT_ERRNOS = (1205, 1213)
+# Auto-increment ids can commit out of order, so incremental refreshes look this far back.
+CALENDAR_ID_LOOKBACK = 1000
+CALENDAR_SEARCH_CHUNK_DAYS = 7
+
+DEFAULT_INTERVIEWER_ID = "default"
+DEFAULT_INTERVIEW_MINUTES = int(os.getenv("INTERVIEW_DURATION_MINUTES", "60"))
+DEFAULT_WORK_START = dtime(9)
+DEFAULT_WORK_END = dtime(17)
+DEFAULT_WORK_DAYS = (0, 1, 2, 3, 4)
+
+_calendars = {}
+_calendars_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Interviewer:
+    id: str
+    name: str = ""
+    work_start: dtime = DEFAULT_WORK_START
+    work_end: dtime = DEFAULT_WORK_END
+    work_days: tuple = DEFAULT_WORK_DAYS
+    buffer_minutes: int = 0
+    max_per_day: int | None = None
+
+
+@dataclass(frozen=True)
+class Booking:
+    interviewer_id: str
+    start: datetime
+    duration_minutes: int
+
+    @property
+    def end(self) -> datetime:
+        return self.start + timedelta(minutes=self.duration_minutes)
+
+    @property
+    def start_text(self) -> str:
+        return self.start.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def first_search_day() -> date:
+    """Interviews are booked from tomorrow onwards (calendar timezone)."""
+    import pytz
+
+    return (datetime.now(pytz.timezone(CALENDAR_TIMEZONE)) + timedelta(days=1)).date()
+
+
+def _as_time(value) -> dtime:
+    if isinstance(value, timedelta):
+        return (datetime.min + value).time()
+    if isinstance(value, str):
+        return dtime.fromisoformat(value)
+    return value
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+class InterviewCalendar:
+    """Availability index for one database; safe to share between threads."""
+
+    def __init__(self, db_config: dict | None, horizon_days: int = CALENDAR_HORIZON_DAYS):
+        self.db_config = db_config
+        self.horizon_days = horizon_days
+        self.cells_per_day = 24 * 60 // CALENDAR_GRANULARITY_MINUTES
+        self.interviewers = []
+        self._rows = {}
+        self._origin = None
+        self._available = self._busy = self._day_counts = None
+        self._held = self._pending_days = self._capacity = None
+        self._claims = {}
+        self._claim_ids = itertools.count(1)
+        self._applied_ids = set()
+        self._last_booking_id = 0
+        self._loaded_at = self._refreshed_at = 0.0
+        self._lock = threading.RLock()
+
+    def _cell(self, moment: datetime) -> int:
+        return int((moment - self._origin).total_seconds() // 60) // CALENDAR_GRANULARITY_MINUTES
+
+    def _cells(self, minutes: int) -> int:
+        return math.ceil(minutes / CALENDAR_GRANULARITY_MINUTES)
+
+    def load(self):
+        """Rebuild the whole index: interviewers, blackout dates and every booking in the horizon."""
+        import numpy as np
+
+        started = time.perf_counter()
+        first_day = first_search_day()
+        last_day = first_day + timedelta(days=self.horizon_days)
+
+        conn, cursor = get_db_connection(self.db_config)
+        if not conn:
+            return
+        try:
+            cursor.execute("""
+                SELECT id, name, work_start, work_end, work_days, buffer_minutes, max_per_day
+                FROM interviewers WHERE active = 1 ORDER BY id
+            """)
+            interviewers = [
+                Interviewer(
+                    id=row[0],
+                    name=row[1] or "",
+                    work_start=_as_time(row[2]),
+                    work_end=_as_time(row[3]),
+                    work_days=tuple(int(day) for day in str(row[4]).split(",") if day.strip()),
+                    buffer_minutes=int(row[5] or 0),
+                    max_per_day=row[6]
+                )
+                for row in cursor.fetchall()
+            ]
+
+            cursor.execute(
+                "SELECT interviewer_id, blackout_date FROM calendar_blackouts WHERE blackout_date >= %s AND blackout_date < %s",
+                (first_day, last_day)
+            )
+            blackouts = [(row[0], _as_date(row[1])) for row in cursor.fetchall()]
+
+            cursor.execute("""
+                SELECT id, interviewer_id, interview_time, duration_minutes FROM interview_schedule
+                WHERE interview_time >= %s AND interview_time < %s
+            """, (datetime.combine(first_day, dtime.min), datetime.combine(last_day, dtime.min)))
+            bookings = cursor.fetchall()
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+        with self._lock:
+            self.interviewers = interviewers
+            self._rows = {interviewer.id: row for row, interviewer in enumerate(interviewers)}
+            self._origin = datetime.combine(first_day, dtime.min)
+            self._available = np.zeros((len(interviewers), self.horizon_days * self.cells_per_day), dtype=bool)
+            self._busy = np.zeros_like(self._available)
+            self._day_counts = np.zeros((len(interviewers), self.horizon_days), dtype=np.int32)
+            self._held = np.zeros(self._available.shape, dtype=np.int16)
+            self._pending_days = np.zeros_like(self._day_counts)
+            self._capacity = np.array([interviewer.max_per_day or 0 for interviewer in interviewers], dtype=np.int32)
+            self._applied_ids = set()
+            self._last_booking_id = 0
+
+            closed = {}
+            for interviewer_id, blackout_date in blackouts:
+                closed.setdefault(interviewer_id, set()).add(blackout_date)
+
+            for row, interviewer in enumerate(interviewers):
+                start_cell = self._cells(interviewer.work_start.hour * 60 + interviewer.work_start.minute)
+                end_cell = (interviewer.work_end.hour * 60 + interviewer.work_end.minute) // CALENDAR_GRANULARITY_MINUTES
+                days_off = closed.get(None, set()) | closed.get(interviewer.id, set())
+                for day_offset in range(self.horizon_days):
+                    day = first_day + timedelta(days=day_offset)
+                    if day.weekday() in interviewer.work_days and day not in days_off:
+                        day_cell = day_offset * self.cells_per_day
+                        self._available[row, day_cell + start_cell:day_cell + end_cell] = True
+
+            for booking_id, interviewer_id, start, duration in bookings:
+                self._apply(booking_id, interviewer_id, start, duration)
+            for slot in self._claims.values():
+                self._hold(slot, 1)
+
+            self._loaded_at = self._refreshed_at = time.monotonic()
+
+        observe("calendar_load_seconds", time.perf_counter() - started)
+        logger.info(f"Interview calendar loaded: {len(interviewers)} interviewers, {len(bookings)} bookings")
+
+    def refresh(self, force: bool = False):
+        """Pull bookings added since the last refresh; rebuild fully when the day rolls over or periodically."""
+        now = time.monotonic()
+        if (
+            self._origin is None
+            or self._origin.date() != first_search_day()
+            or now - self._loaded_at > CALENDAR_FULL_RELOAD_SECONDS
+        ):
+            self.load()
+            return
+        if not force and now - self._refreshed_at < CALENDAR_REFRESH_SECONDS:
+            return
+
+        conn, cursor = get_db_connection(self.db_config)
+        if not conn:
+            return
+        try:
+            cursor.execute(
+                "SELECT id, interviewer_id, interview_time, duration_minutes FROM interview_schedule WHERE id > %s AND interview_time >= %s",
+                (max(0, self._last_booking_id - CALENDAR_ID_LOOKBACK), self._origin)
+            )
+            bookings = cursor.fetchall()
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+        with self._lock:
+            for booking_id, interviewer_id, start, duration in bookings:
+                self._apply(booking_id, interviewer_id, start, duration)
+            self._refreshed_at = now
+
+    def _apply(self, booking_id: int | None, interviewer_id: str, start: datetime, duration_minutes: int):
+        """Mark a booking and its buffers busy, and close the day once the interviewer's capacity is reached."""
+        if booking_id is not None:
+            if booking_id in self._applied_ids:
+                return
+            self._applied_ids.add(booking_id)
+            self._last_booking_id = max(self._last_booking_id, booking_id)
+
+        row = self._rows.get(interviewer_id)
+        if row is None:
+            return
+        interviewer = self.interviewers[row]
+        self._busy[row, slice(*self._span(row, start, duration_minutes))] = True
+
+        day = (start.date() - self._origin.date()).days
+        if 0 <= day < self.horizon_days:
+            self._day_counts[row, day] += 1
+            if interviewer.max_per_day and self._day_counts[row, day] >= interviewer.max_per_day:
+                self._available[row, day * self.cells_per_day:(day + 1) * self.cells_per_day] = False
+
+    def _span(self, row: int, start: datetime, duration_minutes: int) -> tuple[int, int]:
+        """Cells covered by a booking and the interviewer's buffers on both sides."""
+        buffer = timedelta(minutes=self.interviewers[row].buffer_minutes)
+        end = start + timedelta(minutes=duration_minutes)
+        first_cell = max(0, self._cell(start - buffer))
+        last_cell = self._cell(end + buffer - timedelta(microseconds=1)) + 1
+        return first_cell, max(first_cell, last_cell)
+
+    def _hold(self, slot: Booking, delta: int):
+        """Add (1) or remove (-1) a tentative claim on a slot and on its day's capacity."""
+        row = self._rows.get(slot.interviewer_id)
+        if row is None:
+            return
+        self._held[row, slice(*self._span(row, slot.start, slot.duration_minutes))] += delta
+        day = (slot.start.date() - self._origin.date()).days
+        if 0 <= day < self.horizon_days:
+            self._pending_days[row, day] += delta
+
+    def _search(self, duration_minutes: int, horizon_days: int, interviewer_ids=None) -> Booking | None:
+        import numpy as np
+
+        length = self._cells(duration_minutes)
+        rows = np.arange(len(self.interviewers))
+        if interviewer_ids is not None:
+            rows = np.array([self._rows[i] for i in interviewer_ids if i in self._rows], dtype=int)
+        if not len(rows) or length <= 0:
+            return None
+
+        # Days whose capacity is used up once the slots other bookers are holding commit.
+        closed = None
+        if self._pending_days[rows].any():
+            capacity = self._capacity[rows, None]
+            full = (capacity > 0) & (self._day_counts[rows] + self._pending_days[rows] >= capacity)
+            closed = np.repeat(full, self.cells_per_day, axis=1)
+
+        total = min(horizon_days, self.horizon_days) * self.cells_per_day
+        chunk = CALENDAR_SEARCH_CHUNK_DAYS * self.cells_per_day
+        for chunk_start in range(0, total, chunk):
+            stop = min(total, chunk_start + chunk + length - 1)
+            free = (
+                self._available[rows, chunk_start:stop]
+                & ~self._busy[rows, chunk_start:stop]
+                & (self._held[rows, chunk_start:stop] == 0)
+            )
+            if closed is not None:
+                free &= ~closed[:, chunk_start:stop]
+            if free.shape[1] < length:
+                break
+
+            runs = np.zeros((len(rows), free.shape[1] + 1), dtype=np.int32)
+            np.cumsum(free, axis=1, out=runs[:, 1:])
+            fits = (runs[:, length:] - runs[:, :-length]) == length
+            if not fits.any():
+                continue
+
+            first = np.where(fits.any(axis=1), fits.argmax(axis=1), fits.shape[1])
+            best = int(first.argmin())
+            start = self._origin + timedelta(minutes=(chunk_start + int(first[best])) * CALENDAR_GRANULARITY_MINUTES)
+            return Booking(self.interviewers[rows[best]].id, start, duration_minutes)
+        return None
+
+    def find_earliest(
+        self,
+        duration_minutes: int = DEFAULT_INTERVIEW_MINUTES,
+        horizon_days: int = CALENDAR_HORIZON_DAYS,
+        interviewer_ids: list[str] | None = None
+    ) -> Booking | None:
+        """Return the earliest slot any (or one of interviewer_ids) interviewer can take, without booking it."""
+        with self._lock:
+            if horizon_days > self.horizon_days:
+                self.horizon_days = horizon_days
+                self._origin = None
+            self.refresh()
+            started = time.perf_counter()
+            slot = self._search(duration_minutes, horizon_days, interviewer_ids)
+            observe("calendar_search_seconds", time.perf_counter() - started)
+            return slot
+
+    def _claim(
+        self,
+        duration_minutes: int,
+        horizon_days: int,
+        interviewer_ids: list[str] | None = None
+    ) -> tuple[int, Booking, Interviewer] | None:
+        """Find the earliest slot and hold it so other bookers in this process search past it until released."""
+        with self._lock:
+            slot = self.find_earliest(duration_minutes, horizon_days, interviewer_ids)
+            if not slot:
+                return None
+            claim_id = next(self._claim_ids)
+            self._claims[claim_id] = slot
+            self._hold(slot, 1)
+            return claim_id, slot, self.interviewers[self._rows[slot.interviewer_id]]
+
+    def _release(self, claim_id: int, booking_id: int | None = None):
+        """Drop a claim, recording the slot as booked when the booking committed."""
+        with self._lock:
+            slot = self._claims.pop(claim_id, None)
+            if slot is None:
+                return
+            self._hold(slot, -1)
+            if booking_id is not None:
+                self._apply(booking_id, slot.interviewer_id, slot.start, slot.duration_minutes)
+
+    def find_booking(self, booking_key: str) -> Booking | None:
+        """Return the booking already made under this idempotency key, if any."""
+        conn, cursor = get_db_connection(self.db_config)
+        if not conn:
+            return None
+        try:
+            cursor.execute(
+                "SELECT interviewer_id, interview_time, duration_minutes FROM interview_schedule WHERE booking_key = %s",
+                (booking_key,)
+            )
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+        return Booking(row[0], row[1], row[2]) if row else None
+
+    def _insert_booking(
+        self,
+        cursor,
+        candidate_email: str,
+        slot: Booking,
+        interviewer: Interviewer,
+        booking_key: str | None = None
+    ) -> int | None:
+        """Insert the booking if the DB agrees the slot is free; None on conflict (the caller rolls back).
+
+        The locking read covers only this interviewer's bookings that could overlap the slot (the whole
+        day when daily capacity is capped), so bookers for other interviewers or times do not wait.
+        """
+        import mysql.connector
+
+        buffer = timedelta(minutes=interviewer.buffer_minutes)
+        day_start = datetime.combine(slot.start.date(), dtime.min)
+        day_end = day_start + timedelta(days=1)
+        lock_from = slot.start - buffer - timedelta(minutes=CALENDAR_MAX_INTERVIEW_MINUTES)
+        lock_to = slot.end + buffer
+        if interviewer.max_per_day:
+            lock_from, lock_to = min(lock_from, day_start), max(lock_to, day_end)
+
+        try:
+            cursor.execute("""
+                SELECT
+                    SUM(interview_time < %s AND end_time > %s),
+                    SUM(interview_time >= %s AND interview_time < %s)
+                FROM interview_schedule
+                WHERE interviewer_id = %s AND interview_time >= %s AND interview_time < %s
+                FOR UPDATE
+            """, (
+                slot.end + buffer, slot.start - buffer,
+                day_start, day_end,
+                slot.interviewer_id, lock_from, lock_to
+            ))
+            overlapping, booked_that_day = cursor.fetchone()
+            if overlapping or (interviewer.max_per_day and (booked_that_day or 0) >= interviewer.max_per_day):
+                return None
+
+            cursor.execute("""
+                INSERT INTO interview_schedule (
+                    candidate_email, interviewer_id, interview_time, end_time, duration_minutes, booking_key, created_at
+                ) VALUES (%s, %s, %s, %s, %s, %s, NOW())
+            """, (candidate_email, slot.interviewer_id, slot.start, slot.end, slot.duration_minutes, booking_key))
+        except mysql.connector.Error as e:
+            if isinstance(e, mysql.connector.IntegrityError) or e.errno in _LOCK_CONFLICT_ERRNOS:
+                return None
+            raise
+        return cursor.lastrowid
+
+    def _commit_booking(
+        self,
+        conn,
+        cursor,
+        candidate_email: str,
+        slot: Booking,
+        interviewer: Interviewer,
+        before_commit,
+        booking_key: str | None = None
+    ) -> int | None:
+        """Run one booking transaction; returns the booking id, or None after rolling back a conflict."""
+        booking_id = self._insert_booking(cursor, candidate_email, slot, interviewer, booking_key)
+        if booking_id is None:
+            conn.rollback()
+            inc("calendar_booking_conflicts_total")
+            return None
+        try:
+            if before_commit:
+                before_commit(cursor, slot.start_text)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        inc("calendar_bookings_total")
+        return booking_id
+
+    def book(
+        self,
+        candidate_email: str,
+        duration_minutes: int = DEFAULT_INTERVIEW_MINUTES,
+        horizon_days: int = CALENDAR_HORIZON_DAYS,
+        before_commit: Callable | None = None,
+        interviewer_ids: list[str] | None = None,
+        booking_key: str | None = None
+    ) -> Booking | None:
+        """Book the earliest feasible slot for a candidate.
+
+        The slot is held in memory while the booking transaction re-checks it in the DB, so concurrent
+        bookers take different slots instead of racing for the same one. before_commit(cursor,
+        interview_time) runs inside the booking transaction, e.g. to queue confirmation emails.
+
+        With a booking_key, a booking already made under that key is returned instead of making another
+        (and before_commit does not run again); the key is unique in the DB, so this holds across processes.
+
+        A slot another process took keeps its claim until this booking ends, so after refreshing the index
+        the search walks past it even before that booking shows up; only the end of the horizon stops it.
+        """
+        lost_claims = []
+        try:
+            while True:
+                if booking_key and (existing := self.find_booking(booking_key)):
+                    return existing
+                claimed = self._claim(duration_minutes, horizon_days, interviewer_ids)
+                if not claimed:
+                    logger.warning(f"No free interview slot within the next {horizon_days} days.")
+                    return None
+
+                claim_id, slot, interviewer = claimed
+                booking_id = None
+                conflict = False
+                try:
+                    conn, cursor = get_db_connection(self.db_config)
+                    if not conn:
+                        return None
+                    try:
+                        booking_id = self._commit_booking(
+                            conn, cursor, candidate_email, slot, interviewer, before_commit, booking_key
+                        )
+                        conflict = booking_id is None
+                    finally:
+                        cursor.close()
+                        conn.close()
+                finally:
+                    if conflict:
+                        lost_claims.append(claim_id)
+                    else:
+                        self._release(claim_id, booking_id)
+                if booking_id is not None:
+                    return slot
+
+                with self._lock:
+                    self.refresh(force=True)
+        finally:
+            for claim_id in lost_claims:
+                self._release(claim_id)
+
+    def book_many(
+        self,
+        candidate_emails: list[str],
+        duration_minutes: int = DEFAULT_INTERVIEW_MINUTES,
+        horizon_days: int = CALENDAR_HORIZON_DAYS,
+        before_commit: Callable | None = None
+    ) -> dict[str, Booking | None]:
+        """Book candidates in order, earliest slots first, each booking in its own transaction.
+
+        Distinct slots for the whole batch are claimed in one pass over the index and committed over one
+        connection; a candidate whose slot another process took meanwhile falls back to book().
+        before_commit(cursor, candidate_email, interview_time) runs inside each booking transaction.
+        """
+        def hook_for(candidate_email: str):
+            if before_commit:
+                return lambda cursor, interview_time: before_commit(cursor, candidate_email, interview_time)
+            return None
+
+        bookings = dict.fromkeys(candidate_emails)
+        claims = {}
+        with self._lock:
+            for candidate_email in bookings:
+                claimed = self._claim(duration_minutes, horizon_days)
+                if not claimed:
+                    logger.warning(f"No free interview slot within the next {horizon_days} days.")
+                    break
+                claims[candidate_email] = claimed
+
+        conflicted = []
+        try:
+            conn, cursor = get_db_connection(self.db_config)
+            if not conn:
+                return bookings
+            try:
+                for candidate_email, (claim_id, slot, interviewer) in list(claims.items()):
+                    booking_id = None
+                    try:
+                        booking_id = self._commit_booking(
+                            conn, cursor, candidate_email, slot, interviewer, hook_for(candidate_email)
+                        )
+                    finally:
+                        del claims[candidate_email]
+                        self._release(claim_id, booking_id)
+                    if booking_id is None:
+                        conflicted.append(candidate_email)
+                    else:
+                        bookings[candidate_email] = slot
+            finally:
+                cursor.close()
+                conn.close()
+        finally:
+            for claim_id, _, _ in claims.values():
+                self._release(claim_id)
+
+        for candidate_email in conflicted:
+            bookings[candidate_email] = self.book(candidate_email, duration_minutes, horizon_days, hook_for(candidate_email))
+        return bookings
+
+
+def get_calendar(db_config: dict | None = None) -> InterviewCalendar:
+    """Return the process-wide calendar for this DB config, creating it on first use."""
+    db_config = db_config or get_db_config()
+    key = tuple(sorted(db_config.items())) if db_config else None
+    with _calendars_lock:
+        calendar = _calendars.get(key)
+        if calendar is None:
+            calendar = _calendars[key] = InterviewCalendar(db_config)
+        return calendar
+
+
+def invalidate_calendars():
+    """Force every calendar to rebuild on next use, e.g. after interviewers or blackout dates change."""
+    with _calendars_lock:
+        _calendars.clear()
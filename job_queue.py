@@ -0,0 +1,315 @@
+"""Durable screening job queue in MySQL, drained by a worker pool that scales separately from the web app.
+
+The Streamlit app submits jobs and polls them; workers claim jobs with FOR UPDATE SKIP LOCKED, so any
+number of them can run side by side:
+
+    python job_queue.py --processes 4
+
+A worker claims only the jobs submitted for its sender (EMAIL_ADDRESS) and jobs without one, so a job's
+emails go out from the account it was submitted with; run one worker pool per sender.
+
+Jobs are idempotent per (resume hash, role, requirements, candidate email): resubmitting returns the existing
+job and its result, except that a rescore run re-queues a finished job to re-evaluate the candidate. A job's
+interview is booked under a key derived from the job id, so a job reclaimed from a stalled worker cannot book
+a second interview.
+"""
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+
+from candidate_store import text_hash
+from database import db_session
+from metrics import inc, logger, request_scope
+from screening_service import ScreeningJob, ServiceConfig, screen_candidate
+from utils import extract_text_from_pdf_bytes
+
+JOB_POLL_INTERVAL = float(os.getenv("SCREENING_JOB_POLL_INTERVAL", "1"))
+JOB_MAX_ATTEMPTS = int(os.getenv("SCREENING_JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY_SECONDS = 30
+JOB_LOCK_TIMEOUT_MINUTES = 15
+# Threads for the worker inside the web process; set to 0 when a separate worker pool is deployed.
+JOB_INLINE_WORKERS = int(os.getenv("SCREENING_INLINE_WORKERS", "4"))
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_DONE = "done"
+JOB_STATUS_FAILED = "failed"
+
+# Failed jobs are queued again on resubmission, and finished ones when a different rescore run resubmits them.
+JOB_REQUEUE_CONDITION = (
+    "status = 'failed' OR (status = 'done' AND VALUES(rescore_run_id) IS NOT NULL "
+    "AND COALESCE(rescore_run_id, 0) <> VALUES(rescore_run_id))"
+)
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def submit_job(
+    job: ScreeningJob, db_config: dict | None = None, sender_email: str = "", rescore_run_id: int | None = None
+) -> int:
+    """Queue a screening job and return its id, or the id of the existing job for the same resume, role,
+    requirements and candidate email.
+
+    Resubmitting a failed job queues it again; queued, running and finished jobs are left as they are,
+    except that a rescore run re-queues a job another run or a screening finished. The re-queued job
+    takes the run's options and its result is overwritten when it finishes: a finished user screening
+    then neither schedules an interview nor emails a rejection, and get_job no longer returns the
+    original outcome, which stays in the analyses table.
+    sender_email picks the worker that runs it; jobs without one go to any worker on the database.
+    rescore_run_id records the run waiting on the job.
+    """
+    resume_text = job.resume_text or extract_text_from_pdf_bytes(job.resume_bytes)
+    if not resume_text:
+        raise ValueError("No text could be extracted from the resume.")
+
+    options = {
+        "queue_rejection": job.queue_rejection,
+        "schedule_if_selected": job.schedule_if_selected,
+        "priority": job.priority
+    }
+    with db_session(db_config) as (conn, cursor):
+        # Assignments run left to right, so status is reset after the columns that check it.
+        cursor.execute(f"""
+            INSERT INTO screening_jobs (
+                resume_hash, role, role_requirements, requirements_hash, resume_name, candidate_email, sender_email,
+                resume_text, options, rescore_run_id
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                attempts = IF({JOB_REQUEUE_CONDITION}, 0, attempts),
+                next_attempt_at = IF({JOB_REQUEUE_CONDITION}, NOW(), next_attempt_at),
+                options = IF({JOB_REQUEUE_CONDITION}, VALUES(options), options),
+                status = IF({JOB_REQUEUE_CONDITION}, 'queued', status),
+                rescore_run_id = COALESCE(VALUES(rescore_run_id), rescore_run_id),
+                id = LAST_INSERT_ID(id)
+        """, (
+            text_hash(resume_text),
+            job.role,
+            job.role_requirements,
+            text_hash(job.role_requirements),
+            job.resume_name or None,
+            job.candidate_email or "",
+            sender_email or "",
+            resume_text,
+            json.dumps(options),
+            rescore_run_id
+        ))
+        job_id = cursor.lastrowid
+        conn.commit()
+
+    inc("screening_jobs_submitted_total")
+    return job_id
+
+
+def get_job(job_id: int, db_config: dict | None = None) -> dict | None:
+    """Return a job's status, attempts, result (a ScreeningOutcome dict once done) and last error."""
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute(
+            "SELECT id, status, attempts, result, last_error FROM screening_jobs WHERE id = %s",
+            (job_id,)
+        )
+        row = cursor.fetchone()
+
+    if not row:
+        return None
+    return {
+        "id": row[0],
+        "status": row[1],
+        "attempts": row[2],
+        "result": json.loads(row[3]) if row[3] else None,
+        "error": row[4]
+    }
+
+
+def claim_jobs(db_config: dict, limit: int, sender_email: str = "") -> list[dict]:
+    """Lock up to limit due jobs for this sender's worker. Jobs stuck in 'running' by a crashed worker are reclaimed."""
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("""
+            SELECT id, role, role_requirements, resume_name, candidate_email, resume_text, options, attempts
+            FROM screening_jobs
+            WHERE sender_email IN (%s, '')
+              AND ((status = 'queued' AND next_attempt_at <= NOW())
+                OR (status = 'running' AND locked_at < NOW() - INTERVAL %s MINUTE))
+            ORDER BY id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (sender_email or "", JOB_LOCK_TIMEOUT_MINUTES, limit))
+        rows = cursor.fetchall()
+
+        if rows:
+            placeholders = ", ".join(["%s"] * len(rows))
+            cursor.execute(
+                f"UPDATE screening_jobs SET status = 'running', locked_at = NOW(), attempts = attempts + 1 "
+                f"WHERE id IN ({placeholders})",
+                [row[0] for row in rows]
+            )
+        conn.commit()
+
+    return [
+        {
+            "id": row[0],
+            "role": row[1],
+            "role_requirements": row[2],
+            "resume_name": row[3] or "",
+            "candidate_email": row[4] or "",
+            "resume_text": row[5],
+            "options": json.loads(row[6]),
+            "attempts": row[7] + 1
+        }
+        for row in rows
+    ]
+
+
+def complete_job(db_config: dict, job_id: int, outcome: dict):
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("""
+            UPDATE screening_jobs
+            SET status = 'done', result = %s, last_error = %s, locked_at = NULL, finished_at = NOW()
+            WHERE id = %s
+        """, (json.dumps(outcome), outcome.get("error"), job_id))
+        conn.commit()
+
+
+def fail_job(db_config: dict, job_id: int, attempts: int, error: str):
+    """Retry the job later, or mark it failed after JOB_MAX_ATTEMPTS."""
+    status = JOB_STATUS_FAILED if attempts >= JOB_MAX_ATTEMPTS else JOB_STATUS_QUEUED
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("""
+            UPDATE screening_jobs
+            SET status = %s, last_error = %s, locked_at = NULL,
+                next_attempt_at = NOW() + INTERVAL %s SECOND,
+                finished_at = IF(%s = 'failed', NOW(), NULL)
+            WHERE id = %s
+        """, (status, error[:2000], JOB_RETRY_DELAY_SECONDS * attempts, status, job_id))
+        conn.commit()
+
+    if status == JOB_STATUS_FAILED:
+        logger.error(f"❌ Screening job {job_id} failed after {attempts} attempts: {error}")
+
+
+def get_job_stats(db_config: dict) -> dict:
+    """Return the number of screening jobs in each status."""
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("SELECT status, COUNT(*) FROM screening_jobs GROUP BY status")
+        return dict(cursor.fetchall())
+
+
+def run_claimed_job(claimed: dict, config: ServiceConfig) -> dict:
+    """Screen one claimed job; module-level so it can run in a process pool."""
+    job = ScreeningJob(
+        claimed["role"],
+        claimed["role_requirements"],
+        resume_name=claimed["resume_name"],
+        resume_text=claimed["resume_text"],
+        candidate_email=claimed["candidate_email"],
+        booking_key=f"screening-job-{claimed['id']}",
+        **claimed["options"]
+    )
+    return screen_candidate(job, config).to_dict()
+
+
+class ScreeningWorker(threading.Thread):
+    """Keeps up to `workers` claimed jobs running on an executor (threads in the app, processes standalone)."""
+
+    def __init__(self, config: ServiceConfig, executor: Executor, workers: int):
+        super().__init__(name=f"screening-job-worker-{config.email_sender or 'default'}", daemon=True)
+        self.config = config
+        self.executor = executor
+        self.workers = workers
+        self._in_flight = {}
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _finish(self, future, claimed: dict):
+        db_config = self.config.db_config
+        try:
+            outcome = future.result()
+        except Exception as e:
+            outcome = {"feedback": None, "error": str(e)}
+
+        if outcome.get("feedback") is None:
+            logger.warning(f"Screening job {claimed['id']} attempt {claimed['attempts']} failed: {outcome.get('error')}")
+            fail_job(db_config, claimed["id"], claimed["attempts"], outcome.get("error") or "Unknown error")
+            inc("screening_jobs_total", result="failed")
+        else:
+            complete_job(db_config, claimed["id"], outcome)
+            inc("screening_jobs_total", result="done")
+
+    def poll_once(self) -> int:
+        """Fill free worker slots with newly claimed jobs and record any that finished; returns jobs claimed."""
+        with request_scope("jobs.poll"):
+            free_slots = self.workers - len(self._in_flight)
+            batch = claim_jobs(self.config.db_config, free_slots, self.config.email_sender) if free_slots > 0 else []
+            for claimed in batch:
+                self._in_flight[self.executor.submit(run_claimed_job, claimed, self.config)] = claimed
+
+            if self._in_flight:
+                done, _ = wait(self._in_flight, timeout=JOB_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._finish(future, self._in_flight.pop(future))
+            return len(batch)
+
+    def run(self):
+        import mysql.connector
+
+        while not self._stop_event.is_set():
+            try:
+                claimed = self.poll_once()
+            except mysql.connector.Error as e:
+                logger.error(f"❌ Screening worker database error: {e}")
+                claimed = 0
+
+            if not claimed and not self._in_flight:
+                self._stop_event.wait(JOB_POLL_INTERVAL)
+
+
+def start_screening_worker(config: ServiceConfig, workers: int = JOB_INLINE_WORKERS) -> ScreeningWorker | None:
+    """Start the in-app screening worker (a thread pool) for this database and sender, or hand the running
+    one the latest config.
+
+    Sessions configured with different databases or senders get their own workers, so a job's emails are
+    queued for the sender that submitted it, as with the outbox workers.
+    """
+    if workers <= 0:
+        return None
+
+    key = (tuple(sorted(config.db_config.items())) if config.db_config else None, config.email_sender)
+    with _workers_lock:
+        worker = _workers.get(key)
+        if worker and worker.is_alive():
+            worker.config = config
+            return worker
+
+        worker = _workers[key] = ScreeningWorker(config, ThreadPoolExecutor(max_workers=workers), workers)
+        worker.start()
+        return worker
+
+
+if __name__ == "__main__":
+    import argparse
+    from concurrent.futures import ProcessPoolExecutor
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    from database import create_table
+
+    parser = argparse.ArgumentParser(description="Run a pool of screening job workers.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    worker_config = ServiceConfig.from_env()
+    if not worker_config.db_config:
+        raise SystemExit(1)
+
+    create_table(worker_config.db_config)
+    if not worker_config.email_sender:
+        print("⚠ EMAIL_ADDRESS is not set: this worker only claims jobs submitted without a sender")
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        worker = ScreeningWorker(worker_config, pool, args.processes)
+        print(f"✅ Screening worker started with {args.processes} processes")
+        worker.run()
@@ -0,0 +1,98 @@
+import os
+import smtplib
+import ssl
+import threading
+import time
+from email.message import EmailMessage
+
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_USE_SSL = os.getenv("SMTP_USE_SSL", "true").lower() == "true"
+SMTP_IDLE_TIMEOUT = 60
+
+EMAIL_MODE_AGENT = "agent"
+EMAIL_MODE_TEMPLATE = "template"
+EMAIL_MODE = os.getenv("EMAIL_MODE", EMAIL_MODE_AGENT)
+
+_mailers = {}
+_mailers_lock = threading.Lock()
+
+
+class SMTPMailer:
+    """Sends emails over one persistent, logged-in SMTP connection that is reopened when it goes stale."""
+
+    def __init__(
+        self,
+        sender_email: str,
+        sender_passkey: str,
+        sender_name: str,
+        host: str = SMTP_HOST,
+        port: int = SMTP_PORT,
+        use_ssl: bool = SMTP_USE_SSL
+    ):
+        self.sender_email = sender_email
+        self.sender_passkey = sender_passkey
+        self.sender_name = sender_name
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self._smtp = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        smtp = smtp_class(self.host, self.port, timeout=30)
+        # Extensions (STARTTLS, AUTH) are only known after EHLO, and STARTTLS resets them.
+        smtp.ehlo()
+        if not self.use_ssl and smtp.has_extn("starttls"):
+            smtp.starttls(context=ssl.create_default_context())
+            smtp.ehlo()
+        if self.sender_passkey:
+            smtp.login(self.sender_email, self.sender_passkey)
+        return smtp
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp and time.monotonic() - self._last_used < SMTP_IDLE_TIMEOUT:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+        self.close()
+        self._smtp = self._connect()
+        return self._smtp
+
+    def send(self, to_email: str, subject: str, body: str):
+        """Send a plain-text email, reconnecting once if the server dropped the connection."""
+        msg = EmailMessage()
+        msg["Subject"] = subject
+        msg["From"] = f"{self.sender_name} <{self.sender_email}>"
+        msg["To"] = to_email
+        msg.set_content(body)
+
+        with self._lock:
+            try:
+                self._connection().send_message(msg)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self.close()
+                self._connection().send_message(msg)
+            self._last_used = time.monotonic()
+
+    def close(self):
+        if self._smtp:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+
+def get_mailer(sender_email: str, sender_passkey: str, sender_name: str) -> SMTPMailer:
+    """Return the process-wide mailer for this sender, so the SMTP connection is shared across requests."""
+    key = (sender_email, sender_passkey, sender_name, SMTP_HOST, SMTP_PORT, SMTP_USE_SSL)
+    with _mailers_lock:
+        mailer = _mailers.get(key)
+        if mailer is None:
+            mailer = _mailers[key] = SMTPMailer(sender_email, sender_passkey, sender_name)
+        return mailer
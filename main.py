@@ -1,17 +1,34 @@
+import hashlib
 import os
+import time
 import streamlit as st
 
 from dotenv import load_dotenv
-from streamlit_pdf_viewer import pdf_viewer
-from phi.utils.log import logger
-from database import create_table, test_db_connection
-
-from agents import create_resume_analyzer, create_email_agent
-from utils import extract_text_from_pdf
-from recruitment_utils import analyze_resume, send_selection_email, send_rejection_email, schedule_interview
 
+# Module-level settings (SMTP, pool sizes, cache paths) are read from the environment at import time.
 load_dotenv()
 
+from startup import mark_ready, phase, start_probe_server
+
+with phase("imports"):
+    from database import create_table, test_db_connection
+    from analysis_cache import get_cache_stats
+    from metrics import logger, request_scope, span
+    from candidate_store import SORT_COLUMNS, list_roles, page_analyses, save_analysis
+
+    from agents import create_resume_analyzer, invalidate_agents
+    from mailer import EMAIL_MODE, EMAIL_MODE_AGENT, EMAIL_MODE_TEMPLATE
+    from outbox import start_outbox_worker
+    from utils import extract_text_from_pdf
+    from prescreen import ROUTE_REJECT
+    from recruitment_utils import deliver_outbox_email, schedule_interview
+    from screening_service import ScreeningJob, ServiceConfig
+    from job_queue import JOB_STATUS_FAILED, JOB_STATUS_QUEUED, JOB_STATUS_RUNNING, get_job, start_screening_worker, submit_job
+
+SCREENING_POLL_SECONDS = 1
+# A job still queued or running this long after it was submitted is likely stuck or has no worker for its sender.
+SCREENING_JOB_TIMEOUT_SECONDS = int(os.getenv("SCREENING_JOB_TIMEOUT_SECONDS", "600"))
+
 ENV_VARS = {
     "openai_api_key": "OPENAI_API_KEY",
     "email_sender": "EMAIL_ADDRESS",
@@ -31,7 +48,8 @@ def init_session_state():
     default_values = {
         "candidate_email": "",
         "resume_text": "",
-        "analysis_complete": False
+        "analysis_complete": False,
+        "email_mode": EMAIL_MODE
     }
     
     for key, value in default_values.items():
@@ -41,13 +59,269 @@ def init_session_state():
         st.session_state.setdefault(key, os.getenv(env_var, ""))
 
 
+def get_resume_bytes(resume_file) -> bytes:
+    """Read the uploaded resume once per session; preview, download and extraction share this buffer."""
+    cached = st.session_state.get("resume_pdf")
+    if cached and cached["file_id"] == resume_file.file_id:
+        return cached["data"]
+
+    buffer = resume_file.getbuffer()
+    digest = hashlib.sha256(buffer).hexdigest()
+    data = cached["data"] if cached and cached["hash"] == digest else buffer.tobytes()
+    buffer.release()
+
+    st.session_state.resume_pdf = {"file_id": resume_file.file_id, "hash": digest, "data": data}
+    return data
+
+
+def store_screening_result(resume_text: str, role: str, role_requirements: str, selected: bool, feedback: dict, **kwargs):
+    """Persist an analysis for the recruiter dashboard; a storage failure never blocks screening."""
+    try:
+        save_analysis(resume_text, role, role_requirements, selected, feedback, **kwargs)
+    except Exception as e:
+        logger.error(f"Error saving analysis: {e}")
+
+
+def show_screening_job(job_id: int, db_config: dict):
+    """Poll a submitted screening job and show its outcome once a worker has finished it."""
+    job = get_job(job_id, db_config)
+    if job is None:
+        st.session_state.screening_job_id = None
+        st.error("The screening job could not be found. Please analyze the resume again.")
+        return
+
+    if job["status"] in (JOB_STATUS_QUEUED, JOB_STATUS_RUNNING):
+        submitted_at = st.session_state.setdefault("screening_job_submitted_at", time.time())
+        if time.time() - submitted_at > SCREENING_JOB_TIMEOUT_SECONDS:
+            st.session_state.screening_job_id = None
+            logger.warning(f"Screening job {job_id} still {job['status']} after {SCREENING_JOB_TIMEOUT_SECONDS}s")
+            st.error("The analysis is taking longer than expected. Please click Analyze Resume again later to see the result.")
+            return
+        with st.spinner("Analyzing your resume..."):
+            time.sleep(SCREENING_POLL_SECONDS)
+        st.rerun()
+
+    st.session_state.screening_job_id = None
+    outcome = job["result"] or {}
+    st.session_state.resume_selected = outcome.get("selected", False)
+    st.session_state.resume_feedback = outcome.get("feedback")
+
+    if job["status"] == JOB_STATUS_FAILED or outcome.get("feedback") is None:
+        st.error(f"{job['error'] or outcome.get('error')}. No email was sent; please try again.")
+        return
+
+    st.caption(f"Resume prompt trimmed from {outcome['tokens_before']} to {outcome['tokens_after']} tokens.")
+    if outcome["selected"]:
+        st.session_state.analysis_complete = True
+        st.session_state.is_selected = True
+        st.rerun()
+
+    st.warning("Unfortunately, your skills don't match our requirements.")
+    if outcome["rejection_queued"]:
+        st.info("We'll send you an email with detailed feedback shortly!")
+    else:
+        st.error("Could not send feedback email. Please try again!")
+
+
+def render_dashboard():
+    """Page through stored analyses for a role with server-side filters and sorting."""
+    st.subheader("Recruiter Dashboard")
+
+    try:
+        roles = list_roles()
+    except Exception as e:
+        st.error(f"Could not load roles: {e}")
+        return
+
+    if not roles:
+        st.info("No candidates have been analyzed yet.")
+        return
+
+    role = st.selectbox("Role", roles, format_func=lambda r: r["title"])
+    render_requirements_editor(role)
+    col1, col2, col3, col4, col5 = st.columns(5)
+    sort_by = col1.selectbox(
+        "Sort by", list(SORT_COLUMNS), format_func=lambda c: c.replace("_", " ").capitalize()
+    )
+    min_fit_score = col2.number_input("Min overall fit", min_value=0, max_value=100, value=0)
+    experience_level = col3.selectbox("Experience", ["", "intern", "fresher", "junior", "mid", "senior", "leader", "manager"])
+    selected_only = col4.checkbox("Selected only")
+    current_only = col5.checkbox(
+        "Current requirements only",
+        help="Show only candidates analyzed against the role's current requirements, with their latest such analysis."
+    )
+
+    view = (role["id"], sort_by, min_fit_score, experience_level, selected_only, current_only)
+    if st.session_state.get("dashboard_view") != view:
+        st.session_state.dashboard_view = view
+        st.session_state.dashboard_cursors = [None]
+
+    cursors = st.session_state.dashboard_cursors
+    page, next_cursor = page_analyses(
+        role["id"],
+        sort_by=sort_by,
+        after=cursors[-1],
+        selected_only=selected_only,
+        min_fit_score=min_fit_score,
+        experience_level=experience_level or None,
+        requirements=role["requirements"] if current_only else None
+    )
+    st.dataframe(page, use_container_width=True)
+
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    page_col.caption(f"Page {len(cursors)}")
+    if prev_col.button("⬅ Previous", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if next_col.button("Next ➡", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+
+    render_candidate_search()
+
+
+def render_requirements_editor(role: dict):
+    """Save edited requirements as a new version and re-evaluate the role's candidates incrementally."""
+    with st.expander("Edit requirements and re-evaluate candidates"):
+        requirements = st.text_area("Role requirements", role["requirements"], key=f"requirements_{role['id']}")
+        st.caption(
+            "Candidates are re-scored locally from their stored skills; only those whose decision could "
+            "change are sent back to the model. Saving the same requirements again resumes an interrupted run."
+        )
+
+        from rescoring import RUN_STATUS_ANALYZING, latest_rescore_run, run_rescore, start_rescore
+
+        latest = latest_rescore_run(role["id"])
+        if latest and latest["status"] == RUN_STATUS_ANALYZING:
+            st.info(
+                f"Version {latest['version']}: {latest['llm_pending']} of {latest['sent_to_llm']} candidates "
+                f"sent for analysis are still being analyzed."
+            )
+        if not st.button("Save and re-evaluate", disabled=not requirements.strip()):
+            return
+
+        progress = st.progress(0.0, text="Re-evaluating candidates...")
+
+        def show_progress(run: dict):
+            done = run["processed"] / run["total"] if run["total"] else 1.0
+            progress.progress(
+                min(done, 1.0),
+                text=f"{run['processed']}/{run['total']} candidates: {run['rescored']} re-scored locally, "
+                     f"{run['sent_to_llm']} sent for analysis"
+            )
+
+        try:
+            run = run_rescore(start_rescore(role["title"], requirements.strip()), on_progress=show_progress)
+        except Exception as e:
+            logger.error(f"Error re-evaluating candidates: {e}")
+            st.error("Re-evaluation stopped. Save again to resume where it left off.")
+            return
+        st.success(
+            f"Version {run['version']} saved: {run['rescored']} candidates re-scored locally, "
+            f"{run['sent_to_llm']} queued for analysis ({run['llm_pending']} still pending, "
+            f"{run['llm_failed']} failed), {run['skipped']} already up to date."
+        )
+
+
+def render_candidate_search():
+    """Find past candidates close to a new role's requirements and send only the top few to the analyzer."""
+    with st.expander("Find past candidates for a new role"):
+        role = st.text_input("Role", "", key="search_role")
+        role_requirements = st.text_area("Role requirements", "", key="search_role_requirements")
+        col1, col2, col3 = st.columns([2, 1, 1])
+        top_n = col1.slider("Candidates", min_value=5, max_value=100, value=20, step=5)
+        find = col2.button("Find matches")
+        analyze = col3.button("Analyze top matches")
+
+        if not (find or analyze):
+            return
+        if not role_requirements.strip():
+            st.warning("Please enter the role requirements.")
+            return
+
+        # numpy and the index files are only needed once a recruiter searches.
+        from candidate_index import best_candidates_for_role, shortlist_jobs
+
+        if find:
+            matches = best_candidates_for_role(role_requirements, top_n)
+            st.dataframe(
+                [{"Email": m.email, "Resume": m.resume_name, "Similarity": m.similarity} for m in matches],
+                use_container_width=True
+            )
+            return
+
+        if not role:
+            st.warning("Please enter a role to analyze candidates for.")
+            return
+        job_ids = [submit_job(job) for job in shortlist_jobs(role, role_requirements, top_n)]
+        st.success(f"Queued {len(job_ids)} candidates for analysis; results appear under '{role}' as they finish.")
+
+
+def render_batch_screening():
+    """Screen many resumes for one role and stream them into a ranked table."""
+    st.subheader("Batch Resume Screening")
+
+    role = st.text_input("Enter Role", "", key="batch_role")
+    role_requirements = st.text_area("Enter role requirements", "", key="batch_role_requirements")
+
+    uploaded_files = st.file_uploader(
+        "Upload resumes (PDF)", type=["pdf"], accept_multiple_files=True, key="batch_uploader"
+    )
+    folder = st.text_input("...or a folder of PDFs on the server", "", key="batch_folder")
+    max_concurrency = st.slider("Concurrent analyses", min_value=1, max_value=32, value=8)
+
+    if not st.button("Screen Resumes"):
+        return
+
+    # Batch screening pulls in the thread-pool pipeline; most sessions never open this mode.
+    from batch_screening import load_resume_folder, rank_results, screen_resumes
+
+    resumes = [(f.name, f.getvalue()) for f in uploaded_files or []]
+    if folder:
+        if not os.path.isdir(folder):
+            st.error(f"Folder not found: {folder}")
+            return
+        resumes.extend(load_resume_folder(folder))
+
+    if not role or not resumes:
+        st.warning("Please enter a role and provide at least one resume.")
+        return
+
+    api_key = st.session_state.openai_api_key
+    progress = st.progress(0.0, text=f"Screening 0/{len(resumes)} resumes...")
+    table = st.empty()
+    results = []
+
+    for result in screen_resumes(
+        resumes,
+        role,
+        role_requirements,
+        analyzer_factory=lambda: create_resume_analyzer(api_key),
+        max_concurrency=max_concurrency
+    ):
+        results.append(result)
+        if isinstance(result.feedback, dict):
+            store_screening_result(
+                result.resume_text, role, role_requirements, result.selected, result.feedback,
+                resume_name=result.file_name,
+                source="prescreen" if result.route == ROUTE_REJECT else "llm"
+            )
+        progress.progress(len(results) / len(resumes), text=f"Screening {len(results)}/{len(resumes)} resumes...")
+        table.dataframe([r.as_row() for r in rank_results(results)], use_container_width=True)
+
+    st.success(f"Screened {len(results)} resumes, {sum(r.selected for r in results)} selected.")
+
+
 def main():
-    create_table()
+    start_probe_server()
+    with phase("schema"):
+        create_table()
     st.title("AI Recruitment System")
     init_session_state()
 
     with st.sidebar:
         st.header("Configuration")
+        mode = st.radio("Mode", ["Single candidate", "Batch screening", "Recruiter dashboard"], horizontal=True)
 
         st.subheader("OpenAI Settings")
         api_key = st.text_input("OpenAI API Key", type="password", value=st.session_state.openai_api_key)
@@ -64,6 +338,20 @@ def main():
         if st.button("Test DB Connection"):
             test_db_connection()
 
+        cache_stats = get_cache_stats()
+        st.caption(
+            f"Analysis cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%}), {cache_stats['entries']} stored"
+        )
+        # Imported on first render rather than at module load: resume_schema pulls in pydantic.
+        from resume_schema import get_parse_stats
+
+        parse_stats = get_parse_stats()
+        st.caption(
+            f"Analyzer output: {parse_stats['responses']} responses, "
+            f"{parse_stats['repair_rate']:.0%} repaired, {parse_stats['failure_rate']:.0%} failed"
+        )
+
         st.subheader("Zoom Settings")
         zoom_link = st.text_input("Zoom Meeting Link", value=st.session_state.zoom_link)
         zoom_passcode = st.text_input("Zoom Passcode", type="password", value=st.session_state.zoom_passcode)
@@ -72,6 +360,14 @@ def main():
         email_sender = st.text_input("Sender Email", value=st.session_state.email_sender)
         email_passkey = st.text_input("Email App Password", type="password", value=st.session_state.email_passkey)
         company_name = st.text_input("Company Name", value=st.session_state.company_name)
+        email_modes = [EMAIL_MODE_AGENT, EMAIL_MODE_TEMPLATE]
+        st.session_state.email_mode = st.radio(
+            "Email Mode",
+            email_modes,
+            index=email_modes.index(st.session_state.email_mode),
+            format_func=lambda mode: "AI-written (agent)" if mode == EMAIL_MODE_AGENT else "Templates (direct SMTP)",
+            help="Templates send selection and interview emails without a model call; only rejection feedback is AI-written."
+        )
 
         if zoom_link:
             st.session_state.zoom_link = zoom_link
@@ -108,6 +404,17 @@ def main():
             "Database Name": st.session_state.get("db_name"),
         }
 
+    agent_config = (
+        st.session_state.openai_api_key,
+        st.session_state.email_sender,
+        st.session_state.email_passkey,
+        st.session_state.company_name
+    )
+    previous_agent_config = st.session_state.get("agent_config")
+    if previous_agent_config and previous_agent_config != agent_config:
+        invalidate_agents(previous_agent_config[0])
+    st.session_state.agent_config = agent_config
+
     missing_configs = [k for k, v in required_configs.items() if not v]
     if missing_configs:
         st.warning(f"Please configure the following in the sidebar: {', '.join(missing_configs)}")
@@ -117,6 +424,20 @@ def main():
         st.warning("Please enter your OpenAI API key in the sidebar to continue.")
         return
 
+    service_config = ServiceConfig.from_settings(st.session_state)
+    with phase("workers"):
+        start_outbox_worker(service_config.db_config, service_config.outbox_settings(), deliver_outbox_email)
+        start_screening_worker(service_config)
+    mark_ready()
+
+    if mode == "Batch screening":
+        render_batch_screening()
+        return
+
+    if mode == "Recruiter dashboard":
+        render_dashboard()
+        return
+
     role = st.text_input("Enter Role", "")
     role_requirements = st.text_area("Enter role requirements", "")
 
@@ -126,27 +447,25 @@ def main():
         st.session_state.resume_text = ""
         st.session_state.analysis_complete = False
         st.session_state.is_selected = False
+        st.session_state.screening_job_id = None
         st.rerun()
 
     if resume_file:
         st.subheader("Uploaded Resume")
         col1, col2 = st.columns([4, 1])
         
+        resume_bytes = get_resume_bytes(resume_file)
+
         with col1:
-            import tempfile, os
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                tmp_file.write(resume_file.read())
-                tmp_file_path = tmp_file.name
-            resume_file.seek(0)
-            try: pdf_viewer(tmp_file_path)
-            finally: os.unlink(tmp_file_path)
+            from streamlit_pdf_viewer import pdf_viewer
+            pdf_viewer(resume_bytes)
         
         with col2:
-            st.download_button(label="📥 Download", data=resume_file, file_name=resume_file.name, mime="application/pdf")
+            st.download_button(label="📥 Download", data=resume_bytes, file_name=resume_file.name, mime="application/pdf")
 
         if not st.session_state.resume_text:
             with st.spinner("Processing your resume..."):
-                resume_text = extract_text_from_pdf(resume_file)
+                resume_text = extract_text_from_pdf(resume_bytes)
                 if resume_text:
                     st.session_state.resume_text = resume_text
                     st.success("Resume processed successfully!")
@@ -161,43 +480,31 @@ def main():
     st.session_state.candidate_email = email
 
     if st.session_state.resume_text and email and not st.session_state.analysis_complete:
-        if st.button("Analyze Resume"):
-            with st.spinner("Analyzing your resume..."):
-                resume_analyzer = create_resume_analyzer()
-                email_agent = create_email_agent()
-                
-                if resume_analyzer and email_agent:
-                    is_selected, feedback = analyze_resume(
-                        st.session_state.resume_text,
+        if not st.session_state.get("screening_job_id") and st.button("Analyze Resume"):
+            try:
+                st.session_state.screening_job_submitted_at = time.time()
+                st.session_state.screening_job_id = submit_job(
+                    ScreeningJob(
                         role,
                         role_requirements,
-                        resume_analyzer
-                    )
-
-                    if is_selected:
-                        st.success("Congratulations! Your skills match our requirements!")
-                        st.session_state.analysis_complete = True
-                        st.session_state.is_selected = True
-                        st.rerun()
-                    else:
-                        st.warning("Unfortunately, your skills don't match our requirements.")
-
-                        with st.spinner("Sending feedback email..."):
-                            try:
-                                send_rejection_email(
-                                    email_agent=email_agent,
-                                    to_email=email,
-                                    role=role,
-                                    feedback=feedback
-                                )
-                                st.info("We've sent you an email with detailed feedback!")
-                            except Exception as e:
-                                logger.error(f"Error sending rejection email: {e}")
-                                st.error("Could not send feedback email. Please try again!")
+                        resume_name=resume_file.name if resume_file else "",
+                        resume_text=st.session_state.resume_text,
+                        candidate_email=email,
+                        schedule_if_selected=False
+                    ),
+                    service_config.db_config,
+                    service_config.email_sender
+                )
+            except Exception as e:
+                logger.error(f"Error submitting screening job: {e}")
+                st.error("Could not submit the resume for analysis. Please try again.")
+
+        if st.session_state.get("screening_job_id"):
+            show_screening_job(st.session_state.screening_job_id, service_config.db_config)
 
     st.subheader("Resume Analysis Result")
 
-    if st.session_state.get("resume_feedback"):
+    if isinstance(st.session_state.get("resume_feedback"), dict):
         if st.session_state.get("resume_selected"):
             st.success("✅ **Selected**")
         else:
@@ -216,7 +523,7 @@ def main():
         - **Overall Fit (Score: {st.session_state.resume_feedback['overall_fit_score']}):**  
         {st.session_state.resume_feedback['overall_fit']}  
 
-        🏆 **Experience Level:** {st.session_state.resume_feedback['experience_level'].capitalize()}  
+        🏆 **Experience Level:** {(st.session_state.resume_feedback.get('experience_level') or 'not assessed').capitalize()}  
         """)
 
         st.markdown(f"**Feedback:** {st.session_state.resume_feedback.get('overall_fit', 'No detailed feedback available.')}")
@@ -226,32 +533,17 @@ def main():
         st.info("Click 'Proceed with Application' to continue with the interview process.")
         
         if st.button("Proceed with Application", key="proceed_button"):
-            with st.spinner("🔄 Processing your application..."):
+            with st.spinner("🔄 Processing your application..."), span("interview.schedule") as attributes:
                 try:
-                    email_agent = create_email_agent()
-
-                    with st.status("📧 Sending confirmation email...", expanded=True) as status:
-                        send_selection_email(
-                            email_agent,
-                            st.session_state.candidate_email,
-                            role
-                        )
-                        status.update(label="✅ Confirmation email sent!")
-
                     with st.status("📅 Scheduling interview...", expanded=True) as status:
-                        schedule_interview(
-                            email_agent,
-                            role
-                        )
-                        status.update(label="✅ Interview scheduled!")
+                        schedule_interview(role)
+                        status.update(label="✅ Interview scheduled! Confirmation emails are on their way.")
 
                     st.success("🎉 Application Successfully Processed!")
 
                 except Exception as e:
-                    print(f"DEBUG: Error occurred: {str(e)}")
-                    print(f"DEBUG: Error type: {type(e)}")
-                    import traceback
-                    print(f"DEBUG: Full traceback: {traceback.format_exc()}")
+                    attributes["error"] = type(e).__name__
+                    logger.exception(f"Error processing the application: {e}")
                     st.error(f"An error occurred: {str(e)}")
                     st.error("Please try again or contact support.")
 
@@ -261,8 +553,10 @@ def main():
             "resume_text": "",
             "analysis_complete": False,
             "is_selected": False,
+            "screening_job_id": None,
             "resume_feedback": None,
             "current_pdf": None,
+            "resume_pdf": None,
             "role": "",
             "role_requirements": ""
         }
@@ -277,4 +571,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with request_scope("streamlit.rerun"):
+        main()
\ No newline at end of file
@@ -0,0 +1,229 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+METRICS_JSON_LOGS = os.getenv("METRICS_JSON_LOGS", "true").lower() == "true"
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_FILE_INTERVAL = 5.0
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# USD per 1M tokens (input, output).
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60)
+}
+
+
+class _DeferredLogger:
+    """phi's logger, imported on first use: phi.utils.log pulls in rich, which dominates import time."""
+
+    def __getattr__(self, name):
+        from phi.utils.log import logger as phi_logger
+
+        return getattr(phi_logger, name)
+
+
+logger = _DeferredLogger()
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_histograms = {}
+_last_file_write = 0.0
+_request: ContextVar[dict | None] = ContextVar("metrics_request", default=None)
+
+
+def _labels_key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name: str, amount: float = 1, **labels):
+    """Increment a counter."""
+    key = _labels_key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def set_gauge(name: str, value: float, **labels):
+    """Set a gauge to its current value."""
+    key = _labels_key(name, labels)
+    with _lock:
+        _gauges[key] = value
+
+
+def observe(name: str, value: float, **labels):
+    """Record one observation in a histogram with LATENCY_BUCKETS."""
+    key = _labels_key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"count": 0, "sum": 0.0, "buckets": [0] * len(LATENCY_BUCKETS)}
+        histogram["count"] += 1
+        histogram["sum"] += value
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                histogram["buckets"][i] += 1
+
+
+def _log_event(event: dict):
+    if METRICS_JSON_LOGS:
+        logger.info(json.dumps(event, default=str))
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as a named stage; yields a dict the block can add attributes to (e.g. token counts)."""
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield attributes
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        observe("stage_duration_seconds", duration, stage=name, status=status)
+        request = _request.get()
+        if request is not None:
+            request["spans"] += 1
+            request["stage_seconds"][name] = request["stage_seconds"].get(name, 0.0) + duration
+        _log_event({"type": "span", "span": name, "status": status, "duration_ms": round(duration * 1000, 3), **attributes})
+
+
+def traced(name: str):
+    """Decorator form of span()."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_db_query():
+    """Count one SQL statement, globally and for the current request."""
+    inc("db_queries_total")
+    request = _request.get()
+    if request is not None:
+        request["db_queries"] += 1
+
+
+def usage_from_response(response) -> tuple[int, int]:
+    """Return (input_tokens, output_tokens) from an agent run response, summing per-message metrics."""
+    metrics = getattr(response, "metrics", None) or {}
+
+    def total(key: str) -> int:
+        value = metrics.get(key, 0)
+        return int(sum(value) if isinstance(value, (list, tuple)) else value or 0)
+
+    return total("input_tokens"), total("output_tokens")
+
+
+def record_llm_usage(model_id: str, input_tokens: int, output_tokens: int, attributes: dict | None = None) -> float:
+    """Count tokens and estimated cost for one model call; returns the cost in USD."""
+    input_price, output_price = MODEL_PRICES.get(model_id, (0.0, 0.0))
+    cost = (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    inc("llm_tokens_total", input_tokens, model=model_id, direction="input")
+    inc("llm_tokens_total", output_tokens, model=model_id, direction="output")
+    inc("llm_cost_usd_total", cost, model=model_id)
+
+    request = _request.get()
+    if request is not None:
+        request["llm_cost_usd"] += cost
+    if attributes is not None:
+        attributes.update(model=model_id, input_tokens=input_tokens, output_tokens=output_tokens, cost_usd=round(cost, 6))
+    return cost
+
+
+@contextmanager
+def request_scope(name: str):
+    """Collect per-request totals (DB queries, spans, seconds per stage, LLM cost) and log them when the request ends."""
+    request = {"db_queries": 0, "spans": 0, "stage_seconds": {}, "llm_cost_usd": 0.0}
+    token = _request.set(request)
+    started = time.perf_counter()
+    try:
+        yield request
+    finally:
+        _request.reset(token)
+        duration = time.perf_counter() - started
+        observe("request_duration_seconds", duration, request=name)
+        observe("request_db_queries", request["db_queries"], request=name)
+        _log_event({"type": "request", "request": name, "duration_ms": round(duration * 1000, 3), **request})
+        maybe_write_prometheus_file()
+
+
+def render_prometheus() -> str:
+    """Render all counters, gauges and histograms in the Prometheus text exposition format."""
+    def format_labels(labels: tuple, extra: dict | None = None) -> str:
+        items = list(labels) + list((extra or {}).items())
+        if not items:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+    lines = []
+    with _lock:
+        for (name, labels), value in sorted(_counters.items()):
+            lines.append(f"{name}{format_labels(labels)} {value}")
+
+        for (name, labels), value in sorted(_gauges.items()):
+            lines.append(f"{name}{format_labels(labels)} {value}")
+
+        for (name, labels), histogram in sorted(_histograms.items()):
+            for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                lines.append(f"{name}_bucket{format_labels(labels, {'le': bound})} {count}")
+            lines.append(f"{name}_bucket{format_labels(labels, {'le': '+Inf'})} {histogram['count']}")
+            lines.append(f"{name}_sum{format_labels(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{format_labels(labels)} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def maybe_write_prometheus_file(force: bool = False):
+    """Write metrics to METRICS_FILE (for a node-exporter textfile collector) at most every few seconds."""
+    global _last_file_write
+
+    if not METRICS_FILE:
+        return
+    now = time.monotonic()
+    if not force and now - _last_file_write < METRICS_FILE_INTERVAL:
+        return
+    _last_file_write = now
+
+    temp_path = f"{METRICS_FILE}.tmp"
+    with open(temp_path, "w") as metrics_file:
+        metrics_file.write(render_prometheus())
+    os.replace(temp_path, METRICS_FILE)
+
+
+class InstrumentedCursor:
+    """Cursor proxy that counts and times every statement."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        record_db_query()
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            observe("db_query_duration_seconds", time.perf_counter() - started)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+if __name__ == "__main__":
+    # Rough overhead check: cost of one span with JSON logging disabled.
+    METRICS_JSON_LOGS = False
+    iterations = 100_000
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with span("overhead_check"):
+            pass
+    print(f"span overhead: {(time.perf_counter() - started) / iterations * 1e6:.2f} µs")
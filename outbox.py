@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+from typing import Callable
+
+from database import db_session
+from metrics import inc, logger, request_scope
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_BASE_SECONDS = 30
+OUTBOX_BACKOFF_MAX_SECONDS = 3600
+OUTBOX_LOCK_TIMEOUT_MINUTES = 10
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def enqueue_email(cursor, email_type: str, to_email: str, payload: dict, sender_email: str = ""):
+    """Add an email to the outbox using the caller's cursor, so it commits with the caller's transaction.
+
+    sender_email picks the worker that sends it; rows without one go to any worker on the database.
+    """
+    cursor.execute(
+        "INSERT INTO email_outbox (email_type, to_email, payload, sender_email) VALUES (%s, %s, %s, %s)",
+        (email_type, to_email, json.dumps(payload), sender_email or "")
+    )
+
+
+def claim_batch(db_config: dict, sender_email: str = "", batch_size: int = OUTBOX_BATCH_SIZE) -> list[dict]:
+    """Lock due emails for this sender's worker. Rows stuck in 'sending' by a crashed worker are reclaimed.
+
+    Every claim counts as an attempt, so an email that keeps killing its worker is dead-lettered after
+    OUTBOX_MAX_ATTEMPTS instead of being reclaimed forever.
+    """
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("""
+            SELECT id, email_type, to_email, payload, attempts FROM email_outbox
+            WHERE sender_email IN (%s, '')
+              AND ((status = 'pending' AND next_attempt_at <= NOW())
+                OR (status = 'sending' AND locked_at < NOW() - INTERVAL %s MINUTE))
+            ORDER BY id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (sender_email or "", OUTBOX_LOCK_TIMEOUT_MINUTES, batch_size))
+        rows = cursor.fetchall()
+
+        exhausted = [row for row in rows if row[4] >= OUTBOX_MAX_ATTEMPTS]
+        rows = [row for row in rows if row[4] < OUTBOX_MAX_ATTEMPTS]
+        if exhausted:
+            placeholders = ", ".join(["%s"] * len(exhausted))
+            cursor.execute(
+                f"UPDATE email_outbox SET status = 'dead', locked_at = NULL, "
+                f"last_error = 'Worker stopped while sending; no attempts left' WHERE id IN ({placeholders})",
+                [row[0] for row in exhausted]
+            )
+            for row in exhausted:
+                logger.error(f"❌ Email {row[0]} dead-lettered after {row[4]} attempts: worker stopped while sending")
+        if rows:
+            placeholders = ", ".join(["%s"] * len(rows))
+            cursor.execute(
+                f"UPDATE email_outbox SET status = 'sending', locked_at = NOW(), attempts = attempts + 1 "
+                f"WHERE id IN ({placeholders})",
+                [row[0] for row in rows]
+            )
+        conn.commit()
+
+    return [
+        {"id": row[0], "email_type": row[1], "to_email": row[2], "payload": json.loads(row[3]), "attempts": row[4] + 1}
+        for row in rows
+    ]
+
+
+def mark_sent(db_config: dict, email_id: int):
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute(
+            "UPDATE email_outbox SET status = 'sent', sent_at = NOW(), locked_at = NULL, last_error = NULL WHERE id = %s",
+            (email_id,)
+        )
+        conn.commit()
+
+
+def mark_failed(db_config: dict, email_id: int, attempts: int, error: str):
+    """Schedule a retry with exponential backoff, or dead-letter the email after OUTBOX_MAX_ATTEMPTS."""
+    status = "dead" if attempts >= OUTBOX_MAX_ATTEMPTS else "pending"
+    delay = min(OUTBOX_BACKOFF_MAX_SECONDS, OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("""
+            UPDATE email_outbox
+            SET status = %s, attempts = %s, last_error = %s, locked_at = NULL,
+                next_attempt_at = NOW() + INTERVAL %s SECOND
+            WHERE id = %s
+        """, (status, attempts, error[:2000], delay, email_id))
+        conn.commit()
+
+    if status == "dead":
+        logger.error(f"❌ Email {email_id} dead-lettered after {attempts} attempts: {error}")
+
+
+def get_outbox_stats(db_config: dict) -> dict:
+    """Return the number of outbox emails in each status."""
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status")
+        return dict(cursor.fetchall())
+
+
+class OutboxWorker(threading.Thread):
+    """Background thread that drains one sender's outbox emails in batches until stopped."""
+
+    def __init__(self, db_config: dict, settings: dict, deliver: Callable[[str, str, dict, dict], None]):
+        super().__init__(name=f"email-outbox-worker-{settings.get('email_sender') or 'default'}", daemon=True)
+        self.db_config = db_config
+        self.settings = settings
+        self.deliver = deliver
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def drain_once(self) -> int:
+        """Claim and send one batch; returns how many emails were claimed."""
+        with request_scope("outbox.batch"):
+            batch = claim_batch(self.db_config, self.settings.get("email_sender", ""))
+            for email in batch:
+                try:
+                    self.deliver(email["email_type"], email["to_email"], email["payload"], self.settings)
+                    mark_sent(self.db_config, email["id"])
+                    inc("outbox_emails_total", result="sent")
+                except Exception as e:
+                    logger.warning(f"Email {email['id']} ({email['email_type']}) failed: {e}")
+                    mark_failed(self.db_config, email["id"], email["attempts"], str(e))
+                    inc("outbox_emails_total", result="failed")
+            return len(batch)
+
+    def run(self):
+        import mysql.connector
+
+        while not self._stop_event.is_set():
+            try:
+                claimed = self.drain_once()
+            except mysql.connector.Error as e:
+                logger.error(f"❌ Outbox worker database error: {e}")
+                claimed = 0
+
+            if not claimed:
+                self._stop_event.wait(OUTBOX_POLL_INTERVAL)
+
+
+def start_outbox_worker(db_config: dict, settings: dict, deliver: Callable[[str, str, dict, dict], None]) -> OutboxWorker:
+    """Start the process-wide outbox worker for this database and sender, or refresh the running one's settings.
+
+    Sessions configured with different databases or senders get their own workers, so an email is
+    always sent from the account that queued it.
+    """
+    key = (tuple(sorted(db_config.items())) if db_config else None, settings.get("email_sender", ""))
+    with _workers_lock:
+        worker = _workers.get(key)
+        if worker and worker.is_alive():
+            worker.settings = settings
+            return worker
+
+        worker = _workers[key] = OutboxWorker(db_config, settings, deliver)
+        worker.start()
+        return worker
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    from database import create_table, db_config_from_env
+    from mailer import EMAIL_MODE
+    from recruitment_utils import deliver_outbox_email
+
+    worker_db_config = db_config_from_env()
+    if not worker_db_config:
+        raise SystemExit(1)
+
+    create_table(worker_db_config)
+    worker = OutboxWorker(
+        worker_db_config,
+        {
+            "openai_api_key": os.getenv("OPENAI_API_KEY", ""),
+            "email_sender": os.getenv("EMAIL_ADDRESS", ""),
+            "email_passkey": os.getenv("EMAIL_APP_PASSWORD", ""),
+            "company_name": os.getenv("COMPANY_NAME", ""),
+            "email_mode": EMAIL_MODE
+        },
+        deliver_outbox_email
+    )
+    print("✅ Outbox worker started")
+    worker.run()
@@ -0,0 +1,235 @@
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from resume_preprocessing import STOPWORDS, WORD_PATTERN
+
+PRESCREEN_ENABLED = os.getenv("PRESCREEN_ENABLED", "true").lower() == "true"
+PRESCREEN_REJECT_BELOW = float(os.getenv("PRESCREEN_REJECT_BELOW", "0.1"))
+PRESCREEN_PRIORITY_ABOVE = float(os.getenv("PRESCREEN_PRIORITY_ABOVE", "0.6"))
+PRESCREEN_MIN_CORPUS_FOR_IDF = 10
+BM25_K1 = 1.2
+BM25_B = 0.75
+SKILL_PHRASE_MAX_WORDS = 3
+
+# Requirement phrasing around the skills themselves: levels, verbs, and generic nouns.
+FILLER_WORDS = STOPWORDS | {
+    "must", "should", "can", "able", "be", "been", "being", "it", "its", "we", "your", "their", "who", "which",
+    "into", "across", "within", "using", "use", "used", "via", "etc", "other", "related", "relevant", "similar",
+    "including", "include", "such", "like", "plus", "bonus", "preferred", "required", "requirement", "requirements",
+    "proficient", "proficiency", "familiar", "familiarity", "expertise", "expert", "understanding", "hands",
+    "solid", "excellent", "deep", "proven", "demonstrated", "professional", "practical", "working", "least",
+    "minimum", "more", "building", "build", "develop", "developing", "development", "design", "designing",
+    "implement", "implementing", "maintain", "maintaining", "writing", "write", "ensure", "collaborate",
+    "platform", "platforms", "tool", "tools", "technology", "technologies", "framework", "frameworks",
+    "system", "systems", "solution", "solutions", "environment", "environments", "concept", "concepts",
+    "principle", "principles", "practice", "practices", "application", "applications", "plus", "degree",
+    "candidate", "candidates", "role", "team", "teams", "month", "months", "e.g", "i.e"
+}
+# Clauses naming nice-to-have skills; they are left out of the pre-screening query.
+OPTIONAL_CLAUSE_PATTERN = re.compile(r"\b(a plus|is a plus|nice to have|bonus|preferred|desirable|advantage)\b", re.IGNORECASE)
+CLAUSE_SPLIT_PATTERN = re.compile(r"[,;:/\n•·▪*()|]|(?<!\w)[-–]\s|\.(?:\s|$)|\b(?:and|or)\b", re.IGNORECASE)
+
+ROUTE_REJECT = "reject"
+ROUTE_REVIEW = "review"
+ROUTE_PRIORITY = "priority"
+
+
+@dataclass
+class PrescreenResult:
+    score: float
+    route: str
+    matched_skills: list[str] = field(default_factory=list)
+    missing_skills: list[str] = field(default_factory=list)
+
+
+def tokenize(text: str) -> list[str]:
+    """Skill-like words of a text in order, with repeats, e.g. ['python', 'django', 'python']."""
+    return [word.rstrip(".") for word in WORD_PATTERN.findall(text.lower()) if word.rstrip(".") not in STOPWORDS]
+
+
+@lru_cache(maxsize=65536)
+def _normalize(word: str) -> str:
+    """Fold simple plurals, so 'APIs' matches 'API' and 'microservices' matches 'microservice'."""
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def _is_term(word: str) -> bool:
+    return word not in FILLER_WORDS and not word.replace("+", "").replace(".", "").isdigit()
+
+
+def _terms(text: str) -> list[str]:
+    """Normalized words of a text in order, with requirement filler and bare numbers (e.g. '5+') removed."""
+    words = (word.rstrip(".") for word in WORD_PATTERN.findall(text.lower()))
+    return [_normalize(word) for word in words if _is_term(word)]
+
+
+def skill_phrases(role_requirements: str) -> list[str]:
+    """The skills a requirements text asks for, e.g. ['java', 'microservices', 'aws', 'rest apis'].
+
+    The text is split into clauses on commas, bullets, sentence ends, 'and' and 'or'; nice-to-have
+    clauses are dropped, and the runs of words left between filler words in each clause are the
+    skills. Runs longer than SKILL_PHRASE_MAX_WORDS are taken word by word.
+    """
+    phrases = []
+    for clause in CLAUSE_SPLIT_PATTERN.split(role_requirements):
+        if not clause or OPTIONAL_CLAUSE_PATTERN.search(clause):
+            continue
+        run = []
+        for word in [word.rstrip(".") for word in WORD_PATTERN.findall(clause.lower())] + [""]:
+            if word and _is_term(word):
+                run.append(word)
+                continue
+            if len(run) > SKILL_PHRASE_MAX_WORDS:
+                phrases.extend(run)
+            elif run:
+                phrases.append(" ".join(run))
+            run = []
+    return list(dict.fromkeys(phrases))
+
+
+def _phrase_key(phrase: str) -> str:
+    return " ".join(_normalize(word) for word in phrase.split())
+
+
+def _phrase_counts(terms: list[str], phrases: set[str]) -> Counter:
+    """Occurrences of each phrase (space-joined normalized terms) in a term sequence."""
+    first_words = {phrase.split(" ", 1)[0] for phrase in phrases}
+    lengths = sorted({phrase.count(" ") + 1 for phrase in phrases})
+    counts = Counter()
+    for i, term in enumerate(terms):
+        if term in first_words:
+            for n in lengths:
+                candidate = term if n == 1 else " ".join(terms[i:i + n])
+                if candidate in phrases:
+                    counts[candidate] += 1
+    return counts
+
+
+def _route(score: float, reject_below: float, priority_above: float) -> str:
+    if score < reject_below:
+        return ROUTE_REJECT
+    if score >= priority_above:
+        return ROUTE_PRIORITY
+    return ROUTE_REVIEW
+
+
+def prescreen_resumes(
+    resume_texts: list[str],
+    role_requirements: str,
+    reject_below: float = PRESCREEN_REJECT_BELOW,
+    priority_above: float = PRESCREEN_PRIORITY_ABOVE
+) -> list[PrescreenResult]:
+    """Score every resume against the requirements with normalized BM25 and route it.
+
+    The required skill phrases (see skill_phrases) are the query. Each phrase's BM25 term-frequency weight, capped at 1
+    (one mention in an average-length resume), is weighted by its IDF over this corpus (uniformly for tiny corpora), so the
+    score is the IDF-weighted share of the requirements a resume covers, in [0, 1].
+    """
+    import numpy as np
+
+    query_terms = sorted({_phrase_key(phrase): phrase for phrase in skill_phrases(role_requirements)}.items())
+    if not query_terms:
+        return [PrescreenResult(1.0, ROUTE_REVIEW) for _ in resume_texts]
+
+    term_index = {key: i for i, (key, _) in enumerate(query_terms)}
+    documents = [_terms(text) for text in resume_texts]
+
+    tf = np.zeros((len(documents), len(query_terms)))
+    for row, tokens in enumerate(documents):
+        for term, count in _phrase_counts(tokens, set(term_index)).items():
+            tf[row, term_index[term]] = count
+
+    doc_lengths = np.array([len(tokens) for tokens in documents], dtype=float)
+    avg_length = doc_lengths.mean() if doc_lengths.any() else 1.0
+    if len(documents) >= PRESCREEN_MIN_CORPUS_FOR_IDF:
+        df = (tf > 0).sum(axis=0)
+        idf = np.log1p((len(documents) - df + 0.5) / (df + 0.5))
+    else:
+        # IDF over a handful of resumes is noise; weight every requirement equally instead.
+        idf = np.ones(len(query_terms))
+
+    length_norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths[:, None] / avg_length)
+    saturated = np.minimum(1.0, tf * (BM25_K1 + 1) / (tf + length_norm))
+    scores = saturated @ idf / idf.sum()
+
+    present = tf > 0
+    terms = np.array([phrase for _, phrase in query_terms])
+    return [
+        PrescreenResult(
+            score=float(score),
+            route=_route(float(score), reject_below, priority_above),
+            matched_skills=terms[present[row]].tolist(),
+            missing_skills=terms[~present[row]].tolist()
+        )
+        for row, score in enumerate(scores)
+    ]
+
+
+def prescreen_resume(resume_text: str, role_requirements: str) -> PrescreenResult:
+    """Pre-screen a single resume."""
+    return prescreen_resumes([resume_text], role_requirements)[0]
+
+
+def prescreen_feedback(result: PrescreenResult) -> dict:
+    """Feedback in the analyzer's shape for a candidate rejected without an LLM review."""
+    score = round(result.score * 100)
+    return {
+        "matching_skills": result.matched_skills,
+        "matching_skills_score": score,
+        "missing_skills": result.missing_skills,
+        "project_evaluation": "Not evaluated: the resume did not pass keyword pre-screening.",
+        "overall_fit": "The resume mentions too few of the role's required skills to be reviewed further.",
+        "overall_fit_score": score,
+        "experience_level": None
+    }
+
+
+def _synthetic_corpus(size: int, seed: int = 7) -> tuple[list[str], str]:
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    skills = [f"skill{i}" for i in range(400)]
+    filler = [f"word{i}" for i in range(2000)]
+    required = skills[:12]
+
+    resumes = []
+    for _ in range(size):
+        overlap = rng.integers(0, len(required) + 1)
+        words = list(rng.choice(required, overlap, replace=False))
+        words += list(rng.choice(skills[12:], 20)) + list(rng.choice(filler, rng.integers(200, 1200)))
+        rng.shuffle(words)
+        resumes.append(" ".join(words))
+    return resumes, ", ".join(required)
+
+
+def benchmark(corpus_size: int = 5000, repeats: int = 3) -> dict:
+    """Time pre-screening over a synthetic corpus and report how many LLM calls it would avoid."""
+    import time
+
+    resumes, requirements = _synthetic_corpus(corpus_size)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        results = prescreen_resumes(resumes, requirements)
+        timings.append(time.perf_counter() - started)
+
+    routes = Counter(result.route for result in results)
+    best = min(timings)
+    return {
+        "corpus_size": corpus_size,
+        "total_seconds": round(best, 4),
+        "per_resume_ms": round(1000 * best / corpus_size, 4),
+        "resumes_per_second": round(corpus_size / best),
+        "routes": dict(routes),
+        "llm_calls_avoided": routes[ROUTE_REJECT]
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    print(json.dumps(benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5000), indent=2))
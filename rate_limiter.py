@@ -0,0 +1,249 @@
+"""Process-wide limiter for OpenAI calls shared by every Streamlit session and worker thread.
+
+Calls wait in one priority queue (interactive before batch) until a concurrency slot and the
+requests-per-minute and tokens-per-minute buckets allow them, and are retried with jittered backoff
+on 429 and 5xx responses. A 429 pauses the whole queue, not just the caller that hit it.
+
+Limits apply per process: when several worker processes share an API key, split the account limits
+between them. To exercise the limiter without OpenAI, run `python benchmark.py --fake-openai 8089`
+and set OPENAI_BASE_URL=http://127.0.0.1:8089/v1.
+"""
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, TypeVar
+
+from metrics import inc, logger, observe, set_gauge, usage_from_response
+from resume_preprocessing import count_tokens
+
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "500"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "30000"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_RETRY_BASE_DELAY = 2.0
+LLM_RETRY_MAX_DELAY = 60.0
+# Reserved per call for the reply until the response reports real usage.
+LLM_EXPECTED_OUTPUT_TOKENS = 800
+# Chat formatting around the system and user messages.
+LLM_REQUEST_OVERHEAD_TOKENS = 20
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+_PRIORITY_ORDER = {PRIORITY_INTERACTIVE: 0, PRIORITY_BATCH: 1}
+
+T = TypeVar("T")
+
+_priority: ContextVar[str] = ContextVar("llm_priority", default=PRIORITY_INTERACTIVE)
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def error_status_code(error: Exception) -> int | None:
+    status_code = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Detect 429 responses regardless of which client library raised them."""
+    return error_status_code(error) == 429 or "rate limit" in str(error).lower()
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Rate limits, server errors and dropped connections are worth retrying; bad requests are not."""
+    status_code = error_status_code(error)
+    return (
+        is_rate_limit_error(error)
+        or (status_code is not None and status_code >= 500)
+        or type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+    )
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Honor Retry-After when the server sends it, otherwise back off exponentially with jitter."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return min(LLM_RETRY_MAX_DELAY, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        delay = min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+
+class TokenBucket:
+    """Refills continuously up to one minute's allowance; a limit of 0 disables it."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.rate = per_minute / 60
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        if self.rate:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available; requests larger than the bucket wait for a full one."""
+        if not self.rate:
+            return 0.0
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float):
+        """Remove amount (negative to refund); the level may go below zero after an underestimate."""
+        if self.rate:
+            self.level = min(self.capacity, self.level - amount)
+
+
+class RateLimiter:
+    def __init__(self, rpm: int = OPENAI_RPM_LIMIT, tpm: int = OPENAI_TPM_LIMIT, max_concurrency: int = OPENAI_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._in_flight = 0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+
+    def _publish(self):
+        set_gauge("llm_queue_depth", len(self._waiting))
+        set_gauge("llm_in_flight", self._in_flight)
+
+    def _start_delay(self, ticket: tuple, tokens: int) -> float | None:
+        """None while another call is ahead or all slots are busy, else seconds until this one may start."""
+        if self._waiting[0] != ticket or self._in_flight >= self.max_concurrency:
+            return None
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        return max(self._paused_until - now, self._requests.wait_time(1), self._tokens.wait_time(tokens))
+
+    def acquire(self, tokens: int, priority: str = PRIORITY_INTERACTIVE) -> float:
+        """Block until a call reserving `tokens` may start; returns the seconds spent waiting."""
+        ticket = (_PRIORITY_ORDER.get(priority, len(_PRIORITY_ORDER)), next(self._sequence))
+        started = time.monotonic()
+
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            self._publish()
+            try:
+                while (delay := self._start_delay(ticket, tokens)) != 0:
+                    self._condition.wait(delay)
+                self._requests.take(1)
+                self._tokens.take(tokens)
+                self._in_flight += 1
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._publish()
+                self._condition.notify_all()
+
+        waited = time.monotonic() - started
+        observe("llm_queue_wait_seconds", waited, priority=priority)
+        return waited
+
+    def release(self, reserved_tokens: int, used_tokens: int | None = None):
+        """Free the concurrency slot and settle the token bucket against the tokens actually used."""
+        with self._condition:
+            self._in_flight -= 1
+            if used_tokens:
+                self._tokens.take(used_tokens - reserved_tokens)
+            self._publish()
+            self._condition.notify_all()
+
+    def pause(self, seconds: float):
+        """Hold every queued call, e.g. after a 429, so the whole process backs off together."""
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def call(self, func: Callable[[], T], tokens: int, priority: str | None = None, max_retries: int = LLM_MAX_RETRIES) -> T:
+        """Run func under the limits, retrying retryable errors with jittered backoff."""
+        priority = priority or _priority.get()
+        for attempt in range(max_retries + 1):
+            self.acquire(tokens, priority)
+            used_tokens = None
+            try:
+                response = func()
+                used_tokens = sum(usage_from_response(response))
+                inc("llm_requests_total", priority=priority, status="ok")
+                return response
+            except Exception as e:
+                if attempt == max_retries or not is_retryable_error(e):
+                    inc("llm_requests_total", priority=priority, status="error")
+                    raise
+                delay = retry_delay(e, attempt)
+                reason = "rate_limit" if is_rate_limit_error(e) else "server_error"
+                inc("llm_retries_total", priority=priority, reason=reason)
+                logger.warning(f"LLM call failed ({reason}), retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+            finally:
+                self.release(tokens, used_tokens)
+
+            if reason == "rate_limit":
+                self.pause(delay)
+            else:
+                time.sleep(delay)
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+
+def use_rate_limiter(limiter: RateLimiter | None):
+    """Replace the process-wide limiter (e.g. with other limits in a benchmark); None restores the default."""
+    global _limiter
+
+    with _limiter_lock:
+        _limiter = limiter
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """Run the block's model calls at this priority. Context variables do not follow work into pool threads."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def _tool_schemas(agent) -> list[str]:
+    schemas = []
+    for tool in getattr(agent, "tools", None) or []:
+        functions = getattr(tool, "functions", None)
+        for function in functions.values() if isinstance(functions, dict) else []:
+            schemas.append(json.dumps(function.to_dict(), default=str))
+    return schemas
+
+
+def request_tokens(agent, prompt: str) -> int:
+    """Tokens a run sends: the system message built from the agent's description, instructions and expected
+    output, its tool schemas, and the prompt."""
+    instructions = getattr(agent, "instructions", None) or []
+    if isinstance(instructions, str):
+        instructions = [instructions]
+    parts = [
+        getattr(agent, "description", None),
+        *instructions,
+        getattr(agent, "expected_output", None),
+        *_tool_schemas(agent),
+        prompt
+    ]
+    return sum(count_tokens(part) for part in parts if isinstance(part, str) and part) + LLM_REQUEST_OVERHEAD_TOKENS
+
+
+def call_llm(agent, prompt: str, expected_output_tokens: int = LLM_EXPECTED_OUTPUT_TOKENS):
+    """agent.run(prompt) through the shared limiter, reserving the full request's tokens plus the expected reply."""
+    tokens = request_tokens(agent, prompt) + expected_output_tokens
+    return get_rate_limiter().call(lambda: agent.run(prompt), tokens)
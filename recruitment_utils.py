@@ -1,21 +1,45 @@
 import json
-import pytz
-import streamlit as st
-from database import get_db_connection
-from datetime import datetime, timedelta
-from agno.agent import Agent
-from phi.utils.log import logger
+from typing import TYPE_CHECKING, Callable
+from contextlib import nullcontext
+from database import db_session
+from analysis_cache import get_cached_analysis, make_cache_key, store_analysis
+from agents import email_agent as checkout_email_agent, email_recipient, feedback_writer as checkout_feedback_writer, output_repairer
+from mailer import EMAIL_MODE_TEMPLATE, SMTPMailer, get_mailer
+from outbox import enqueue_email
+from email_templates import render_interview_email, render_rejection_email, render_selection_email
+from metrics import logger, record_llm_usage, span, traced, usage_from_response
+from rate_limiter import call_llm
+from interview_calendar import DEFAULT_INTERVIEW_MINUTES, get_calendar
 
-def analyze_resume(
+if TYPE_CHECKING:
+    from agno.agent import Agent
+
+    from resume_schema import ResumeAnalysis
+
+SLOT_SEARCH_HORIZON_DAYS = 60
+ANALYSIS_PROMPT_VERSION = "v2"
+
+def run_resume_analysis(
     resume_text: str,
     role: str,
     role_requirements: str,
-    analyzer: Agent
-) -> tuple[bool, str]:
-    """Analyze a resume based on the role requirements."""
+    analyzer: "Agent"
+) -> tuple[bool, dict | str]:
+    """Run the analyzer on a resume and return (selected, feedback) without touching the Streamlit session."""
+    model_id = getattr(getattr(analyzer, "model", None), "id", "unknown")
+    cache_key = make_cache_key(resume_text, role, role_requirements, model_id, ANALYSIS_PROMPT_VERSION)
+    cached = get_cached_analysis(cache_key)
+    if cached:
+        return cached
+
+    # pydantic is only needed once a model has to be called.
+    from resume_schema import AnalysisParseError, parse_resume_analysis, record_parse_outcome
+
     try:
-        response = analyzer.run(
-            f"""Please analyze this resume against the following requirements and provide your response in valid JSON format:
+        with span("llm.analyze") as attributes:
+            response = call_llm(
+                analyzer,
+                f"""Please analyze this resume against the following requirements and provide your response in valid JSON format:
             Role: {role}
             Role-Specific Evaluation Criteria: {role_requirements}
             
@@ -36,45 +60,137 @@ def analyze_resume(
             }}
             Important: Return ONLY the JSON object without any markdown formatting or backticks.
             """
-        )
+            )
+            _record_usage(analyzer, response, attributes)
 
-        assistant_message = next((msg.content for msg in response.messages if msg.role == 'assistant'), None)
+        assistant_message = _assistant_content(response)
         if not assistant_message:
             raise ValueError("No assistant message found in response.")
 
-        result = json.loads(assistant_message.strip())
-        if not isinstance(result, dict) or "selected" not in result or "feedback" not in result:
-            raise ValueError("Invalid response format")
+        try:
+            analysis = parse_resume_analysis(assistant_message)
+            record_parse_outcome("parsed")
+        except AnalysisParseError as e:
+            analysis = _repair_analysis(analyzer, assistant_message, str(e))
+            record_parse_outcome("repaired")
+
+        feedback = analysis.feedback.model_dump(mode="json")
+        store_analysis(cache_key, analysis.selected, feedback)
+        return analysis.selected, feedback
+
+    except ValueError as e:
+        record_parse_outcome("failed")
+        return False, f"Error analyzing resume: {str(e)}"
+
+
+def _record_usage(agent: "Agent", response, attributes: dict | None = None):
+    model_id = getattr(getattr(agent, "model", None), "id", "unknown")
+    input_tokens, output_tokens = usage_from_response(response)
+    record_llm_usage(model_id, input_tokens, output_tokens, attributes)
+
+
+def _assistant_content(response) -> str | None:
+    return next((msg.content for msg in response.messages if msg.role == 'assistant'), None)
+
+
+def _repair_analysis(analyzer: "Agent", bad_output: str, error: str) -> "ResumeAnalysis":
+    """Make one small, cheap call that fixes the analyzer's malformed JSON without resending the resume."""
+    from resume_schema import AnalysisParseError, ResumeAnalysis, parse_resume_analysis
+
+    api_key = getattr(getattr(analyzer, "model", None), "api_key", None)
+    with output_repairer(api_key) if api_key else nullcontext(analyzer) as repairer, span("llm.repair") as attributes:
+        response = call_llm(
+            repairer,
+            f"""Fix this JSON so it is valid and matches the JSON schema below. Keep every value that is already valid.
+            Validation error: {error}
+
+            JSON schema: {json.dumps(ResumeAnalysis.model_json_schema())}
+
+            JSON to fix: {bad_output}
+
+            Return ONLY the corrected JSON object.
+            """
+        )
+        _record_usage(repairer, response, attributes)
+
+    repaired_output = _assistant_content(response)
+    if not repaired_output:
+        raise AnalysisParseError("No assistant message found in repair response.")
+    return parse_resume_analysis(repaired_output)
 
-        st.session_state.resume_selected = result["selected"]
-        st.session_state.resume_feedback = result["feedback"]
 
-        return result["selected"], result["feedback"]  
+def analyze_resume(
+    resume_text: str,
+    role: str,
+    role_requirements: str,
+    analyzer: "Agent"
+) -> tuple[bool, dict | str]:
+    """Analyze a resume based on the role requirements."""
+    import streamlit as st
+
+    selected, feedback = run_resume_analysis(resume_text, role, role_requirements, analyzer)
 
-    except (json.JSONDecodeError, ValueError) as e:
-        error_message = f"Error analyzing resume: {str(e)}"
-        st.session_state.resume_feedback = error_message
-        st.session_state.resume_selected = False
-        return False, error_message
+    st.session_state.resume_selected = selected
+    st.session_state.resume_feedback = feedback
 
+    return selected, feedback
 
-def send_selection_email(email_agent: Agent, to_email: str, role: str) -> None:
-    """Send a selection email to the candidate."""
-    email_agent.run(
-        f"""
+
+def send_selection_email(email_agent: "Agent", to_email: str, role: str, mailer: SMTPMailer | None = None) -> None:
+    """Send a selection email to the candidate, rendered from a template when a mailer is given."""
+    if mailer:
+        subject, body = render_selection_email(role, mailer.sender_name)
+        mailer.send(to_email, subject, body)
+        return
+
+    with email_recipient(to_email):
+        response = call_llm(
+            email_agent,
+            f"""
         Send an email to {to_email} regarding their selection for the {role} position.
         The email should:
         1. Congratulate them on being selected
         2. Explain the next steps in the process
         3. Mention that they will receive interview details shortly
         """
+        )
+    _record_usage(email_agent, response)
+
+
+def write_feedback_paragraph(feedback_writer: "Agent", role: str, feedback: dict | str) -> str:
+    """Ask the model for only the personalized feedback paragraph of a rejection email."""
+    response = call_llm(
+        feedback_writer,
+        f"""Write the feedback paragraph for a candidate who was not selected for the {role} position.
+        Base it on this evaluation: {feedback}
+        """
     )
+    _record_usage(feedback_writer, response)
+    return response.content
 
 
-def send_rejection_email(email_agent: Agent, to_email: str, role: str, feedback: str) -> None:
-    """Send a rejection email with constructive feedback."""
-    email_agent.run(
-        f"""
+def send_rejection_email(
+    email_agent: "Agent",
+    to_email: str,
+    role: str,
+    feedback: str,
+    mailer: SMTPMailer | None = None
+) -> None:
+    """Send a rejection email with constructive feedback.
+
+    With a mailer, email_agent is a feedback writer: only the feedback paragraph comes from the
+    model and the rest of the email is rendered from a template.
+    """
+    if mailer:
+        feedback_paragraph = write_feedback_paragraph(email_agent, role, feedback)
+        subject, body = render_rejection_email(role, mailer.sender_name, feedback_paragraph)
+        mailer.send(to_email, subject, body)
+        return
+
+    with email_recipient(to_email):
+        response = call_llm(
+            email_agent,
+            f"""
         Send an email to {to_email} regarding their application for the {role} position.
         Use this specific style:
         1. be empathetic and human
@@ -88,36 +204,28 @@ def send_rejection_email(email_agent: Agent, to_email: str, role: str, feedback:
         Do not include any names in the signature.
         The tone should be like a human writing a quick but thoughtful email.
         """
-    )
-
-
-def schedule_interview(email_agent: Agent, role: str) -> None:
-    """Schedule an interview, save it to the database, and send confirmation email."""
-    try:
-        interview_time = get_next_available_time()
-        
-        if not interview_time:
-            st.error("⚠ No available interview slots. Please try again later.")
-            return
-
-        candidate_email = st.session_state.get("candidate_email")
-        if not candidate_email:
-            st.error("⚠ Missing candidate email.")
-            return
+        )
+    _record_usage(email_agent, response)
 
-        conn, cursor = get_db_connection()
-        cursor.execute("""
-            INSERT INTO interview_schedule (candidate_email, interview_time, created_at)
-            VALUES (%s, %s, NOW())
-        """, (candidate_email, interview_time))
-        conn.commit()
-        cursor.close()
-        conn.close()
 
-        zoom_link = st.session_state.get("zoom_link", "N/A")
-        zoom_passcode = st.session_state.get("zoom_passcode", "N/A")
+def send_interview_email(
+    email_agent: "Agent",
+    to_email: str,
+    role: str,
+    interview_time: str,
+    zoom_link: str,
+    zoom_passcode: str,
+    mailer: SMTPMailer | None = None
+) -> None:
+    """Send the interview confirmation email, rendered from a template when a mailer is given."""
+    if mailer:
+        subject, body = render_interview_email(role, mailer.sender_name, interview_time, zoom_link, zoom_passcode)
+        mailer.send(to_email, subject, body)
+        return
 
-        email_agent.run(
+    with email_recipient(to_email):
+        response = call_llm(
+            email_agent,
             f"""Send an interview confirmation email with these details:
 
             Role: {role} position  
@@ -133,6 +241,138 @@ def schedule_interview(email_agent: Agent, role: str) -> None:
             The AI Recruiting Team.
             """
         )
+    _record_usage(email_agent, response)
+
+
+def deliver_outbox_email(email_type: str, to_email: str, payload: dict, settings: dict) -> None:
+    """Send one queued outbox email using the worker's email settings."""
+    mailer = None
+    if settings["email_mode"] == EMAIL_MODE_TEMPLATE:
+        mailer = get_mailer(settings["email_sender"], settings["email_passkey"], settings["company_name"])
+
+    if email_type == "rejection" and mailer:
+        agent_context = checkout_feedback_writer(settings["openai_api_key"])
+    elif mailer:
+        agent_context = nullcontext()
+    else:
+        agent_context = checkout_email_agent(
+            settings["openai_api_key"],
+            settings["email_sender"],
+            settings["company_name"],
+            settings["email_passkey"]
+        )
+
+    with agent_context as agent, span("email.send", email_type=email_type, email_mode=settings["email_mode"]):
+        send_outbox_email(agent, email_type, to_email, payload, mailer=mailer)
+
+
+def send_outbox_email(agent: "Agent", email_type: str, to_email: str, payload: dict, mailer: SMTPMailer | None = None) -> None:
+    """Send one outbox email with the given agent, rendered from a template when a mailer is given."""
+    if email_type == "selection":
+        send_selection_email(agent, to_email, payload["role"], mailer=mailer)
+    elif email_type == "rejection":
+        send_rejection_email(agent, to_email, payload["role"], payload["feedback"], mailer=mailer)
+    elif email_type == "interview":
+        send_interview_email(
+            agent,
+            to_email,
+            payload["role"],
+            payload["interview_time"],
+            payload["zoom_link"],
+            payload["zoom_passcode"],
+            mailer=mailer
+        )
+    else:
+        raise ValueError(f"Unknown email type: {email_type}")
+
+
+def queue_rejection_email(
+    to_email: str,
+    role: str,
+    feedback: dict | str,
+    db_config: dict | None = None,
+    sender_email: str = ""
+) -> None:
+    """Queue the rejection email in the outbox; the sender's background worker writes and sends it."""
+    with db_session(db_config) as (conn, cursor):
+        enqueue_email(cursor, "rejection", to_email, {"role": role, "feedback": feedback}, sender_email)
+        conn.commit()
+
+
+def book_interview(
+    candidate_email: str,
+    role: str,
+    zoom_link: str,
+    zoom_passcode: str,
+    db_config: dict | None = None,
+    sender_email: str = "",
+    horizon_days: int = SLOT_SEARCH_HORIZON_DAYS,
+    booking_key: str | None = None
+) -> str | None:
+    """Reserve an interview slot and queue the selection and confirmation emails in the same transaction.
+
+    A booking_key makes retries safe: a second call with the same key returns the first booking and
+    queues nothing.
+    """
+    def queue_emails(cursor, interview_time: str):
+        enqueue_email(cursor, "selection", candidate_email, {"role": role}, sender_email)
+        enqueue_email(cursor, "interview", candidate_email, {
+            "role": role,
+            "interview_time": interview_time,
+            "zoom_link": zoom_link,
+            "zoom_passcode": zoom_passcode
+        }, sender_email)
+
+    return reserve_interview_slot(
+        candidate_email, horizon_days, before_commit=queue_emails, db_config=db_config, booking_key=booking_key
+    )
+
+
+def book_interviews(
+    candidate_emails: list[str],
+    role: str,
+    zoom_link: str,
+    zoom_passcode: str,
+    db_config: dict | None = None,
+    duration_minutes: int = DEFAULT_INTERVIEW_MINUTES,
+    sender_email: str = ""
+) -> dict[str, str | None]:
+    """Book interviews for many candidates in one pass over the calendar; returns each candidate's time or None."""
+    def queue_emails(cursor, candidate_email: str, interview_time: str):
+        enqueue_email(cursor, "selection", candidate_email, {"role": role}, sender_email)
+        enqueue_email(cursor, "interview", candidate_email, {
+            "role": role,
+            "interview_time": interview_time,
+            "zoom_link": zoom_link,
+            "zoom_passcode": zoom_passcode
+        }, sender_email)
+
+    bookings = get_calendar(db_config).book_many(
+        candidate_emails, duration_minutes, SLOT_SEARCH_HORIZON_DAYS, before_commit=queue_emails
+    )
+    return {email: booking.start_text if booking else None for email, booking in bookings.items()}
+
+
+def schedule_interview(role: str) -> None:
+    """Book an interview for the session's candidate and report the outcome in the UI."""
+    import streamlit as st
+
+    try:
+        candidate_email = st.session_state.get("candidate_email")
+        if not candidate_email:
+            st.error("⚠ Missing candidate email.")
+            return
+
+        interview_time = book_interview(
+            candidate_email,
+            role,
+            st.session_state.get("zoom_link", "N/A"),
+            st.session_state.get("zoom_passcode", "N/A"),
+            sender_email=st.session_state.get("email_sender", "")
+        )
+        if not interview_time:
+            st.error("⚠ No available interview slots. Please try again later.")
+            return
 
         st.success(f"✅ Interview scheduled successfully! Time: {interview_time} Vietnam Time.")
 
@@ -141,22 +381,35 @@ def schedule_interview(email_agent: Agent, role: str) -> None:
         st.error("❌ Unable to schedule interview. Please try again.")
 
 
-def get_next_available_time() -> str:
-    """Find available interview slots within the 9 AM - 5 PM (UTC+7) timeframe, automatically moving to the next day if no slots are left."""
-    vn_tz = pytz.timezone('Asia/Ho_Chi_Minh')
-    current_time_vn = datetime.now(vn_tz)
-    search_date = current_time_vn + timedelta(days=1)
+@traced("slots.find_next")
+def get_next_available_time(
+    horizon_days: int = SLOT_SEARCH_HORIZON_DAYS,
+    db_config: dict | None = None,
+    duration_minutes: int = DEFAULT_INTERVIEW_MINUTES
+) -> str | None:
+    """Find the earliest slot any interviewer can take within their working hours, searching at most horizon_days ahead."""
+    slot = get_calendar(db_config).find_earliest(duration_minutes, horizon_days)
+    if not slot:
+        logger.warning(f"No free interview slot within the next {horizon_days} days.")
+        return None
+    return slot.start_text
 
-    conn, cursor = get_db_connection()
 
-    while True:
-        for hour in range(9, 17):
-            interview_time = search_date.replace(hour=hour, minute=0, second=0, microsecond=0)
-            formatted_time = interview_time.strftime('%Y-%m-%d %H:%M:%S')
+@traced("slots.reserve")
+def reserve_interview_slot(
+    candidate_email: str,
+    horizon_days: int = SLOT_SEARCH_HORIZON_DAYS,
+    before_commit: Callable | None = None,
+    db_config: dict | None = None,
+    duration_minutes: int = DEFAULT_INTERVIEW_MINUTES,
+    booking_key: str | None = None
+) -> str | None:
+    """Book the earliest feasible slot for a candidate with whichever interviewer is free first.
 
-            cursor.execute("SELECT COUNT(*) FROM interview_schedule WHERE interview_time = %s", (formatted_time,))
-            if cursor.fetchone()[0] == 0:
-                conn.close()
-                return formatted_time
-        
-        search_date += timedelta(days=1)
+    before_commit(cursor, interview_time) runs inside the booking transaction, e.g. to queue
+    confirmation emails. A booking already made under booking_key is returned instead of booking again.
+    """
+    slot = get_calendar(db_config).book(
+        candidate_email, duration_minutes, horizon_days, before_commit, booking_key=booking_key
+    )
+    return slot.start_text if slot else None
@@ -0,0 +1,468 @@
+"""Incremental re-evaluation of a role's candidates after its requirements change.
+
+Every edit of a role's requirements is stored as a new version. A rescore run walks the role's
+candidates in id order and compares each candidate's latest analysis with the new version:
+
+- the requirement items are diffed against the version the candidate was analyzed with;
+- the skill scores are adjusted locally from the stored matching_skills / missing_skills, checking
+  requirements the model never mentioned against the resume text;
+- the stored decision stands unless the pre-screen now rejects the candidate, as it would on a new
+  screening; candidates whose fit moved towards the other decision are queued for the LLM (batch
+  priority, no emails), the rest get a new 'rescore' analysis without a model call.
+
+Progress is committed with each batch, so an interrupted run picks up where it stopped. Once every
+candidate is handled the run waits in 'analyzing' until the screening jobs it queued have finished:
+
+    python rescoring.py "Backend Engineer" requirements.txt
+    python rescoring.py --run 12 --wait
+"""
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from candidate_store import save_role_version, text_hash
+from database import db_session
+from job_queue import submit_job
+from metrics import inc, logger, span
+from prescreen import PRESCREEN_ENABLED, ROUTE_REJECT, prescreen_resume
+from rate_limiter import PRIORITY_BATCH
+from resume_preprocessing import keywords
+from screening_service import ScreeningJob
+
+RESCORE_BATCH_SIZE = int(os.getenv("RESCORE_BATCH_SIZE", "200"))
+RESCORE_WAIT_INTERVAL = 5
+# Candidates whose overall fit moves this many points towards the other decision go back to the LLM.
+RESCORE_MARGIN = int(os.getenv("RESCORE_MARGIN", "10"))
+# Share of a change in the skills score carried into the overall fit score.
+RESCORE_OVERALL_WEIGHT = 0.6
+# A keyword check of the resume is right more often than not, so a guessed requirement counts as half a swing.
+RESCORE_GUESS_UNCERTAINTY = 0.5
+SOURCE_RESCORE = "rescore"
+SOURCE_PRESCREEN = "prescreen"
+
+RUN_STATUS_RUNNING = "running"
+RUN_STATUS_ANALYZING = "analyzing"
+RUN_STATUS_DONE = "done"
+
+REQUIREMENT_SEPARATOR = re.compile(r"[,;\n\r•·|]+")
+LIST_MARKER = re.compile(r"^[\s\-*+\d.)]+")
+
+
+@dataclass
+class RequirementDiff:
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
+
+
+@dataclass
+class Rescore:
+    """A locally adjusted analysis; guessed lists added requirements judged from the resume text alone,
+    and source is 'prescreen' when the pre-screen made the decision."""
+    selected: bool
+    source: str
+    overall_fit_score: int
+    matching_skills_score: int
+    matching_skills: list[str]
+    missing_skills: list[str]
+    guessed: list[str]
+    may_flip: bool
+
+
+def requirement_items(role_requirements: str) -> dict[frozenset, str]:
+    """Split requirements into items keyed by their keywords, so 'Python.' and '- python' are one item."""
+    items = {}
+    for raw_item in REQUIREMENT_SEPARATOR.split(role_requirements):
+        item = LIST_MARKER.sub("", raw_item).strip().lower()
+        key = frozenset(keywords(item))
+        if key and key not in items:
+            items[key] = item
+    return items
+
+
+def diff_requirements(old_requirements: str, new_requirements: str) -> RequirementDiff:
+    old_items = requirement_items(old_requirements)
+    new_items = requirement_items(new_requirements)
+    return RequirementDiff(
+        added=[item for key, item in new_items.items() if key not in old_items],
+        removed=[item for key, item in old_items.items() if key not in new_items],
+        unchanged=[item for key, item in new_items.items() if key in old_items]
+    )
+
+
+def _covers(skill: str, item: str) -> bool:
+    """True when a skill phrase from an analysis names a requirement item, e.g. 'REST API design' and 'rest apis'."""
+    item_words = keywords(item)
+    return bool(item_words) and 2 * len(item_words & keywords(skill)) >= len(item_words)
+
+
+def _status(item: str, matching: list[str], missing: list[str], resume_words: set[str]) -> tuple[bool, bool]:
+    """(matched, guessed): the model's verdict when it named the item, else a keyword check of the resume."""
+    if any(_covers(skill, item) for skill in matching):
+        return True, False
+    if any(_covers(skill, item) for skill in missing):
+        return False, False
+    return keywords(item) <= resume_words, True
+
+
+def _clamp_score(score: float) -> int:
+    return max(0, min(100, round(score)))
+
+
+def rescore_analysis(analysis: dict, diff: RequirementDiff, resume_text: str, role_requirements: str) -> Rescore:
+    """Adjust a stored analysis to new requirements without the LLM and decide whether its decision could flip.
+
+    The skills score moves by the change in the share of requirements the candidate covers, and the
+    overall fit by RESCORE_OVERALL_WEIGHT of that. The decision follows screening: a candidate the
+    pre-screen rejects on the new requirements is rejected, otherwise the stored decision stands
+    unless the overall fit moved at least RESCORE_MARGIN points towards the other decision, counting
+    the share of the score that guessed requirements could still swing. A pre-screen rejection the
+    pre-screen no longer makes always goes to the LLM, which never saw the candidate.
+    """
+    matching, missing = analysis["matching_skills"], analysis["missing_skills"]
+    resume_words = keywords(resume_text)
+    old_status = {item: _status(item, matching, missing, resume_words) for item in diff.unchanged + diff.removed}
+    new_status = {item: _status(item, matching, missing, resume_words) for item in diff.added}
+    new_status.update({item: old_status[item] for item in diff.unchanged})
+
+    def coverage(statuses) -> float:
+        statuses = list(statuses)
+        return 100 * sum(matched for matched, _ in statuses) / len(statuses) if statuses else 0.0
+
+    delta = coverage(new_status.values()) - coverage(old_status.values())
+    matching_skills_score = _clamp_score(analysis["matching_skills_score"] + delta)
+    overall_fit_score = _clamp_score(analysis["overall_fit_score"] + RESCORE_OVERALL_WEIGHT * delta)
+    guessed = [item for item in diff.added if new_status[item][1]]
+
+    selected, source = analysis["selected"], SOURCE_RESCORE
+    if PRESCREEN_ENABLED and prescreen_resume(resume_text, role_requirements).route == ROUTE_REJECT:
+        selected, source, may_flip = False, SOURCE_PRESCREEN, False
+    elif analysis["source"] == SOURCE_PRESCREEN:
+        may_flip = True
+    else:
+        uncertainty = RESCORE_GUESS_UNCERTAINTY * RESCORE_OVERALL_WEIGHT * 100 * len(guessed) / max(len(new_status), 1)
+        towards_other = (overall_fit_score - analysis["overall_fit_score"]) * (-1 if selected else 1)
+        may_flip = diff.changed and towards_other + uncertainty >= RESCORE_MARGIN
+
+    return Rescore(
+        selected=selected,
+        source=source,
+        overall_fit_score=overall_fit_score,
+        matching_skills_score=matching_skills_score,
+        matching_skills=[
+            skill for skill in matching if not any(_covers(skill, item) for item in diff.removed)
+        ] + [item for item in guessed if new_status[item][0]],
+        missing_skills=[
+            skill for skill in missing if not any(_covers(skill, item) for item in diff.removed)
+        ] + [item for item in guessed if not new_status[item][0]],
+        guessed=guessed,
+        may_flip=may_flip
+    )
+
+
+def _json_value(value):
+    return json.loads(value) if isinstance(value, (str, bytes, bytearray)) else value
+
+
+def _has_stale_analyses(cursor, role_id: int, requirements_hash: str) -> bool:
+    """True when some candidate's latest analysis for the role was made on other requirements."""
+    cursor.execute("""
+        SELECT 1 FROM analyses a
+        WHERE a.role_id = %s AND a.requirements_hash <> %s
+          AND NOT EXISTS (
+              SELECT 1 FROM analyses newer
+              WHERE newer.candidate_id = a.candidate_id AND newer.role_id = a.role_id AND newer.id > a.id
+          )
+        LIMIT 1
+    """, (role_id, requirements_hash))
+    return cursor.fetchone() is not None
+
+
+def start_rescore(role: str, role_requirements: str, db_config: dict | None = None) -> int:
+    """Save the requirements as the role's current version and return the rescore run for it.
+
+    An unfinished run for the version is resumed rather than restarted. A finished one is returned
+    as it is only while every candidate's latest analysis is on this version; after the role moved
+    to other requirements and back, a new run re-evaluates the candidates analyzed in between.
+    """
+    version = save_role_version(role, role_requirements, db_config)
+    with db_session(db_config) as (conn, cursor):
+        # Serializes starts per role, so two recruiters saving at once share one run.
+        cursor.execute("SELECT id FROM roles WHERE id = %s FOR UPDATE", (version["role_id"],))
+        cursor.fetchone()
+        cursor.execute(
+            "SELECT id, status FROM rescore_runs WHERE role_version_id = %s ORDER BY id DESC LIMIT 1",
+            (version["version_id"],)
+        )
+        row = cursor.fetchone()
+        if row and (
+            row[1] != RUN_STATUS_DONE
+            or not _has_stale_analyses(cursor, version["role_id"], text_hash(role_requirements))
+        ):
+            conn.commit()
+            return row[0]
+
+        cursor.execute(
+            "INSERT INTO rescore_runs (role_id, role_version_id) VALUES (%s, %s)",
+            (version["role_id"], version["version_id"])
+        )
+        run_id = cursor.lastrowid
+        conn.commit()
+    return run_id
+
+
+def get_rescore_run(run_id: int, db_config: dict | None = None) -> dict | None:
+    """Return a run's role, target requirements, cursor and counters, the role's candidate total, and
+    how many of the screening jobs the run queued are still pending or have failed."""
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("""
+            SELECT r.id, r.role_id, ro.title, v.version, v.requirements, r.status, r.last_candidate_id,
+                   r.processed, r.rescored, r.sent_to_llm, r.skipped,
+                   (SELECT COUNT(DISTINCT candidate_id) FROM analyses WHERE role_id = r.role_id),
+                   (SELECT COUNT(*) FROM screening_jobs j WHERE j.rescore_run_id = r.id AND j.status IN ('queued', 'running')),
+                   (SELECT COUNT(*) FROM screening_jobs j WHERE j.rescore_run_id = r.id AND j.status = 'failed')
+            FROM rescore_runs r
+            JOIN roles ro ON ro.id = r.role_id
+            JOIN role_versions v ON v.id = r.role_version_id
+            WHERE r.id = %s
+        """, (run_id,))
+        row = cursor.fetchone()
+
+    if not row:
+        return None
+    keys = (
+        "id", "role_id", "role", "version", "requirements", "status", "last_candidate_id",
+        "processed", "rescored", "sent_to_llm", "skipped", "total", "llm_pending", "llm_failed"
+    )
+    return dict(zip(keys, row))
+
+
+def latest_rescore_run(role_id: int, db_config: dict | None = None) -> dict | None:
+    """Return the role's most recent rescore run, marked done first if its screening jobs have finished."""
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("SELECT MAX(id) FROM rescore_runs WHERE role_id = %s", (role_id,))
+        run_id = cursor.fetchone()[0]
+    return refresh_rescore_run(run_id, db_config) if run_id else None
+
+
+def refresh_rescore_run(run_id: int, db_config: dict | None = None) -> dict | None:
+    """Mark an analyzing run done once none of its screening jobs is queued or running; returns the run."""
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("""
+            UPDATE rescore_runs SET status = 'done', finished_at = NOW()
+            WHERE id = %s AND status = 'analyzing'
+              AND NOT EXISTS (
+                  SELECT 1 FROM screening_jobs
+                  WHERE rescore_run_id = %s AND status IN ('queued', 'running')
+              )
+        """, (run_id, run_id))
+        conn.commit()
+    return get_rescore_run(run_id, db_config)
+
+
+def _next_batch(cursor, role_id: int, after_candidate_id: int, batch_size: int) -> list[dict]:
+    """The latest analysis of the next batch_size candidates for the role, in candidate id order."""
+    cursor.execute("""
+        SELECT a.id, a.candidate_id, a.requirements_hash, a.selected, a.overall_fit_score,
+               a.matching_skills_score, a.experience_level, a.matching_skills, a.missing_skills,
+               a.feedback, c.resume_text, c.email, c.resume_name, a.source
+        FROM analyses a
+        JOIN (
+            SELECT candidate_id, MAX(id) AS id FROM analyses
+            WHERE role_id = %s AND candidate_id > %s
+            GROUP BY candidate_id
+            ORDER BY candidate_id
+            LIMIT %s
+        ) latest ON latest.id = a.id
+        JOIN candidates c ON c.id = a.candidate_id
+        ORDER BY a.candidate_id
+    """, (role_id, after_candidate_id, batch_size))
+    return [
+        {
+            "analysis_id": row[0],
+            "candidate_id": row[1],
+            "requirements_hash": row[2],
+            "selected": bool(row[3]),
+            "overall_fit_score": row[4],
+            "matching_skills_score": row[5],
+            "experience_level": row[6],
+            "matching_skills": _json_value(row[7]) or [],
+            "missing_skills": _json_value(row[8]) or [],
+            "feedback": _json_value(row[9]) or {},
+            "resume_text": row[10],
+            "email": row[11],
+            "resume_name": row[12],
+            "source": row[13]
+        }
+        for row in cursor.fetchall()
+    ]
+
+
+def _insert_rescore(cursor, run: dict, analysis: dict, rescore: Rescore, diff: RequirementDiff):
+    feedback = {
+        **analysis["feedback"],
+        "matching_skills": rescore.matching_skills,
+        "matching_skills_score": rescore.matching_skills_score,
+        "missing_skills": rescore.missing_skills,
+        "overall_fit_score": rescore.overall_fit_score,
+        "rescored_from": analysis["analysis_id"],
+        "requirements_added": diff.added,
+        "requirements_removed": diff.removed
+    }
+    cursor.execute("""
+        INSERT INTO analyses (
+            candidate_id, role_id, requirements_hash, source, selected, overall_fit_score,
+            matching_skills_score, experience_level, matching_skills, missing_skills, feedback
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, (
+        analysis["candidate_id"],
+        run["role_id"],
+        text_hash(run["requirements"]),
+        rescore.source,
+        rescore.selected,
+        rescore.overall_fit_score,
+        rescore.matching_skills_score,
+        analysis["experience_level"],
+        json.dumps(rescore.matching_skills),
+        json.dumps(rescore.missing_skills),
+        json.dumps(feedback)
+    ))
+
+
+def run_rescore(
+    run_id: int,
+    db_config: dict | None = None,
+    batch_size: int = RESCORE_BATCH_SIZE,
+    on_progress: Callable[[dict], None] | None = None
+) -> dict:
+    """Work through a rescore run from its saved cursor until every candidate is handled; returns the run.
+
+    Each batch's LLM jobs are submitted before its local re-scores and cursor are committed. Jobs are
+    idempotent, so a crash in between only resubmits the same jobs when the run resumes. The returned
+    run is 'analyzing' while those jobs are still queued or running; refresh_rescore_run marks it done.
+    """
+    run = get_rescore_run(run_id, db_config)
+    if not run:
+        raise ValueError(f"Rescore run {run_id} does not exist.")
+
+    new_hash = text_hash(run["requirements"])
+    with db_session(db_config) as (conn, cursor):
+        cursor.execute("SELECT requirements_hash, requirements FROM role_versions WHERE role_id = %s", (run["role_id"],))
+        versions = dict(cursor.fetchall())
+
+    while run["status"] == RUN_STATUS_RUNNING:
+        with span("rescore.batch") as attributes, db_session(db_config) as (conn, cursor):
+            batch = _next_batch(cursor, run["role_id"], run["last_candidate_id"], batch_size)
+            local, jobs, skipped = [], [], 0
+            for analysis in batch:
+                if analysis["requirements_hash"] == new_hash or not analysis["resume_text"]:
+                    skipped += 1
+                    continue
+
+                old_requirements = versions.get(analysis["requirements_hash"])
+                rescore = diff = None
+                if old_requirements is not None:
+                    diff = diff_requirements(old_requirements, run["requirements"])
+                    rescore = rescore_analysis(analysis, diff, analysis["resume_text"], run["requirements"])
+
+                if rescore and not rescore.may_flip:
+                    local.append((analysis, rescore, diff))
+                else:
+                    # Unknown old requirements (analyzed before versioning) or a decision that could flip.
+                    jobs.append(ScreeningJob(
+                        run["role"],
+                        run["requirements"],
+                        resume_name=analysis["resume_name"] or "",
+                        resume_text=analysis["resume_text"],
+                        candidate_email=analysis["email"] or "",
+                        queue_rejection=False,
+                        schedule_if_selected=False,
+                        priority=PRIORITY_BATCH
+                    ))
+
+            for job in jobs:
+                submit_job(job, db_config, rescore_run_id=run_id)
+
+            for analysis, rescore, diff in local:
+                _insert_rescore(cursor, run, analysis, rescore, diff)
+
+            last_candidate_id = batch[-1]["candidate_id"] if batch else run["last_candidate_id"]
+            status = RUN_STATUS_RUNNING if len(batch) == batch_size else RUN_STATUS_ANALYZING
+            # Guarded on the cursor, so a second runner on the same run rolls back instead of double-counting.
+            cursor.execute("""
+                UPDATE rescore_runs
+                SET last_candidate_id = %s, processed = processed + %s, rescored = rescored + %s,
+                    sent_to_llm = sent_to_llm + %s, skipped = skipped + %s, status = %s
+                WHERE id = %s AND last_candidate_id = %s AND status = 'running'
+            """, (
+                last_candidate_id, len(batch), len(local), len(jobs), skipped, status,
+                run_id, run["last_candidate_id"]
+            ))
+            advanced = cursor.rowcount > 0
+            if advanced:
+                conn.commit()
+            else:
+                conn.rollback()
+                logger.warning(f"Rescore run {run_id} was advanced by another worker; reloading its progress.")
+            attributes.update(candidates=len(batch), rescored=len(local), sent_to_llm=len(jobs))
+
+        if advanced:
+            inc("rescore_candidates_total", len(local), route="local")
+            inc("rescore_candidates_total", len(jobs), route="llm")
+        run = get_rescore_run(run_id, db_config)
+        if on_progress:
+            on_progress(run)
+
+    return refresh_rescore_run(run_id, db_config)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    from database import create_table, db_config_from_env
+
+    parser = argparse.ArgumentParser(description="Re-evaluate a role's candidates after its requirements change.")
+    parser.add_argument("role", nargs="?", help="role title")
+    parser.add_argument("requirements", nargs="?", help="file with the new requirements, or - for stdin")
+    parser.add_argument("--run", type=int, help="resume this rescore run instead of starting one")
+    parser.add_argument("--wait", action="store_true", help="wait until the candidates sent to the LLM are analyzed")
+    args = parser.parse_args()
+
+    env_db_config = db_config_from_env()
+    if not env_db_config or not (args.run or (args.role and args.requirements)):
+        parser.error("MYSQL_* settings and either --run or a role and a requirements file are required")
+
+    create_table(env_db_config)
+    if args.run:
+        rescore_run_id = args.run
+    else:
+        import sys
+
+        with sys.stdin if args.requirements == "-" else open(args.requirements) as requirements_file:
+            rescore_run_id = start_rescore(args.role, requirements_file.read().strip(), env_db_config)
+
+    finished = run_rescore(
+        rescore_run_id,
+        env_db_config,
+        on_progress=lambda progress: print(
+            f"Run {progress['id']}: {progress['processed']}/{progress['total']} candidates, "
+            f"{progress['rescored']} re-scored locally, {progress['sent_to_llm']} sent to the LLM",
+            flush=True
+        )
+    )
+    while args.wait and finished["status"] != RUN_STATUS_DONE:
+        print(f"Run {finished['id']}: waiting for {finished['llm_pending']} LLM analyses", flush=True)
+        time.sleep(RESCORE_WAIT_INTERVAL)
+        finished = refresh_rescore_run(rescore_run_id, env_db_config)
+    print(json.dumps({key: value for key, value in finished.items() if key != "requirements"}, default=str))
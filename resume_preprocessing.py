@@ -0,0 +1,189 @@
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "3000"))
+TOKENIZER_ENCODING = "o200k_base"
+# Separates pages in extracted PDF text, as pdftotext does.
+PAGE_BREAK = "\f"
+# A line repeated among the first or last few lines of several pages is a running header or footer.
+HEADER_FOOTER_LINES = 3
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+# An international number, three or more digit groups, or one long run of digits.
+PHONE_PATTERN = re.compile(r"(?<![\w+])(?:\+\d[\d\s().-]{6,}\d|\(?\d{2,4}\)?(?:[\s.-]\(?\d{2,4}\)?){2,4}|\d{9,15})(?!\w)")
+# Employment dates such as "2019 - 2021" or "2018.01 - 2020.12" have phone-like digit groups.
+DATE_RANGE_PATTERN = re.compile(r"^(?:(?:19|20)\d{2}(?:[./-]\d{1,2})?\s*(?:[-–—]|to)?\s*){2,}$", re.IGNORECASE)
+URL_PATTERN = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+BOILERPLATE_PATTERNS = [
+    re.compile(r"^page\s+\d+(\s+of\s+\d+)?$", re.IGNORECASE),
+    re.compile(r"^\d+\s*/\s*\d+$"),
+    re.compile(r"^(curriculum vitae|resume|cv)$", re.IGNORECASE),
+    re.compile(r"references (are )?available (up)?on request", re.IGNORECASE),
+    re.compile(r"^(address|email|e-mail|phone|mobile|tel|linkedin|github|website)\s*:?\s*$", re.IGNORECASE)
+]
+WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+STOPWORDS = {
+    "and", "the", "for", "with", "you", "our", "are", "will", "have", "has", "from", "that", "this",
+    "years", "year", "experience", "knowledge", "ability", "skills", "strong", "good", "work", "of", "in",
+    "to", "a", "an", "or", "on", "as", "at", "be", "is", "by"
+}
+
+
+@lru_cache(maxsize=1)
+def _tokenizer():
+    """Load tiktoken and its BPE table on first use; both are slow enough to matter at cold start."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception:
+        return None
+
+
+@dataclass
+class PreprocessedResume:
+    text: str
+    tokens_before: int
+    tokens_after: int
+    removed_lines: int
+    dropped_sections: int
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with the gpt-4o tokenizer, or estimate at ~4 characters per token without tiktoken."""
+    encoding = _tokenizer()
+    if encoding:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    encoding = _tokenizer()
+    if encoding:
+        return encoding.decode(encoding.encode(text)[:max_tokens])
+    return text[:max_tokens * 4]
+
+
+def keywords(text: str) -> set[str]:
+    """Lowercased skill-like words, e.g. 'python', 'c++', 'node.js', without common filler words."""
+    return {word.rstrip(".") for word in WORD_PATTERN.findall(text.lower())} - STOPWORDS
+
+
+def _strip_phones(line: str) -> str:
+    return PHONE_PATTERN.sub(lambda match: match.group() if DATE_RANGE_PATTERN.match(match.group()) else "", line)
+
+
+def _is_noise(line: str) -> bool:
+    stripped = EMAIL_PATTERN.sub("", URL_PATTERN.sub("", _strip_phones(line))).strip(" |,;:-•·")
+    return not stripped or any(pattern.search(line) or pattern.search(stripped) for pattern in BOILERPLATE_PATTERNS)
+
+
+def _page_edges(page: list[str]) -> set[int]:
+    """Indexes of the first and last HEADER_FOOTER_LINES non-blank lines of a page."""
+    filled = [index for index, line in enumerate(page) if line]
+    return set(filled[:HEADER_FOOTER_LINES] + filled[-HEADER_FOOTER_LINES:])
+
+
+def clean_lines(resume_text: str) -> tuple[list[str], int]:
+    """Normalize whitespace and drop page headers/footers, contact details and boilerplate.
+
+    Pages are separated by PAGE_BREAK. A line found at the top or bottom of two or more pages is a
+    running header or footer and only its first copy is kept; repeats elsewhere (a second job with the
+    same title or bullet) are content. Blank lines are kept as section separators; returns the lines
+    and how many were removed.
+    """
+    pages = [
+        [" ".join(raw_line.split()) for raw_line in page.splitlines()]
+        for page in resume_text.replace("\xa0", " ").split(PAGE_BREAK)
+    ]
+    edges = [_page_edges(page) for page in pages]
+    edge_counts = Counter()
+    for page, page_edges in zip(pages, edges):
+        edge_counts.update({page[index].lower() for index in page_edges})
+    running = {fingerprint for fingerprint, count in edge_counts.items() if count > 1}
+
+    kept_running = set()
+    lines = []
+    removed = 0
+    for page, page_edges in zip(pages, edges):
+        for index, line in enumerate(page):
+            if not line:
+                if lines and lines[-1]:
+                    lines.append("")
+                continue
+
+            fingerprint = line.lower()
+            if index in page_edges and fingerprint in running:
+                if fingerprint in kept_running:
+                    removed += 1
+                    continue
+                kept_running.add(fingerprint)
+            if _is_noise(line):
+                removed += 1
+                continue
+
+            lines.append(line)
+
+    return lines, removed
+
+
+def _split_sections(lines: list[str]) -> list[str]:
+    sections, current = [], []
+    for line in lines:
+        if line:
+            current.append(line)
+        elif current:
+            sections.append("\n".join(current))
+            current = []
+    if current:
+        sections.append("\n".join(current))
+    return sections
+
+
+def preprocess_resume(
+    resume_text: str,
+    role_requirements: str,
+    token_budget: int = RESUME_TOKEN_BUDGET
+) -> PreprocessedResume:
+    """Clean resume text and trim it to token_budget, keeping the sections most relevant to the requirements.
+
+    The first section (name, headline, summary) is always kept; the rest are ranked by how many
+    requirement keywords they mention and put back in their original order.
+    """
+    tokens_before = count_tokens(resume_text)
+    lines, removed_lines = clean_lines(resume_text)
+    sections = _split_sections(lines)
+    cleaned_text = "\n\n".join(sections)
+
+    if count_tokens(cleaned_text) <= token_budget or not sections:
+        return PreprocessedResume(cleaned_text, tokens_before, count_tokens(cleaned_text), removed_lines, 0)
+
+    requirement_keywords = keywords(role_requirements)
+    section_tokens = [count_tokens(section) for section in sections]
+    ranked = sorted(
+        range(1, len(sections)),
+        key=lambda i: (len(keywords(sections[i]) & requirement_keywords), -i),
+        reverse=True
+    )
+
+    kept = {0}
+    used = section_tokens[0]
+    for index in ranked:
+        if used + section_tokens[index] <= token_budget:
+            kept.add(index)
+            used += section_tokens[index]
+
+    trimmed_text = "\n\n".join(sections[i] for i in sorted(kept))
+    if used > token_budget:
+        trimmed_text = _truncate_to_tokens(trimmed_text, token_budget)
+
+    return PreprocessedResume(
+        text=trimmed_text,
+        tokens_before=tokens_before,
+        tokens_after=count_tokens(trimmed_text),
+        removed_lines=removed_lines,
+        dropped_sections=len(sections) - len(kept)
+    )
@@ -0,0 +1,103 @@
+import json
+import threading
+from enum import Enum
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+_stats = {"responses": 0, "parsed": 0, "repaired": 0, "failed": 0}
+_stats_lock = threading.Lock()
+
+
+class ExperienceLevel(str, Enum):
+    INTERN = "intern"
+    FRESHER = "fresher"
+    JUNIOR = "junior"
+    MID = "mid"
+    SENIOR = "senior"
+    LEADER = "leader"
+    MANAGER = "manager"
+
+
+class ResumeFeedback(BaseModel):
+    matching_skills: list[str] = Field(default_factory=list)
+    matching_skills_score: int = Field(ge=0, le=100)
+    missing_skills: list[str] = Field(default_factory=list)
+    project_evaluation: str
+    overall_fit: str
+    overall_fit_score: int = Field(ge=0, le=100)
+    experience_level: ExperienceLevel
+
+    @field_validator("experience_level", mode="before")
+    @classmethod
+    def normalize_experience_level(cls, value):
+        return value.strip().lower() if isinstance(value, str) else value
+
+
+class PrescreenFeedback(ResumeFeedback):
+    """Feedback for a resume rejected by keyword pre-screening, which no model assessed."""
+    experience_level: ExperienceLevel | None = None
+
+
+class ResumeAnalysis(BaseModel):
+    selected: bool
+    feedback: ResumeFeedback
+
+
+class AnalysisParseError(ValueError):
+    """The model output could not be turned into a valid ResumeAnalysis."""
+
+
+def extract_json_object(text: str) -> str:
+    """Return the first balanced {...} object in text, ignoring code fences and surrounding prose."""
+    start = text.find("{")
+    if start == -1:
+        raise AnalysisParseError("No JSON object found in response.")
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+
+    raise AnalysisParseError("Unterminated JSON object in response.")
+
+
+def parse_resume_analysis(text: str) -> ResumeAnalysis:
+    """Tolerantly extract and validate an analysis from raw model output."""
+    try:
+        return ResumeAnalysis.model_validate(json.loads(extract_json_object(text)))
+    except (json.JSONDecodeError, ValidationError) as e:
+        raise AnalysisParseError(str(e)) from e
+
+
+def record_parse_outcome(outcome: str):
+    """Count one analyzer response as 'parsed', 'repaired' or 'failed'."""
+    with _stats_lock:
+        _stats["responses"] += 1
+        _stats[outcome] += 1
+
+
+def get_parse_stats() -> dict:
+    """Return parse outcome counters and the share of responses that needed a repair or were lost."""
+    with _stats_lock:
+        stats = dict(_stats)
+
+    responses = stats["responses"]
+    stats["repair_rate"] = stats["repaired"] / responses if responses else 0.0
+    stats["failure_rate"] = stats["failed"] / responses if responses else 0.0
+    return stats
@@ -0,0 +1,235 @@
+"""Headless screening pipeline: explicit config in, explicit result out, no Streamlit session.
+
+The Streamlit app is a thin adapter over screen_candidate; this module's entry point runs the same
+pipeline over a JSONL file of jobs in parallel processes:
+
+    python screening_service.py jobs.jsonl --processes 4 > outcomes.jsonl
+
+Each job line is {"role": ..., "role_requirements": ..., "resume_path": ..., "candidate_email": ...}.
+Emails are queued in the outbox; run `python outbox.py` to send them.
+"""
+import json
+import os
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass, field
+
+from agents import resume_analyzer
+from candidate_store import save_analysis
+from database import db_config_from_env, db_config_from_settings
+from mailer import EMAIL_MODE
+from metrics import logger
+from prescreen import PRESCREEN_ENABLED, ROUTE_REJECT, prescreen_feedback, prescreen_resume
+from rate_limiter import PRIORITY_BATCH, PRIORITY_INTERACTIVE, llm_priority
+from recruitment_utils import SLOT_SEARCH_HORIZON_DAYS, book_interview, queue_rejection_email, run_resume_analysis
+from resume_preprocessing import preprocess_resume
+from utils import extract_text_from_pdf_bytes
+
+
+@dataclass
+class ServiceConfig:
+    """Everything the pipeline needs that used to be read from st.session_state."""
+    openai_api_key: str
+    email_sender: str = ""
+    email_passkey: str = ""
+    company_name: str = ""
+    email_mode: str = EMAIL_MODE
+    zoom_link: str = "N/A"
+    zoom_passcode: str = "N/A"
+    db_config: dict | None = None
+    interview_horizon_days: int = SLOT_SEARCH_HORIZON_DAYS
+
+    @classmethod
+    def from_env(cls) -> "ServiceConfig":
+        return cls(
+            openai_api_key=os.getenv("OPENAI_API_KEY", ""),
+            email_sender=os.getenv("EMAIL_ADDRESS", ""),
+            email_passkey=os.getenv("EMAIL_APP_PASSWORD", ""),
+            company_name=os.getenv("COMPANY_NAME", ""),
+            zoom_link=os.getenv("ZOOM_LINK", "N/A"),
+            zoom_passcode=os.getenv("ZOOM_PASSCODE", "N/A"),
+            db_config=db_config_from_env()
+        )
+
+    @classmethod
+    def from_settings(cls, settings) -> "ServiceConfig":
+        """Build the config from a session-shaped mapping, e.g. st.session_state."""
+        return cls(
+            openai_api_key=settings.get("openai_api_key", ""),
+            email_sender=settings.get("email_sender", ""),
+            email_passkey=settings.get("email_passkey", ""),
+            company_name=settings.get("company_name", ""),
+            email_mode=settings.get("email_mode", EMAIL_MODE),
+            zoom_link=settings.get("zoom_link") or "N/A",
+            zoom_passcode=settings.get("zoom_passcode") or "N/A",
+            db_config=db_config_from_settings(settings)
+        )
+
+    def outbox_settings(self) -> dict:
+        """Email settings in the shape the outbox worker sends with."""
+        return {
+            "openai_api_key": self.openai_api_key,
+            "email_sender": self.email_sender,
+            "email_passkey": self.email_passkey,
+            "company_name": self.company_name,
+            "email_mode": self.email_mode
+        }
+
+
+@dataclass
+class ScreeningJob:
+    """One resume to screen for one role. Give either resume_bytes (a PDF) or resume_text."""
+    role: str
+    role_requirements: str
+    resume_name: str = ""
+    resume_bytes: bytes | None = field(default=None, repr=False)
+    resume_text: str = field(default="", repr=False)
+    candidate_email: str = ""
+    queue_rejection: bool = True
+    schedule_if_selected: bool = True
+    priority: str = PRIORITY_INTERACTIVE
+    # Idempotency key for the interview booking, so a job that runs twice books one interview.
+    booking_key: str = ""
+
+
+@dataclass
+class ScreeningOutcome:
+    """What happened to one job; error is set instead of raising so batches keep going."""
+    resume_name: str
+    candidate_email: str
+    selected: bool = False
+    feedback: dict | None = None
+    source: str = "llm"
+    route: str | None = None
+    tokens_before: int = 0
+    tokens_after: int = 0
+    interview_time: str | None = None
+    rejection_queued: bool = False
+    error: str | None = None
+    resume_text: str = field(default="", repr=False)
+
+    def to_dict(self) -> dict:
+        outcome = asdict(self)
+        del outcome["resume_text"]
+        return outcome
+
+
+def screen_candidate(job: ScreeningJob, config: ServiceConfig, analyzer=None) -> ScreeningOutcome:
+    """Extract, pre-screen, analyze and store one resume, then book an interview or queue the rejection.
+
+    Pass analyzer to reuse an agent across calls; otherwise one is checked out for config.openai_api_key.
+    """
+    outcome = ScreeningOutcome(job.resume_name, job.candidate_email)
+
+    resume_text = job.resume_text
+    if not resume_text and job.resume_bytes:
+        try:
+            resume_text = extract_text_from_pdf_bytes(job.resume_bytes)
+        except Exception as e:
+            outcome.error = f"Could not read PDF: {e}"
+            return outcome
+    if not resume_text:
+        outcome.error = "No text could be extracted from the resume."
+        return outcome
+    outcome.resume_text = resume_text
+
+    prepared = preprocess_resume(resume_text, job.role_requirements)
+    outcome.tokens_before, outcome.tokens_after = prepared.tokens_before, prepared.tokens_after
+
+    prescreened = prescreen_resume(resume_text, job.role_requirements) if PRESCREEN_ENABLED else None
+    if prescreened:
+        outcome.route = prescreened.route
+
+    if prescreened and prescreened.route == ROUTE_REJECT:
+        selected, feedback = False, prescreen_feedback(prescreened)
+        outcome.source = "prescreen"
+    else:
+        if not analyzer and not config.openai_api_key:
+            outcome.error = "An OpenAI API key is required to analyze resumes."
+            return outcome
+        with nullcontext(analyzer) if analyzer else resume_analyzer(config.openai_api_key) as agent, llm_priority(job.priority):
+            selected, feedback = run_resume_analysis(prepared.text, job.role, job.role_requirements, agent)
+
+    if isinstance(feedback, str):
+        outcome.error = feedback
+        return outcome
+    outcome.selected, outcome.feedback = selected, feedback
+
+    try:
+        save_analysis(
+            resume_text, job.role, job.role_requirements, selected, feedback,
+            candidate_email=job.candidate_email or None,
+            resume_name=job.resume_name or None,
+            source=outcome.source,
+            db_config=config.db_config
+        )
+    except Exception as e:
+        logger.error(f"Error saving analysis: {e}")
+
+    if not job.candidate_email:
+        return outcome
+
+    if selected and job.schedule_if_selected:
+        outcome.interview_time = book_interview(
+            job.candidate_email, job.role, config.zoom_link, config.zoom_passcode,
+            db_config=config.db_config, sender_email=config.email_sender, horizon_days=config.interview_horizon_days,
+            booking_key=job.booking_key or None
+        )
+        if not outcome.interview_time:
+            outcome.error = "No available interview slots."
+    elif not selected and job.queue_rejection:
+        try:
+            queue_rejection_email(
+                job.candidate_email, job.role, feedback, db_config=config.db_config, sender_email=config.email_sender
+            )
+            outcome.rejection_queued = True
+        except Exception as e:
+            logger.error(f"Error queueing rejection email: {e}")
+            outcome.error = "Could not queue the feedback email."
+
+    return outcome
+
+
+def _screen_job_line(line: str, config: ServiceConfig) -> dict:
+    """Process-pool entry point: parse one JSONL job, run it and return the outcome as a dict."""
+    spec = json.loads(line)
+    spec.setdefault("priority", PRIORITY_BATCH)
+    resume_path = spec.pop("resume_path", None)
+    job = ScreeningJob(**spec)
+    if resume_path:
+        job.resume_name = job.resume_name or os.path.basename(resume_path)
+        with open(resume_path, "rb") as resume_file:
+            job.resume_bytes = resume_file.read()
+
+    try:
+        return screen_candidate(job, config).to_dict()
+    except Exception as e:
+        logger.error(f"❌ Screening job failed for {job.resume_name}: {e}")
+        return ScreeningOutcome(job.resume_name, job.candidate_email, error=str(e)).to_dict()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    from database import create_table
+
+    parser = argparse.ArgumentParser(description="Screen a JSONL file of resumes in parallel processes.")
+    parser.add_argument("jobs", help="JSONL file with one screening job per line, or - for stdin")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    service_config = ServiceConfig.from_env()
+    if service_config.db_config:
+        create_table(service_config.db_config)
+
+    jobs_file = sys.stdin if args.jobs == "-" else open(args.jobs)
+    with jobs_file, ProcessPoolExecutor(max_workers=args.processes) as pool:
+        job_lines = [line for line in jobs_file if line.strip()]
+        for outcome in pool.map(partial(_screen_job_line, config=service_config), job_lines):
+            print(json.dumps(outcome), flush=True)
@@ -0,0 +1,87 @@
+"""Container entrypoint: start the probe and initialize the process, then hand over to Streamlit.
+
+Streamlit only runs main.py when a browser session connects, so a probe, schema check or worker
+started from there waits for the first visitor, and a fresh task never passes its readiness check.
+This does that work once when the process starts; /readyz turns 200 after it has finished and the
+Streamlit server accepts connections.
+
+    python server.py --server.port=8080 --server.address=0.0.0.0
+"""
+import os
+import socket
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Module-level settings (SMTP, pool sizes, cache paths) are read from the environment at import time.
+load_dotenv()
+
+from startup import mark_ready, phase, start_probe_server
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+SERVER_START_TIMEOUT = 120
+DEFAULT_SERVER_PORT = 8501
+
+
+def init_process():
+    """Import the app's modules, then check the schema and start the workers for the environment's config.
+
+    Sessions configured with the same database and sender reuse these workers; others start their own.
+    """
+    with phase("imports"):
+        from database import create_table
+        from job_queue import start_screening_worker
+        from outbox import start_outbox_worker
+        from recruitment_utils import deliver_outbox_email
+        from screening_service import ServiceConfig
+
+    config = ServiceConfig.from_env()
+    if not config.db_config:
+        # The schema check and workers then start with the first session that configures a database.
+        return
+
+    with phase("schema"):
+        create_table(config.db_config)
+    with phase("workers"):
+        start_outbox_worker(config.db_config, config.outbox_settings(), deliver_outbox_email)
+        start_screening_worker(config)
+
+
+def server_port(args: list[str]) -> int:
+    """The port Streamlit will listen on, from --server.port or its environment variable."""
+    for index, arg in enumerate(args):
+        if arg.startswith("--server.port="):
+            return int(arg.split("=", 1)[1])
+        if arg == "--server.port" and index + 1 < len(args):
+            return int(args[index + 1])
+    return int(os.getenv("STREAMLIT_SERVER_PORT", DEFAULT_SERVER_PORT))
+
+
+def mark_ready_when_listening(port: int, timeout: float = SERVER_START_TIMEOUT):
+    """Mark the process ready once the Streamlit server accepts connections on port."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                mark_ready()
+                return
+        except OSError:
+            time.sleep(0.2)
+    print(f"❌ Streamlit did not accept connections on port {port} within {timeout:.0f}s")
+
+
+if __name__ == "__main__":
+    start_probe_server()
+    init_process()
+
+    streamlit_args = sys.argv[1:]
+    threading.Thread(
+        target=mark_ready_when_listening, args=(server_port(streamlit_args),), name="startup-ready", daemon=True
+    ).start()
+
+    from streamlit.web import cli
+
+    sys.argv = ["streamlit", "run", APP_SCRIPT, *streamlit_args]
+    sys.exit(cli.main())
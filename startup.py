@@ -0,0 +1,93 @@
+"""Process startup bookkeeping and a small HTTP probe for container health checks.
+
+Phases (imports, schema check, worker start) are timed once per process. The probe serves
+/healthz (process is up), /readyz (503 until init has finished) and /metrics (Prometheus text).
+server.py starts it and runs the init when the container starts, before any session connects.
+
+Measure import cost with:
+
+    python -X importtime -c "import main" 2> importtime.log
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metrics import render_prometheus
+
+PROBE_PORT = int(os.getenv("PROBE_PORT", "8081"))
+PROCESS_STARTED = time.monotonic()
+
+_phases = {}
+_ready = threading.Event()
+_probe = None
+_probe_lock = threading.Lock()
+
+
+@contextmanager
+def phase(name: str):
+    """Time a startup phase; only its first run in this process is recorded."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.setdefault(name, round(1000 * (time.perf_counter() - started), 3))
+
+
+def mark_ready():
+    if not _ready.is_set():
+        _phases.setdefault("time_to_ready", round(1000 * (time.monotonic() - PROCESS_STARTED), 3))
+        _ready.set()
+
+
+def get_startup_report() -> dict:
+    return {
+        "ready": _ready.is_set(),
+        "uptime_seconds": round(time.monotonic() - PROCESS_STARTED, 3),
+        "phases_ms": dict(_phases)
+    }
+
+
+class ProbeHandler(BaseHTTPRequestHandler):
+    def _send(self, status: int, body: str, content_type: str = "application/json"):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            self._send(200, json.dumps({"status": "ok"}))
+        elif self.path == "/readyz":
+            self._send(200 if _ready.is_set() else 503, json.dumps(get_startup_report()))
+        elif self.path == "/metrics":
+            self._send(200, render_prometheus(), "text/plain; version=0.0.4")
+        else:
+            self._send(404, json.dumps({"error": "not found"}))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_probe_server(port: int = PROBE_PORT) -> ThreadingHTTPServer | None:
+    """Serve the probe endpoints from a daemon thread, once per process; port 0 disables it."""
+    global _probe
+
+    if not port:
+        return None
+
+    with _probe_lock:
+        if _probe is None:
+            try:
+                _probe = ThreadingHTTPServer(("0.0.0.0", port), ProbeHandler)
+            except OSError as e:
+                print(f"❌ Could not start probe server on port {port}: {e}")
+                return None
+            _probe.daemon_threads = True
+            threading.Thread(target=_probe.serve_forever, name="startup-probe", daemon=True).start()
+            print(f"✅ Probe server listening on port {port}")
+        return _probe
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from benchmark import SQLiteConnection, create_sqlite_database  # noqa: E402
+from interview_calendar import invalidate_calendars  # noqa: E402
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """Route every DB call to a fresh SQLite database built from the benchmark schema."""
+    path = str(tmp_path / "app.sqlite3")
+    create_sqlite_database(path)
+    database.use_connection_factory(lambda: SQLiteConnection(path))
+    invalidate_calendars()
+    try:
+        yield path
+    finally:
+        database.use_connection_factory(None)
+        invalidate_calendars()
+
+
+@pytest.fixture
+def analysis_cache_path(tmp_path, monkeypatch):
+    """Give each test an empty analysis cache."""
+    import analysis_cache
+
+    path = str(tmp_path / "analysis_cache.sqlite3")
+    monkeypatch.setattr(analysis_cache, "CACHE_PATH", path)
+    monkeypatch.setattr(analysis_cache, "_schema_ready", False)
+    return path
+
+
+@pytest.fixture
+def unlimited_llm():
+    """Replace the process-wide limiter with one that never waits on quota."""
+    from rate_limiter import RateLimiter, use_rate_limiter
+
+    limiter = RateLimiter(rpm=0, tpm=0, max_concurrency=8)
+    use_rate_limiter(limiter)
+    try:
+        yield limiter
+    finally:
+        use_rate_limiter(None)
@@ -0,0 +1,33 @@
+import benchmark
+
+
+def test_scenario_runs_the_screening_service_end_to_end(analysis_cache_path):
+    sink = benchmark.SMTPSink()
+    try:
+        result = benchmark.run_scenario(20, 0.5, latency=0.0, workers=4, sink=sink)
+    finally:
+        sink.shutdown()
+        sink.server_close()
+
+    assert result["selected"] > 0
+    assert result["scheduled"] == result["selected"]
+    rejected = result["candidates"] - result["selected"]
+    assert result["emails_sent"] == 2 * result["scheduled"] + rejected
+    assert set(result["stages"]) == {"extract", "analyze", "schedule", "email"}
+    assert result["stages"]["schedule"]["max_ms"] > 0
+
+
+def test_sqlite_shim_runs_mysql_upserts(sqlite_db):
+    from candidate_store import save_analysis
+
+    feedback = {"overall_fit_score": 80, "matching_skills_score": 70, "matching_skills": ["python"]}
+    first = save_analysis("resume", "backend", "python", True, feedback, candidate_email="a@example.com")
+    second = save_analysis("resume", "backend", "python", True, feedback)
+
+    conn = benchmark.SQLiteConnection(sqlite_db)
+    rows = conn.execute("SELECT candidate_id, role_id FROM analyses ORDER BY id").fetchall()
+    email = conn.execute("SELECT email FROM candidates").fetchall()
+    conn.close()
+    assert second > first
+    assert rows[0] == rows[1]
+    assert email == [("a@example.com",)]
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+import candidate_index
+from candidate_index import CandidateIndex, best_candidates_for_role, embed, shortlist_jobs
+from candidate_store import save_analysis
+from rate_limiter import PRIORITY_BATCH
+
+REQUIREMENTS = "python, django, postgresql"
+RESUMES = {
+    "backend@example.com": "Backend engineer: python, django and postgresql services for five years.",
+    "java@example.com": "Java developer building spring microservices on kafka.",
+    "chef@example.com": "Pastry chef running a bakery kitchen and French cuisine menus.",
+    "data@example.com": "Data engineer writing python pipelines on postgresql and airflow."
+}
+FEEDBACK = {"overall_fit_score": 50, "matching_skills_score": 50, "experience_level": "mid"}
+
+
+def add_candidates(emails, role_requirements="java, spring"):
+    for email in emails:
+        save_analysis(RESUMES[email], "engineer", role_requirements, False, FEEDBACK, candidate_email=email)
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    """A fresh on-disk location for the process-wide indexes."""
+    path = str(tmp_path / "candidate_index")
+    monkeypatch.setattr(candidate_index, "CANDIDATE_INDEX_DIR", path)
+    monkeypatch.setattr(candidate_index, "_indexes", {})
+    return path
+
+
+@pytest.fixture
+def embed_calls(monkeypatch):
+    calls = []
+
+    def counting_embed(text, dim=candidate_index.CANDIDATE_INDEX_DIM):
+        calls.append(text)
+        return embed(text, dim)
+
+    monkeypatch.setattr(candidate_index, "embed", counting_embed)
+    return calls
+
+
+def test_embedding_is_deterministic_normalized_and_topical():
+    backend = embed(RESUMES["backend@example.com"])
+
+    assert np.array_equal(backend, embed(RESUMES["backend@example.com"]))
+    assert np.linalg.norm(backend) == pytest.approx(1.0, abs=1e-5)
+    query = embed(REQUIREMENTS)
+    assert query @ backend > query @ embed(RESUMES["chef@example.com"])
+
+
+def test_refresh_only_appends_new_candidates(sqlite_db, index_dir, embed_calls):
+    add_candidates(["backend@example.com", "java@example.com"])
+    index = CandidateIndex(None, index_dir)
+    assert index.refresh(force=True) == 2
+    first_ids, first_vectors = index._ids.copy(), np.array(index._vectors)
+
+    add_candidates(["chef@example.com", "data@example.com"])
+    embed_calls.clear()
+
+    assert index.refresh(force=True) == 2
+    assert sorted(embed_calls) == sorted([RESUMES["chef@example.com"], RESUMES["data@example.com"]])
+    assert list(index._ids[:2]) == list(first_ids)
+    assert np.array_equal(index._vectors[:2], first_vectors)
+
+    # A restart loads the saved vectors instead of embedding every resume again.
+    embed_calls.clear()
+    reloaded = CandidateIndex(None, index_dir)
+    assert len(reloaded) == 4
+    assert reloaded.refresh(force=True) == 0
+    assert embed_calls == []
+
+
+def test_search_never_returns_excluded_ids(sqlite_db, index_dir):
+    add_candidates(RESUMES)
+    index = CandidateIndex(None, index_dir)
+    index.refresh(force=True)
+    best_id, _ = index.search(REQUIREMENTS, top_k=1)[0]
+
+    matches = index.search(REQUIREMENTS, top_k=10, exclude_ids={best_id})
+
+    assert len(matches) == len(RESUMES) - 1
+    assert best_id not in [candidate_id for candidate_id, _ in matches]
+    similarities = [similarity for _, similarity in matches]
+    assert similarities == sorted(similarities, reverse=True)
+
+
+def test_best_candidates_skip_those_analyzed_against_the_same_requirements(sqlite_db, index_dir):
+    add_candidates(["java@example.com", "chef@example.com", "data@example.com"])
+    add_candidates(["backend@example.com"], role_requirements=REQUIREMENTS)
+
+    matches = best_candidates_for_role(REQUIREMENTS, top_k=2)
+
+    assert len(matches) == 2
+    assert matches[0].email == "data@example.com"
+    assert matches[0].similarity >= matches[1].similarity
+    assert "backend@example.com" not in [match.email for match in matches]
+    assert "backend@example.com" in [
+        match.email for match in best_candidates_for_role(REQUIREMENTS, top_k=4, skip_analyzed=False)
+    ]
+
+
+def test_shortlist_jobs_only_review_the_top_candidates(sqlite_db, index_dir):
+    add_candidates(RESUMES)
+
+    jobs = shortlist_jobs("backend", REQUIREMENTS, top_n=2)
+
+    assert len(jobs) == 2
+    assert {job.candidate_email for job in jobs} == {"backend@example.com", "data@example.com"}
+    assert all(job.resume_text == RESUMES[job.candidate_email] for job in jobs)
+    assert all(
+        (job.queue_rejection, job.schedule_if_selected, job.priority) == (False, False, PRIORITY_BATCH)
+        for job in jobs
+    )
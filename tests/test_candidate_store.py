@@ -0,0 +1,84 @@
+import sqlite3
+
+from candidate_store import list_role_versions, list_roles, page_analyses, save_analysis, text_hash
+
+OLD_REQUIREMENTS = "python, django"
+NEW_REQUIREMENTS = "python, django, kubernetes"
+
+
+def seed(path, analyses):
+    """analyses: (candidate number, requirements, overall fit score, selected) in creation order."""
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO roles (id, title, requirements) VALUES (1, 'backend', ?)", (NEW_REQUIREMENTS,))
+    for number in sorted({row[0] for row in analyses}):
+        conn.execute(
+            "INSERT INTO candidates (id, email, resume_hash, resume_text) VALUES (?, ?, ?, ?)",
+            (number, f"candidate{number}@example.com", f"hash{number}", f"resume {number}")
+        )
+    for number, requirements, score, selected in analyses:
+        conn.execute("""
+            INSERT INTO analyses (
+                candidate_id, role_id, requirements_hash, selected, overall_fit_score, matching_skills_score,
+                experience_level, matching_skills, missing_skills, feedback
+            ) VALUES (?, 1, ?, ?, ?, ?, 'mid', '[]', '[]', '{}')
+        """, (number, text_hash(requirements), int(selected), score, score))
+    conn.commit()
+    conn.close()
+
+
+def all_pages(**filters):
+    rows, cursor = [], None
+    while True:
+        page, cursor = page_analyses(1, after=cursor, page_size=2, **filters)
+        rows += page
+        if not cursor:
+            return rows
+
+
+def test_each_candidate_appears_once_with_their_latest_analysis(sqlite_db):
+    seed(sqlite_db, [
+        (1, OLD_REQUIREMENTS, 90, True),
+        (2, OLD_REQUIREMENTS, 80, True),
+        (3, OLD_REQUIREMENTS, 70, False),
+        (1, NEW_REQUIREMENTS, 40, False),
+        (2, NEW_REQUIREMENTS, 85, True),
+        (2, NEW_REQUIREMENTS, 60, True)
+    ])
+
+    rows = all_pages()
+
+    assert [(row["email"], row["overall_fit_score"]) for row in rows] == [
+        ("candidate3@example.com", 70),
+        ("candidate2@example.com", 60),
+        ("candidate1@example.com", 40)
+    ]
+
+
+def test_filters_apply_to_the_latest_analysis(sqlite_db):
+    seed(sqlite_db, [(1, OLD_REQUIREMENTS, 90, True), (1, NEW_REQUIREMENTS, 40, False), (2, OLD_REQUIREMENTS, 75, True)])
+
+    assert [row["email"] for row in all_pages(selected_only=True)] == ["candidate2@example.com"]
+    assert [row["email"] for row in all_pages(min_fit_score=50)] == ["candidate2@example.com"]
+
+
+def test_requirements_filter_takes_the_latest_analysis_for_that_version(sqlite_db):
+    seed(sqlite_db, [
+        (1, OLD_REQUIREMENTS, 90, True),
+        (1, OLD_REQUIREMENTS, 95, True),
+        (1, NEW_REQUIREMENTS, 40, False),
+        (2, NEW_REQUIREMENTS, 75, True)
+    ])
+
+    rows = all_pages(requirements=OLD_REQUIREMENTS)
+
+    assert [(row["email"], row["overall_fit_score"]) for row in rows] == [("candidate1@example.com", 95)]
+
+
+def test_save_analysis_leaves_an_existing_roles_requirements_and_versions_alone(sqlite_db):
+    feedback = {"overall_fit_score": 80, "matching_skills_score": 70, "matching_skills": ["python"]}
+    save_analysis("resume 1", "backend", OLD_REQUIREMENTS, True, feedback)
+    save_analysis("resume 2", "backend", NEW_REQUIREMENTS, True, feedback)
+
+    role = list_roles()[0]
+    assert role["requirements"] == OLD_REQUIREMENTS
+    assert list_role_versions(role["id"]) == []
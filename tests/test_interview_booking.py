@@ -0,0 +1,88 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from interview_calendar import InterviewCalendar, get_calendar
+from recruitment_utils import reserve_interview_slot
+
+
+def booked_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT candidate_email, interviewer_id, interview_time FROM interview_schedule").fetchall()
+    finally:
+        conn.close()
+
+
+def test_concurrent_reservations_never_double_book_or_drop_candidates(sqlite_db):
+    emails = [f"candidate{i}@example.com" for i in range(40)]
+
+    # A calendar per booking, as in separate tasks: no in-process claim keeps them off the same slot.
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        bookings = list(executor.map(lambda email: InterviewCalendar(None, 30).book(email, horizon_days=30), emails))
+
+    assert all(bookings), "every candidate should get a slot"
+    assert len({(booking.interviewer_id, booking.start) for booking in bookings}) == len(emails)
+    rows = booked_rows(sqlite_db)
+    assert sorted(row[0] for row in rows) == sorted(emails)
+    assert len({(row[1], row[2]) for row in rows}) == len(rows)
+
+
+def test_concurrent_reservations_in_one_process_share_the_calendar(sqlite_db):
+    emails = [f"shared{i}@example.com" for i in range(20)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        times = list(executor.map(lambda email: reserve_interview_slot(email, horizon_days=30), emails))
+
+    assert all(times)
+    assert len(set(times)) == len(emails)
+
+
+def test_book_many_assigns_distinct_slots_in_one_pass(sqlite_db):
+    emails = [f"batch{i}@example.com" for i in range(12)]
+    queued = []
+
+    bookings = get_calendar().book_many(
+        emails, horizon_days=30, before_commit=lambda cursor, email, interview_time: queued.append(email)
+    )
+
+    assert set(bookings) == set(emails)
+    assert all(bookings.values())
+    assert len({booking.start for booking in bookings.values()}) == len(emails)
+    assert sorted(queued) == sorted(emails)
+    assert len(booked_rows(sqlite_db)) == len(emails)
+
+
+def test_booking_after_another_process_took_the_slot_retries(sqlite_db):
+    calendar = get_calendar()
+    first = calendar.find_earliest(horizon_days=30)
+    conn = sqlite3.connect(sqlite_db)
+    conn.execute(
+        "INSERT INTO interview_schedule (candidate_email, interviewer_id, interview_time, end_time) VALUES (?, ?, ?, ?)",
+        ("other@example.com", first.interviewer_id, first.start, first.end)
+    )
+    conn.commit()
+    conn.close()
+
+    booking = calendar.book("late@example.com", horizon_days=30)
+
+    assert booking is not None
+    assert booking.start != first.start
+
+
+def test_retried_job_with_the_same_booking_key_books_once(sqlite_db):
+    queued = []
+
+    def queue_email(cursor, interview_time):
+        queued.append(interview_time)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        times = list(executor.map(
+            lambda _: reserve_interview_slot(
+                "retry@example.com", horizon_days=30, before_commit=queue_email, booking_key="screening-job-7"
+            ),
+            range(4)
+        ))
+
+    assert len(set(times)) == 1 and times[0]
+    assert len(booked_rows(sqlite_db)) == 1
+    assert queued == times[:1]
@@ -0,0 +1,63 @@
+import smtplib
+
+import pytest
+
+import mailer
+from benchmark import SMTPSink
+from mailer import SMTPMailer
+
+CREDENTIALS = ("bot@example.com", "app-password")
+
+
+@pytest.fixture
+def sink():
+    server = SMTPSink(credentials=CREDENTIALS)
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def make_mailer(sink, passkey=CREDENTIALS[1]):
+    return SMTPMailer(CREDENTIALS[0], passkey, "Recruiting", host="127.0.0.1", port=sink.port, use_ssl=False)
+
+
+def test_logs_in_once_and_reuses_the_connection(sink):
+    smtp_mailer = make_mailer(sink)
+    try:
+        for i in range(3):
+            smtp_mailer.send(f"candidate{i}@example.com", "Hello", "Body")
+    finally:
+        smtp_mailer.close()
+
+    assert sink.messages == 3
+    assert sink.connections == 1
+    assert sink.logins == [CREDENTIALS[0]]
+
+
+def test_reconnects_and_logs_in_again_after_idle_timeout(sink, monkeypatch):
+    smtp_mailer = make_mailer(sink)
+    try:
+        smtp_mailer.send("first@example.com", "Hello", "Body")
+        monkeypatch.setattr(mailer, "SMTP_IDLE_TIMEOUT", 0)
+        smtp_mailer.send("second@example.com", "Hello", "Body")
+    finally:
+        smtp_mailer.close()
+
+    assert sink.messages == 2
+    assert sink.connections == 2
+    assert sink.logins == [CREDENTIALS[0]] * 2
+
+
+def test_wrong_password_is_rejected(sink):
+    smtp_mailer = make_mailer(sink, passkey="wrong")
+    with pytest.raises(smtplib.SMTPAuthenticationError):
+        smtp_mailer.send("candidate@example.com", "Hello", "Body")
+    assert sink.messages == 0
+
+
+def test_sending_without_login_is_refused_like_gmail(sink):
+    smtp_mailer = make_mailer(sink, passkey="")
+    with pytest.raises(smtplib.SMTPSenderRefused):
+        smtp_mailer.send("candidate@example.com", "Hello", "Body")
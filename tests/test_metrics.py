@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+import metrics
+from metrics import InstrumentedCursor, request_scope, traced
+
+ITERATIONS = 20_000
+# Per call; instrumented stages take milliseconds (DB) to seconds (LLM), so this stays under 1%.
+MAX_SPAN_OVERHEAD_SECONDS = 50e-6
+MAX_CURSOR_OVERHEAD_SECONDS = 20e-6
+
+
+def per_call_seconds(func, repeats: int = 5) -> float:
+    """Best of several runs, to keep scheduler noise out of the comparison."""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(ITERATIONS):
+            func()
+        best = min(best, time.perf_counter() - started)
+    return best / ITERATIONS
+
+
+@pytest.fixture(autouse=True)
+def quiet_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_JSON_LOGS", False)
+
+
+def test_traced_call_overhead_is_bounded():
+    def work():
+        return sum(range(10))
+
+    bare = per_call_seconds(work)
+    instrumented = per_call_seconds(traced("overhead_check")(work))
+
+    assert instrumented - bare < MAX_SPAN_OVERHEAD_SECONDS
+
+
+def test_traced_call_inside_a_request_scope_counts_spans():
+    stage = traced("overhead_check")(lambda: None)
+
+    with request_scope("overhead_check") as request:
+        for _ in range(3):
+            stage()
+
+    assert request["spans"] == 3
+
+
+def test_instrumented_cursor_overhead_is_bounded():
+    class BareCursor:
+        def execute(self, operation, params=None):
+            return None
+
+    bare_cursor = BareCursor()
+    cursor = InstrumentedCursor(BareCursor())
+
+    bare = per_call_seconds(lambda: bare_cursor.execute("SELECT 1"))
+    instrumented = per_call_seconds(lambda: cursor.execute("SELECT 1"))
+
+    assert instrumented - bare < MAX_CURSOR_OVERHEAD_SECONDS
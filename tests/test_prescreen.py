@@ -0,0 +1,40 @@
+from prescreen import ROUTE_REJECT, prescreen_feedback, prescreen_resume, prescreen_resumes, skill_phrases
+from resume_schema import PrescreenFeedback
+
+REQUIREMENTS = (
+    "5+ years of experience in Java. Must be proficient in building microservices on AWS. "
+    "Familiarity with cloud platforms is a plus."
+)
+
+
+def test_skill_phrases_drop_filler_numbers_and_nice_to_haves():
+    assert skill_phrases(REQUIREMENTS) == ["java", "microservices", "aws"]
+
+
+def test_skill_phrases_split_lists_and_keep_multiword_skills():
+    requirements = "- Strong knowledge of Python and Django\n- PostgreSQL or MySQL\n- Docker/Kubernetes\n- 3+ years building REST APIs"
+
+    assert skill_phrases(requirements) == ["python", "django", "postgresql", "mysql", "docker", "kubernetes", "rest apis"]
+
+
+def test_matching_resume_is_not_rejected():
+    result = prescreen_resume("Backend engineer: 6 years of Java and Spring Boot microservices deployed on AWS.", REQUIREMENTS)
+
+    assert result.score == 1.0
+    assert result.missing_skills == []
+    assert result.route != ROUTE_REJECT
+
+
+def test_plural_and_singular_forms_match():
+    result = prescreen_resume("Designed a REST API and one microservice.", "REST APIs, microservices")
+
+    assert sorted(result.matched_skills) == ["microservices", "rest apis"]
+
+
+def test_unrelated_resume_is_rejected_with_valid_feedback():
+    result = prescreen_resumes(["Pastry chef with French cuisine and bakery management."], REQUIREMENTS)[0]
+
+    assert result.route == ROUTE_REJECT
+    assert sorted(result.missing_skills) == ["aws", "java", "microservices"]
+    feedback = PrescreenFeedback.model_validate(prescreen_feedback(result))
+    assert feedback.experience_level is None
@@ -0,0 +1,149 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from benchmark import FakeOpenAIServer
+from metrics import render_prometheus
+from rate_limiter import (
+    LLM_REQUEST_OVERHEAD_TOKENS,
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    RateLimiter,
+    request_tokens
+)
+from resume_preprocessing import count_tokens
+
+
+class ChatAgent:
+    """The parts of an agno Agent the limiter uses, calling the fake API through the openai client."""
+    description = "You are a recruiter."
+    instructions = ["Answer in one sentence", "Be polite"]
+
+    def __init__(self, server: FakeOpenAIServer):
+        from openai import OpenAI
+
+        # The limiter owns retries, as with the real agents.
+        self.client = OpenAI(api_key="test", base_url=f"http://127.0.0.1:{server.port}/v1", max_retries=0)
+        self.prompts = []
+
+    def run(self, prompt: str):
+        self.prompts.append(prompt)
+        return self.client.chat.completions.create(model="fake-llm", messages=[{"role": "user", "content": prompt}])
+
+
+def metric_value(name: str, **labels) -> float:
+    key = name + ("{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}" if labels else "")
+    for line in render_prometheus().splitlines():
+        metric, _, value = line.rpartition(" ")
+        if metric == key:
+            return float(value)
+    return 0.0
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def fake_openai():
+    servers = []
+
+    def start(**options):
+        server = FakeOpenAIServer(**options)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_429s_pause_the_queue_and_retry_until_admitted(fake_openai):
+    server = fake_openai(rpm=2, latency=0.0, window_seconds=0.4)
+    limiter = RateLimiter(rpm=0, tpm=0, max_concurrency=2)
+    agent = ChatAgent(server)
+    retries_before = metric_value("llm_retries_total", priority=PRIORITY_INTERACTIVE, reason="rate_limit")
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        responses = list(executor.map(
+            lambda i: limiter.call(lambda: agent.run(f"question {i}"), 10, PRIORITY_INTERACTIVE), range(6)
+        ))
+    elapsed = time.monotonic() - started
+
+    assert all(response.choices[0].message.content for response in responses)
+    assert server.requests == 6
+    assert server.rejected > 0
+    retries = metric_value("llm_retries_total", priority=PRIORITY_INTERACTIVE, reason="rate_limit") - retries_before
+    assert retries == server.rejected
+    # Six requests at two per window need the third window, whatever the order of retries.
+    assert elapsed >= 2 * 0.4
+
+
+def test_interactive_calls_start_before_queued_batch_calls(fake_openai):
+    server = fake_openai(rpm=0, latency=0.2)
+    limiter = RateLimiter(rpm=0, tpm=0, max_concurrency=1)
+    agent = ChatAgent(server)
+    waits_before = {
+        priority: (
+            metric_value("llm_queue_wait_seconds_count", priority=priority),
+            metric_value("llm_queue_wait_seconds_sum", priority=priority)
+        )
+        for priority in (PRIORITY_INTERACTIVE, PRIORITY_BATCH)
+    }
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(limiter.call, lambda: agent.run("running"), 10, PRIORITY_BATCH)]
+        wait_until(lambda: agent.prompts == ["running"])
+
+        queued = [
+            ("batch 1", PRIORITY_BATCH),
+            ("batch 2", PRIORITY_BATCH),
+            ("interactive 1", PRIORITY_INTERACTIVE),
+            ("interactive 2", PRIORITY_INTERACTIVE)
+        ]
+        for depth, (prompt, priority) in enumerate(queued, start=1):
+            futures.append(executor.submit(limiter.call, lambda prompt=prompt: agent.run(prompt), 10, priority))
+            wait_until(lambda depth=depth: metric_value("llm_queue_depth") == depth)
+        assert metric_value("llm_in_flight") == 1
+
+        for future in futures:
+            future.result()
+
+    assert agent.prompts == ["running", "interactive 1", "interactive 2", "batch 1", "batch 2"]
+    assert metric_value("llm_queue_depth") == 0
+    assert metric_value("llm_in_flight") == 0
+
+    waits = {
+        priority: (
+            metric_value("llm_queue_wait_seconds_count", priority=priority) - count,
+            metric_value("llm_queue_wait_seconds_sum", priority=priority) - total
+        )
+        for priority, (count, total) in waits_before.items()
+    }
+    assert waits[PRIORITY_INTERACTIVE][0] == 2
+    assert waits[PRIORITY_BATCH][0] == 3
+    # Each queued batch call waited behind both interactive calls.
+    assert waits[PRIORITY_BATCH][1] > waits[PRIORITY_INTERACTIVE][1] + 2 * 0.2
+
+
+def test_request_tokens_count_the_system_message_and_tools():
+    tool = SimpleNamespace(functions={"email_user": SimpleNamespace(to_dict=lambda: {"name": "email_user"})})
+    agent = SimpleNamespace(
+        description="You are a recruiter.",
+        instructions=["Answer in one sentence", "Be polite"],
+        expected_output=None,
+        tools=[tool]
+    )
+
+    expected = sum(count_tokens(part) for part in (
+        "You are a recruiter.", "Answer in one sentence", "Be polite", '{"name": "email_user"}', "Hello"
+    ))
+    assert request_tokens(agent, "Hello") == expected + LLM_REQUEST_OVERHEAD_TOKENS
+    assert request_tokens(agent, "Hello") > count_tokens("Hello") + LLM_REQUEST_OVERHEAD_TOKENS
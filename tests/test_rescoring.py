@@ -0,0 +1,151 @@
+from candidate_store import save_analysis
+from job_queue import complete_job, get_job, submit_job
+from rescoring import (
+    RUN_STATUS_ANALYZING,
+    RUN_STATUS_DONE,
+    SOURCE_PRESCREEN,
+    diff_requirements,
+    latest_rescore_run,
+    refresh_rescore_run,
+    rescore_analysis,
+    run_rescore,
+    start_rescore
+)
+from screening_service import ScreeningJob
+
+ROLE = "backend"
+FULL_REQUIREMENTS = "python, django, postgresql, docker"
+PYTHON_ONLY = "python"
+SENIOR_RESUME = "Senior engineer: python, django, postgresql and docker in production."
+JUNIOR_RESUME = "Junior developer writing python scripts."
+
+
+def analysis(selected: bool, score: int, matching: list[str], missing: list[str], source: str = "llm") -> dict:
+    return {
+        "selected": selected,
+        "overall_fit_score": score,
+        "matching_skills_score": score,
+        "matching_skills": matching,
+        "missing_skills": missing,
+        "source": source
+    }
+
+
+def feedback(score: int, matching: list[str], missing: list[str]) -> dict:
+    return {
+        "overall_fit_score": score,
+        "matching_skills_score": score,
+        "experience_level": "mid",
+        "matching_skills": matching,
+        "missing_skills": missing
+    }
+
+
+def seed_candidates():
+    save_analysis(
+        SENIOR_RESUME, ROLE, FULL_REQUIREMENTS, True, feedback(85, ["python", "django", "postgresql", "docker"], []),
+        candidate_email="senior@example.com"
+    )
+    save_analysis(
+        JUNIOR_RESUME, ROLE, FULL_REQUIREMENTS, False, feedback(30, ["python"], ["django", "postgresql", "docker"]),
+        candidate_email="junior@example.com"
+    )
+
+
+def finish_jobs(run_id: int):
+    """Stand in for the screening worker: save each queued job's analysis and complete the job."""
+    from database import db_session
+
+    with db_session() as (conn, cursor):
+        cursor.execute(
+            "SELECT id, resume_text, role_requirements, candidate_email FROM screening_jobs "
+            "WHERE rescore_run_id = %s AND status = 'queued'",
+            (run_id,)
+        )
+        jobs = cursor.fetchall()
+    for job_id, resume_text, role_requirements, email in jobs:
+        job_feedback = feedback(75, ["python"], [])
+        save_analysis(resume_text, ROLE, role_requirements, True, job_feedback, candidate_email=email)
+        complete_job(None, job_id, {"feedback": job_feedback, "selected": True})
+
+
+def test_stored_decision_stands_unless_the_fit_moves_towards_the_other_one():
+    diff = diff_requirements(FULL_REQUIREMENTS, PYTHON_ONLY)
+
+    senior = rescore_analysis(
+        analysis(True, 85, ["python", "django", "postgresql", "docker"], []), diff, SENIOR_RESUME, PYTHON_ONLY
+    )
+    junior = rescore_analysis(
+        analysis(False, 30, ["python"], ["django", "postgresql", "docker"]), diff, JUNIOR_RESUME, PYTHON_ONLY
+    )
+
+    assert (senior.selected, senior.may_flip) == (True, False)
+    # Covering every remaining requirement moves a rejected candidate towards selection.
+    assert (junior.selected, junior.may_flip) == (False, True)
+
+
+def test_prescreen_decides_as_it_would_on_a_new_screening():
+    diff = diff_requirements(FULL_REQUIREMENTS, "kubernetes, terraform")
+    stored = analysis(True, 85, ["python", "django", "postgresql", "docker"], [])
+
+    rescore = rescore_analysis(stored, diff, SENIOR_RESUME, "kubernetes, terraform")
+
+    assert (rescore.selected, rescore.source, rescore.may_flip) == (False, SOURCE_PRESCREEN, False)
+
+    # A pre-screen rejection the pre-screen no longer makes needs the model.
+    prescreened = analysis(False, 0, [], ["python"], source=SOURCE_PRESCREEN)
+    assert rescore_analysis(prescreened, diff_requirements("kubernetes", PYTHON_ONLY), JUNIOR_RESUME, PYTHON_ONLY).may_flip
+
+
+def test_run_waits_for_the_llm_jobs_it_queued(sqlite_db):
+    seed_candidates()
+
+    run_id = start_rescore(ROLE, PYTHON_ONLY)
+    run = run_rescore(run_id)
+
+    assert (run["rescored"], run["sent_to_llm"], run["llm_pending"]) == (1, 1, 1)
+    assert run["status"] == RUN_STATUS_ANALYZING
+    assert start_rescore(ROLE, PYTHON_ONLY) == run_id
+
+    finish_jobs(run_id)
+
+    assert refresh_rescore_run(run_id)["status"] == RUN_STATUS_DONE
+    assert latest_rescore_run(run["role_id"])["id"] == run_id
+
+
+def test_reverting_requirements_re_evaluates_candidates(sqlite_db):
+    seed_candidates()
+    first_run = start_rescore(ROLE, FULL_REQUIREMENTS)
+    assert run_rescore(first_run)["status"] == RUN_STATUS_DONE
+
+    edited_run = start_rescore(ROLE, PYTHON_ONLY)
+    run_rescore(edited_run)
+    finish_jobs(edited_run)
+    assert refresh_rescore_run(edited_run)["status"] == RUN_STATUS_DONE
+
+    reverted_run = start_rescore(ROLE, FULL_REQUIREMENTS)
+    run = run_rescore(reverted_run)
+
+    assert reverted_run not in (first_run, edited_run)
+    assert (run["processed"], run["skipped"]) == (2, 0)
+    assert run["rescored"] + run["sent_to_llm"] == 2
+
+    finish_jobs(reverted_run)
+    assert refresh_rescore_run(reverted_run)["status"] == RUN_STATUS_DONE
+    # Every candidate's latest analysis is on the version now, so saving it again has nothing to do.
+    assert start_rescore(ROLE, FULL_REQUIREMENTS) == reverted_run
+
+
+def test_a_new_rescore_run_requeues_a_finished_job(sqlite_db):
+    job = ScreeningJob(ROLE, PYTHON_ONLY, resume_text=JUNIOR_RESUME, candidate_email="junior@example.com")
+    job_id = submit_job(job)
+    complete_job(None, job_id, {"feedback": {}})
+
+    assert submit_job(job) == job_id
+    assert get_job(job_id)["status"] == "done"
+    assert submit_job(job, rescore_run_id=1) == job_id
+    assert get_job(job_id)["status"] == "queued"
+
+    complete_job(None, job_id, {"feedback": {}})
+    assert submit_job(job, rescore_run_id=1) == job_id
+    assert get_job(job_id)["status"] == "done"
@@ -0,0 +1,129 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from recruitment_utils import run_resume_analysis
+from resume_schema import get_parse_stats
+
+VALID_ANALYSIS = {
+    "selected": True,
+    "feedback": {
+        "matching_skills": ["python", "aws"],
+        "matching_skills_score": 80,
+        "missing_skills": ["kubernetes"],
+        "project_evaluation": "Relevant backend projects.",
+        "overall_fit": "Strong fit.",
+        "overall_fit_score": 85,
+        "experience_level": "Senior"
+    }
+}
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int, retry_after: str | None = None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers={"retry-after": retry_after} if retry_after else {})
+
+
+class StubModel:
+    """Replays scripted replies (strings) or raises scripted exceptions, one per run() call."""
+
+    def __init__(self, *replies, model_id: str = "stub-model"):
+        self.replies = list(replies)
+        self.prompts = []
+        self.model = SimpleNamespace(id=model_id, api_key=None)
+
+    def run(self, prompt: str):
+        self.prompts.append(prompt)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return SimpleNamespace(
+            content=reply,
+            messages=[SimpleNamespace(role="assistant", content=reply)],
+            metrics={"input_tokens": [len(prompt) // 4], "output_tokens": [len(reply) // 4]}
+        )
+
+
+def analyze(model, resume_text="Python and AWS engineer, 6 years."):
+    return run_resume_analysis(resume_text, "backend_engineer", "python, aws, kubernetes", model)
+
+
+@pytest.fixture(autouse=True)
+def offline(analysis_cache_path, unlimited_llm):
+    pass
+
+
+def test_repeated_analysis_is_served_from_cache():
+    model = StubModel(json.dumps(VALID_ANALYSIS))
+
+    first = analyze(model)
+    second = analyze(model, "Python and AWS   engineer,\n6 years.")
+
+    assert first == second
+    assert first[0] is True
+    assert first[1]["experience_level"] == "senior"
+    assert len(model.prompts) == 1
+
+
+def test_cache_is_keyed_by_model():
+    analyze(StubModel(json.dumps(VALID_ANALYSIS)))
+    other = StubModel(json.dumps({**VALID_ANALYSIS, "selected": False}), model_id="other-model")
+
+    assert analyze(other)[0] is False
+    assert len(other.prompts) == 1
+
+
+def test_malformed_output_is_repaired_without_resending_the_resume():
+    broken = json.dumps({**VALID_ANALYSIS, "feedback": {**VALID_ANALYSIS["feedback"], "overall_fit_score": "high"}})
+    model = StubModel(f"Here you go:\n```json\n{broken}\n```", json.dumps(VALID_ANALYSIS))
+    repaired_before = get_parse_stats()["repaired"]
+
+    selected, feedback = analyze(model, "UNIQUE-RESUME-MARKER Python and AWS engineer")
+
+    assert selected is True
+    assert feedback["overall_fit_score"] == 85
+    assert len(model.prompts) == 2
+    assert "UNIQUE-RESUME-MARKER" not in model.prompts[1]
+    assert get_parse_stats()["repaired"] == repaired_before + 1
+
+
+def test_missing_experience_level_is_repaired():
+    incomplete = {**VALID_ANALYSIS["feedback"]}
+    del incomplete["experience_level"]
+    model = StubModel(json.dumps({**VALID_ANALYSIS, "feedback": incomplete}), json.dumps(VALID_ANALYSIS))
+
+    _, feedback = analyze(model)
+
+    assert feedback["experience_level"] == "senior"
+    assert len(model.prompts) == 2
+
+
+def test_unrepairable_output_is_reported_and_not_cached():
+    model = StubModel("not json", "still not json", json.dumps(VALID_ANALYSIS))
+
+    selected, feedback = analyze(model)
+
+    assert selected is False
+    assert feedback.startswith("Error analyzing resume")
+    assert analyze(model)[0] is True
+    assert len(model.prompts) == 3
+
+
+def test_rate_limited_call_is_retried():
+    model = StubModel(StatusError(429, retry_after="0"), StatusError(503, retry_after="0"), json.dumps(VALID_ANALYSIS))
+
+    selected, _ = analyze(model)
+
+    assert selected is True
+    assert len(model.prompts) == 3
+
+
+def test_bad_request_is_not_retried():
+    model = StubModel(StatusError(400), json.dumps(VALID_ANALYSIS))
+
+    with pytest.raises(StatusError):
+        analyze(model)
+    assert len(model.prompts) == 1
@@ -0,0 +1,53 @@
+import pytest
+
+from resume_preprocessing import PAGE_BREAK, _is_noise, clean_lines
+
+
+@pytest.mark.parametrize("line", ["2019 - 2021", "2018.01 - 2020.12", "2019-2021", "Jan 2019 - Present"])
+def test_date_ranges_are_not_phone_numbers(line):
+    assert not _is_noise(line)
+
+
+@pytest.mark.parametrize("line", [
+    "+84 912 345 678",
+    "(555) 123-4567",
+    "0912.345.678",
+    "Phone: 0912345678",
+    "jane@example.com | +1-555-123-4567 | https://github.com/jane"
+])
+def test_contact_lines_are_noise(line):
+    assert _is_noise(line)
+
+
+def test_repeated_content_lines_are_kept():
+    text = "\n".join([
+        "Jane Doe",
+        "",
+        "Software Engineer",
+        "Acme 2019 - 2021",
+        "- Built APIs in Python",
+        "",
+        "Software Engineer",
+        "Globex 2021 - 2024",
+        "- Built APIs in Python"
+    ])
+
+    lines, _ = clean_lines(text)
+
+    assert lines.count("Software Engineer") == 2
+    assert lines.count("- Built APIs in Python") == 2
+    assert "Acme 2019 - 2021" in lines
+
+
+def test_running_headers_and_footers_are_dropped_after_the_first_page():
+    pages = [
+        "Jane Doe - Resume\nSummary\nBackend engineer\nExperience\nAcme\nPage 1 of 2\nConfidential",
+        "Jane Doe - Resume\nGlobex\nBuilt APIs\nSkills\nPython\nPage 2 of 2\nConfidential"
+    ]
+
+    lines, removed = clean_lines(PAGE_BREAK.join(pages))
+
+    assert lines.count("Jane Doe - Resume") == 1
+    assert lines.count("Confidential") == 1
+    assert not any(line.startswith("Page ") for line in lines)
+    assert removed == 4
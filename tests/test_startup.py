@@ -0,0 +1,42 @@
+import json
+import socket
+import urllib.error
+import urllib.request
+
+import startup
+from server import mark_ready_when_listening, server_port
+
+
+def readyz(port):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/readyz", timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_readyz_turns_200_once_the_app_server_listens(monkeypatch):
+    monkeypatch.setattr(startup, "_ready", type(startup._ready)())
+    probe = startup.ThreadingHTTPServer(("127.0.0.1", 0), startup.ProbeHandler)
+    probe.daemon_threads = True
+    startup.threading.Thread(target=probe.serve_forever, daemon=True).start()
+    app = socket.create_server(("127.0.0.1", 0))
+    try:
+        assert readyz(probe.server_address[1])[0] == 503
+
+        mark_ready_when_listening(app.getsockname()[1], timeout=5)
+
+        status, report = readyz(probe.server_address[1])
+        assert status == 200
+        assert report["ready"] is True
+    finally:
+        app.close()
+        probe.shutdown()
+        probe.server_close()
+
+
+def test_server_port_reads_streamlit_arguments(monkeypatch):
+    monkeypatch.delenv("STREAMLIT_SERVER_PORT", raising=False)
+    assert server_port(["--server.port=8080", "--server.address=0.0.0.0"]) == 8080
+    assert server_port(["--server.port", "9000"]) == 9000
+    assert server_port([]) == 8501
@@ -1,14 +1,110 @@
-import PyPDF2
-import streamlit as st
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Iterator
+
+from metrics import inc, span
+from resume_preprocessing import PAGE_BREAK
+
+if TYPE_CHECKING:
+    import PyPDF2
+
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_MAX_CHARS_PER_PAGE = int(os.getenv("PDF_MAX_CHARS_PER_PAGE", "20000"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "12"))
+PDF_TEXT_CACHE_SIZE = 64
+
+_text_cache = OrderedDict()
+_text_cache_lock = threading.Lock()
+
+
+def _extract_page(pdf_reader: "PyPDF2.PdfReader", page_index: int, max_chars: int) -> str:
+    """Extract one page; a broken page yields an empty string instead of failing the document."""
+    try:
+        return (pdf_reader.pages[page_index].extract_text() or "")[:max_chars]
+    except Exception as e:
+        print(f"⚠ Skipping unreadable PDF page {page_index + 1}: {e}")
+        return ""
+
+
+def _extract_page_range(pdf_bytes: bytes, start: int, stop: int, max_chars: int) -> list[str]:
+    """Worker-process entry point: extract pages [start, stop) from raw PDF bytes."""
+    import PyPDF2
+
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    return [_extract_page(pdf_reader, i, max_chars) for i in range(start, stop)]
+
+
+def iter_pdf_pages(
+    pdf_bytes: bytes,
+    max_pages: int = PDF_MAX_PAGES,
+    max_chars_per_page: int = PDF_MAX_CHARS_PER_PAGE,
+    parallel: bool = True
+) -> Iterator[str]:
+    """Yield the text of each page in order, at most max_pages pages.
+
+    Documents with at least PDF_PARALLEL_MIN_PAGES pages are split into page ranges
+    extracted in a process pool.
+    """
+    import PyPDF2
+
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    page_count = min(len(pdf_reader.pages), max_pages)
+
+    if not parallel or page_count < PDF_PARALLEL_MIN_PAGES:
+        for page_index in range(page_count):
+            yield _extract_page(pdf_reader, page_index, max_chars_per_page)
+        return
+
+    workers = min(os.cpu_count() or 1, page_count)
+    chunk_size = -(-page_count // workers)
+    ranges = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_extract_page_range, pdf_bytes, start, stop, max_chars_per_page) for start, stop in ranges]
+        for (start, stop), future in zip(ranges, futures):
+            try:
+                yield from future.result()
+            except Exception as e:
+                print(f"⚠ Skipping unreadable PDF pages {start + 1}-{stop}: {e}")
+                yield from [""] * (stop - start)
+
+
+def extract_text_from_pdf_bytes(pdf_bytes: bytes, parallel: bool = True) -> str:
+    """Extracts text from raw PDF bytes, memoized by content hash. Raises if the file cannot be opened."""
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    with _text_cache_lock:
+        if digest in _text_cache:
+            _text_cache.move_to_end(digest)
+            inc("pdf_text_cache_total", result="hit")
+            return _text_cache[digest]
+
+    inc("pdf_text_cache_total", result="miss")
+    with span("pdf.extract", size_bytes=len(pdf_bytes)) as attributes:
+        pages = list(iter_pdf_pages(pdf_bytes, parallel=parallel))
+        attributes["pages"] = len(pages)
+        text = PAGE_BREAK.join(page for page in pages if page)
+
+    with _text_cache_lock:
+        _text_cache[digest] = text
+        if len(_text_cache) > PDF_TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+    return text
+
 
 def extract_text_from_pdf(pdf_file) -> str:
     """Extracts text from a given PDF file."""
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text
+        if isinstance(pdf_file, (bytes, bytearray, memoryview)):
+            pdf_bytes = bytes(pdf_file)
+        else:
+            pdf_bytes = pdf_file.getvalue() if hasattr(pdf_file, "getvalue") else pdf_file.read()
+        return extract_text_from_pdf_bytes(pdf_bytes)
     except Exception as e:
+        import streamlit as st
+
         st.error(f"Error extracting PDF text: {str(e)}")
-        return ""
\ No newline at end of file
+        return ""